@@ -27,6 +27,7 @@ Dependencies:
 - seaborn
 - matplotlib
 - scipy.stats (for the Chi-square test)
+- excel_cache (Python/Raw_code, cached and typed Excel loading)
 
 Output:
 - Plot 1: Abscess level by group (4-category classification)
@@ -38,9 +39,12 @@ import seaborn as sns
 import matplotlib.pyplot as plt
 import scipy.stats as stats
 
+import raw_code_path  # noqa: F401  (shared helper modules in Python/Raw_code)
+from excel_cache import read_excel_cached
+
 # Read the input data
 file_path = 'Tkanki klasyfikacja.xlsx'
-df = pd.read_excel(file_path, sheet_name="Wątroba - ocena")
+df = read_excel_cached(file_path, sheet_name="Wątroba - ocena")
 
 plt.rcParams['font.family'] = 'Calibri'
 
@@ -50,7 +54,7 @@ plt.rcParams['font.family'] = 'Calibri'
 colors_full = ["#DCE1EA", "#B7C4D9", "#899BB5", "#5A6A85"]
 
 # Create a contingency table: count mice per group and abscess severity level
-abscesses_summary_full = df.groupby(['Group', 'Liver abscesses']).size().unstack(fill_value=0)
+abscesses_summary_full = df.groupby(['Group', 'Liver abscesses'], observed=True).size().unstack(fill_value=0)
 
 # Convert counts to percentages within each group
 abscesses_summary_full = abscesses_summary_full.divide(abscesses_summary_full.sum(axis=1), axis=0) * 100
@@ -78,7 +82,7 @@ df_filtered = df.copy()
 
 # Reclassify abscess levels into 2 categories:
 # A0 + A1 → "Trace or None", A2 + A3 → "Mild and Severe"
-df_filtered['Abscesses Level'] = df_filtered['Liver abscesses'].replace({
+df_filtered['Abscesses Level'] = df_filtered['Liver abscesses'].astype(object).replace({  # Other levels (e.g. A4) are kept
     'A0': 'Trace or None',
     'A1': 'Trace or None',
     'A2': 'Mild and Severe',
@@ -86,7 +90,7 @@ df_filtered['Abscesses Level'] = df_filtered['Liver abscesses'].replace({
 })
 
 # Create a contingency table for the grouped categories
-abscesses_summary_grouped = df_filtered.groupby(['Group', 'Abscesses Level']).size().unstack(fill_value=0)
+abscesses_summary_grouped = df_filtered.groupby(['Group', 'Abscesses Level'], observed=True).size().unstack(fill_value=0)
 
 # Convert counts to percentages within each group
 abscesses_summary_grouped = abscesses_summary_grouped.divide(abscesses_summary_grouped.sum(axis=1), axis=0) * 100
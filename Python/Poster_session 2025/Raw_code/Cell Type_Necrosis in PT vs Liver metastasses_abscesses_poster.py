@@ -29,6 +29,7 @@ Dependencies:
 - seaborn
 - matplotlib
 - scipy.stats (chi2_contingency)
+- excel_cache (Python/Raw_code, cached and typed Excel loading)
 
 Note:
 This script provides both visual and statistical insight into categorical variables in the TNBC dataset, 
@@ -41,11 +42,15 @@ import seaborn as sns
 import matplotlib.pyplot as plt
 from scipy.stats import chi2_contingency
 
+import raw_code_path  # noqa: F401  (shared helper modules in Python/Raw_code)
+from excel_cache import read_excel_cached
+
 # Set font for plots
 plt.rcParams['font.family'] = 'Calibri'
 
 # Load data
-df = pd.read_excel("UTF-8Lista przerzutów_CTC_13.05.2025.xlsx", sheet_name="Arkusz1")
+df = read_excel_cached("UTF-8Lista przerzutów_CTC_13.05.2025.xlsx", sheet_name="Arkusz1",
+                       typed=False)  # Untyped: the hue (Group) order follows the workbook rows
 df = df[df['Necrosis'] != 'no info']  # Exclude rows with missing necrosis info
 
 # Define color palettes
@@ -18,6 +18,7 @@ Dependencies:
 - seaborn
 - matplotlib
 - scipy
+- excel_cache (Python/Raw_code, cached and typed Excel loading)
 
 Input:
 - Excel file: 'UTF-8Lista przerzutów_CTC_13.05.2025.xlsx', sheet 'Arkusz1'
@@ -33,11 +34,14 @@ import seaborn as sns
 import matplotlib.pyplot as plt
 from scipy.stats import chi2_contingency
 
+import raw_code_path  # noqa: F401  (shared helper modules in Python/Raw_code)
+from excel_cache import read_excel_cached
+
 # Set font for the entire figure
 plt.rcParams['font.family'] = 'Calibri'
 
 # Load Excel data
-df = pd.read_excel('UTF-8Lista przerzutów_CTC_13.05.2025.xlsx', sheet_name='Arkusz1')
+df = read_excel_cached('UTF-8Lista przerzutów_CTC_13.05.2025.xlsx', sheet_name='Arkusz1')
 
 # Data cleaning: select relevant columns, drop missing values, filter out 'no info'
 df = df[['Cell Type', 'Necrosis']].dropna()
@@ -28,6 +28,13 @@ Dependencies:
 - matplotlib
 - scipy
 - openpyxl
+- excel_cache (Python/Raw_code, cached and typed Excel loading)
+- cluster_backend (Python/Raw_code: linkage with cached dendrograms, raster heatmap mode)
+- zscore_stream (Python/Raw_code: in-place float32 z-scores)
+
+Options:
+- clustering backend options (--cluster-rows, --method, --metric, --optimal-ordering, --raster),
+  see cluster_backend.py or run with --help
 
 How to run:
 - Make sure the Excel file is in the working directory
@@ -41,21 +48,31 @@ Data source:
 
 """
 
+import argparse
+
 import pandas as pd
-import seaborn as sns
 import matplotlib.pyplot as plt
 from matplotlib.patches import Patch
 from matplotlib.colors import Normalize
 from matplotlib.cm import ScalarMappable
-from scipy.stats import zscore
 from matplotlib.colors import LinearSegmentedColormap
 
+import raw_code_path  # noqa: F401  (shared helper modules in Python/Raw_code)
+from cluster_backend import add_cluster_arguments, cluster_options, clustermap
+from excel_cache import read_excel_cached
+from zscore_stream import zscore_frame
+
+# Clustering backend options (cluster_backend.py); the defaults draw the group-sorted figure
+parser = argparse.ArgumentParser(description='Z-scored immune cell clustermap')
+add_cluster_arguments(parser)
+args = parser.parse_args()
+
 # Set font for the entire figure
 plt.rcParams['font.family'] = 'Calibri'
 
 # Load and clean the dataset
 file_path = "ImmuCellAI_mouse_abundance_result_threshold_9.xlsx"
-df = pd.read_excel(file_path)
+df = read_excel_cached(file_path)
 df = df[df["Mouse number"] != 311]  # Remove mouse 311
 
 # Set mouse number as index and sort by group
@@ -64,7 +81,7 @@ df_sorted = df.sort_values("Group")
 
 # Select immune cell columns and compute Z-scores
 cell_types = df.columns.difference(['Group', 'Infiltration_score'])
-zscored = df_sorted[cell_types].apply(zscore)
+zscored = zscore_frame(df_sorted[cell_types])  # Per cell type, float32
 zscored.columns = zscored.columns.str.replace('_', ' ')
 
 # Custom color map for Infiltration Score
@@ -78,7 +95,7 @@ custom_cmap = LinearSegmentedColormap.from_list("custom_cmap", colors)
 
 # Assign colors to groups
 group_palette = {'Control': '#517FBC', 'Treated': '#AF4647'}
-group_colors = df_sorted['Group'].map(group_palette)
+group_colors = df_sorted['Group'].map(group_palette).astype(object)
 
 # Assign colors to infiltration scores
 norm = Normalize(vmin=df_sorted['Infiltration_score'].min(), vmax=df_sorted['Infiltration_score'].max())
@@ -92,13 +109,13 @@ col_colors = pd.DataFrame({
 }, index=df_sorted.index)
 
 # Generate the clustermap
-g = sns.clustermap(
+g = clustermap(
     zscored.T,
+    **cluster_options(args),
     cmap="vlag",
     center=0,
     col_colors=col_colors,
     col_cluster=False,
-    row_cluster=False,
     xticklabels=True,
     yticklabels=True,
     figsize=(20, 16),
@@ -6,10 +6,13 @@ from the ImmuCellAI-mouse output data. It includes:
 
 1. Statistical comparison between control and treated mouse groups 
    (Shapiro-Wilk test for normality, Levene's test for equal variance, 
-   Student's t-test or Mann-Whitney U test as appropriate).
+   Student's t-test or Mann-Whitney U test as appropriate; all cell types in one batched
+   pass over the Control / Treated matrices), plus exact permutation
+   p-values for all cell types in one vectorized pass (permutation_test.py in Python/Raw_code).
 2. Z-score normalization and clustermap visualization of immune cell types.
 3. Color-coded sample annotations by experimental group and infiltration score.
-4. Outlined cell types based on statistical significance (red: p < 0.05, gray: 0.05 ≤ p < 0.1).
+4. Outlined cell types based on statistical significance (red: p < 0.05, gray: 0.05 ≤ p < 0.1),
+   drawn as one PatchCollection placed through the dendrogram leaf order.
 5. Identification of immune cell types with significant differences between groups 
    and indication of the direction of change.
 
@@ -27,68 +30,106 @@ Dependencies:
     - seaborn
     - matplotlib
     - scipy
+    - excel_cache (Python/Raw_code, cached and typed Excel loading)
+    - permutation_test (Python/Raw_code)
+    - clustermap_cache (Python/Raw_code)
+    - lipid_stats (Python/Raw_code, batched Shapiro / Levene / t-test / Mann-Whitney U)
+    - zscore_stream (Python/Raw_code, in-place float32 z-scores)
+
+The statistics, group means and z-scores are cached in 'clustermap_cache' (key: workbook
+hash, excluded mice, test and permutation settings), so re-runs that only change the
+styling skip the numeric work and report the time saved.
 '''
 
+import numpy as np
 import pandas as pd
 import seaborn as sns
 import matplotlib.pyplot as plt
 from matplotlib.patches import Patch, Rectangle
+from matplotlib.collections import PatchCollection
 from matplotlib.colors import Normalize, LinearSegmentedColormap
 from matplotlib.cm import ScalarMappable
-from scipy.stats import zscore
-import scipy.stats as stats
+
+import raw_code_path  # noqa: F401  (shared helper modules in Python/Raw_code)
+from excel_cache import read_excel_cached
+from clustermap_cache import ClustermapCache
+from lipid_stats import compare_groups_levene
+from permutation_test import N_PERMUTATIONS, permutation_test
+from zscore_stream import zscore_frame
 
 plt.rcParams['font.family'] = 'Calibri'
 
-# --- Load data ---
+# --- Settings (the numeric results below are cached, see clustermap_cache.py) ---
 file_path = "ImmuCellAI_mouse_abundance_result_threshold_9.xlsx"
-df = pd.read_excel(file_path)
-df = df[df["Mouse number"] != 311]  # Exclude outlier mouse
-df.set_index("Mouse number", inplace=True)
-df_sorted = df.sort_values("Group")
-
-# --- Data prep for analysis ---
-cell_types = df.columns[2:]  # Exclude mouse number and group columns
-group_control = df[df["Group"] == "Control"]
-group_treated = df[df["Group"] == "Treated"]
-
-# --- Statistical testing ---
-results = []
-for cell in cell_types:
-    data_control = group_control[cell]
-    data_treated = group_treated[cell]
-
-    # Shapiro-Wilk test (normality)
-    p_norm_control = stats.shapiro(data_control).pvalue
-    p_norm_treated = stats.shapiro(data_treated).pvalue
-
-    # Levene’s test (equal variances)
-    p_var = stats.levene(data_control, data_treated).pvalue
-
-    # Choose test
-    if p_norm_control > 0.05 and p_norm_treated > 0.05 and p_var > 0.05:
-        test = "t-test"
-        stat, p_val = stats.ttest_ind(data_control, data_treated)
-    else:
-        test = "Mann-Whitney U"
-        stat, p_val = stats.mannwhitneyu(data_control, data_treated, alternative='two-sided')
-
-    results.append({
-        "Cell_type": cell,
-        "Normality_p_Control": p_norm_control,
-        "Normality_p_Treated": p_norm_treated,
-        "Equal_variance_p": p_var,
-        "Test": test,
-        "Statistic": stat,
-        "p_value": p_val
-    })
-
+exclude_mice = [311]  # Exclude outlier mouse
+NUMERIC_VERSION = 3  # Increase when compute_numeric (or a helper it calls) changes the cached numbers
+
+
+# Statistical tests, group means and z-scores (cached by input hash and parameters)
+def compute_numeric():
+    # --- Load data ---
+    df = read_excel_cached(file_path)
+    df = df[~df["Mouse number"].isin(exclude_mice)]
+    df.set_index("Mouse number", inplace=True)
+    df_sorted = df.sort_values("Group")
+
+    # --- Data prep for analysis ---
+    cell_types = df.columns[2:]  # Exclude mouse number and group columns
+    group_control = df[df["Group"] == "Control"]
+    group_treated = df[df["Group"] == "Treated"]
+
+    # --- Statistical testing: all cell types in one batched pass (Control / Treated matrices) ---
+    control = group_control[cell_types].to_numpy(dtype=float)
+    treated = group_treated[cell_types].to_numpy(dtype=float)
+
+    # Shapiro-Wilk (normality) and Levene (equal variances) per column; Student's t-test if normal
+    # with equal variances, Mann-Whitney U otherwise (exact or asymptotic as a single-column call)
+    group_tests = compare_groups_levene(control, treated, normality_alpha=0.05)
+
+    results = pd.DataFrame({
+        "Cell_type": cell_types,
+        "Normality_p_Control": group_tests.p_norm_first,
+        "Normality_p_Treated": group_tests.p_norm_second,
+        "Equal_variance_p": group_tests.p_var,
+        "Test": group_tests.test,
+        "Statistic": group_tests.statistic,
+        "p_value": group_tests.p_value
+    }).to_dict('records')
+
+    # --- Permutation p-values (exact for small groups), all cell types at once ---
+    # Mean difference for t-test rows (equivalent to Student's t), U statistic for Mann-Whitney rows
+    tests = np.array([row["Test"] for row in results])
+    p_permutation = np.full(len(results), np.nan)
+    for test_name, statistic in (("t-test", "mean_difference"), ("Mann-Whitney U", "mann_whitney_u")):
+        selected = tests == test_name
+        if selected.any():
+            columns = cell_types[selected]
+            p_permutation[selected] = permutation_test(group_control[columns], group_treated[columns],
+                                                       statistic, seed=0).pvalue
+    for row, p_perm in zip(results, p_permutation):
+        row["p_value_permutation"] = p_perm
+
+    # --- Group means (direction of change) ---
+    for row in results:
+        row["Mean_Control"] = group_control[row["Cell_type"]].mean()
+        row["Mean_Treated"] = group_treated[row["Cell_type"]].mean()
+
+    # --- Z-score normalization for visualization ---
+    cell_types = df.columns.difference(['Group', 'Infiltration_score'])
+    zscored = zscore_frame(df_sorted[cell_types])  # Per cell type, float32
+    zscored.columns = zscored.columns.str.replace('_', ' ')
+    return {'results': results, 'zscored': zscored, 'annotations': df_sorted[['Group', 'Infiltration_score']]}
+
+
+cache = ClustermapCache()
+params = {'script': 'Clustermap with 2 colorbars_significance_poster', 'exclude_mice': sorted(exclude_mice),
+          'normality_alpha': 0.05, 'permutation_seed': 0, 'n_permutations': N_PERMUTATIONS, 'zscore': 'columns, float32'}
+numeric = cache.get_or_compute(ClustermapCache.key(file_path, params, NUMERIC_VERSION), compute_numeric)
+results = numeric['results']
+zscored = numeric['zscored']
+df_sorted = numeric['annotations']
 results_df = pd.DataFrame(results).sort_values("p_value")
-
-# --- Z-score normalization for visualization ---
-cell_types = df.columns.difference(['Group', 'Infiltration_score'])
-zscored = df_sorted[cell_types].apply(zscore)
-zscored.columns = zscored.columns.str.replace('_', ' ')
+print(cache.report())
 
 # Custom colormap
 colors = ["#DCE1EA", "#B7C4D9", "#899BB5", "#5A6A85"]
@@ -96,7 +137,7 @@ custom_cmap = LinearSegmentedColormap.from_list("custom_cmap", colors)
 
 # Sample color annotations
 group_palette = {'Control': '#517FBC', 'Treated': '#AF4647'}
-group_colors = df_sorted['Group'].map(group_palette)
+group_colors = df_sorted['Group'].map(group_palette).astype(object)
 
 norm = Normalize(vmin=df_sorted['Infiltration_score'].min(), vmax=df_sorted['Infiltration_score'].max())
 infiltration_colors = df_sorted['Infiltration_score'].map(lambda x: custom_cmap(norm(x)))
@@ -166,29 +207,26 @@ g.ax_heatmap.set_xlabel("Mouse number", fontsize=18)
 g.ax_heatmap.set_xticklabels(g.ax_heatmap.get_xticklabels(), fontsize=16, rotation=45)
 g.ax_heatmap.set_yticklabels(g.ax_heatmap.get_yticklabels(), fontsize=16)
 
-# --- Highlight significant rows with rectangles ---
-yticklabels = g.ax_heatmap.get_yticklabels()
-row_labels = [label.get_text() for label in yticklabels]
-
-red_outline = set()
-gray_outline = set()
-
-for _, row in results_df.iterrows():
-    name = row["Cell_type"].replace("_", " ")
-    p = row["p_value"]
-    if p < 0.05:
-        red_outline.add(name)
-    elif p < 0.1:
-        gray_outline.add(name)
-
-for idx, label in enumerate(row_labels):
-    y = idx
-    if label in red_outline:
-        rect = Rectangle((0, y), zscored.shape[0], 1, linewidth=2, edgecolor='red', facecolor='none')
-        g.ax_heatmap.add_patch(rect)
-    elif label in gray_outline:
-        rect = Rectangle((0, y), zscored.shape[0], 1, linewidth=1, edgecolor='gray', facecolor='none')
-        g.ax_heatmap.add_patch(rect)
+# --- Highlight significant rows: one PatchCollection, rows mapped through the dendrogram leaf order ---
+row_names = zscored.columns  # Heatmap rows before reordering (cell types)
+leaf_order = g.dendrogram_row.reordered_ind if g.dendrogram_row is not None else np.arange(len(row_names))
+row_position = np.empty(len(row_names), dtype=int)
+row_position[leaf_order] = np.arange(len(row_names))
+
+p_values = results_df["p_value"].to_numpy()
+row_index = row_names.get_indexer(results_df["Cell_type"].str.replace("_", " "))  # -1: not in the heatmap
+highlighted = (p_values < 0.1) & (row_index >= 0)
+rows = row_position[row_index[highlighted]]
+red = p_values[highlighted] < 0.05
+order = np.argsort(rows, kind='stable')  # Top to bottom: shared edges overlap as before
+rows, red = rows[order], red[order]
+boxes = PatchCollection(
+    [Rectangle((0, y), zscored.shape[0], 1) for y in rows],
+    facecolor='none',
+    edgecolor=np.where(red, 'red', 'gray'),
+    linewidth=np.where(red, 2, 1)
+)
+g.ax_heatmap.add_collection(boxes)
 
 plt.show()
 
@@ -210,13 +248,7 @@ ax.legend(
 )
 plt.show()
 
-# --- Add means and compare direction ---
-for i, row in enumerate(results):
-    cell = row["Cell_type"]
-    results[i]["Mean_Control"] = group_control[cell].mean()
-    results[i]["Mean_Treated"] = group_treated[cell].mean()
-
-results_df = pd.DataFrame(results).sort_values("p_value")
+# --- Compare direction (group means computed with the statistics) ---
 results_df["Higher_in"] = results_df.apply(
     lambda row: "Treated" if row["Mean_Treated"] > row["Mean_Control"] else "Control",
     axis=1
@@ -224,4 +256,4 @@ results_df["Higher_in"] = results_df.apply(
 
 # Filter significant results
 significant = results_df[results_df["p_value"] < 0.1].copy()
-print(significant[["Cell_type", "p_value", "Mean_Control", "Mean_Treated", "Higher_in"]])
+print(significant[["Cell_type", "p_value", "p_value_permutation", "Mean_Control", "Mean_Treated", "Higher_in"]])
@@ -8,7 +8,8 @@ This script analyzes immune cell infiltration scores in relation to two categori
 2. Necrosis level (tissue damage severity)
 
 Comparisons are made between Control and Treated groups using:
-- Mann–Whitney U tests for each category (non-parametric)
+- Mann–Whitney U tests for each category (non-parametric), with exact permutation p-values
+  (permutation_test.py in Python/Raw_code)
 - Kruskal–Wallis tests to detect differences within Control or Treated groups across categories
 
 Visualizations:
@@ -24,6 +25,7 @@ Dependencies:
 - seaborn
 - matplotlib
 - scipy.stats
+- permutation_test (Python/Raw_code)
 
 Outputs:
 - Printed p-values for each test
@@ -38,6 +40,9 @@ from scipy.stats import mannwhitneyu, kruskal
 import seaborn as sns
 import matplotlib.pyplot as plt
 
+import raw_code_path  # noqa: F401  (shared helper modules in Python/Raw_code)
+from permutation_test import permutation_test
+
 # Load the dataset
 df = pd.read_excel('Infiltration vs. Cell Type_Necrosis.xlsx')
 
@@ -54,7 +59,8 @@ for ct in filtered_df['Cell Type'].unique():
 
     if len(control_vals) > 1 and len(treated_vals) > 1:
         stat, p = mannwhitneyu(control_vals, treated_vals, alternative='two-sided')
-        print(f" - {ct}: p = {p:.4f}")
+        p_perm = permutation_test(control_vals, treated_vals, 'mann_whitney_u', seed=0).pvalue
+        print(f" - {ct}: p = {p:.4f} (permutation p = {p_perm:.4f})")
     else:
         print(f" - {ct}: Not enough data for test")
 
@@ -68,7 +74,8 @@ for nec in filtered_df['Necrosis'].unique():
 
     if len(control_vals) > 1 and len(treated_vals) > 1:
         stat, p = mannwhitneyu(control_vals, treated_vals, alternative='two-sided')
-        print(f" - {nec}: p = {p:.4f}")
+        p_perm = permutation_test(control_vals, treated_vals, 'mann_whitney_u', seed=0).pvalue
+        print(f" - {nec}: p = {p:.4f} (permutation p = {p_perm:.4f})")
     else:
         print(f" - {nec}: Not enough data for test")
 
@@ -19,6 +19,8 @@ Statistical Analysis:
   - Assesses overall differences in infiltration scores across levels of metastases or abscesses
 - Mann-Whitney U test:
   - Pairwise comparison between Control and Treated groups within each metastasis/abscess category
+- Permutation test (permutation_test.py in Python/Raw_code):
+  - Exact permutation p-value of the same Control vs Treated comparison, printed per category
 
 Visualizations:
 - Two plots:
@@ -37,6 +39,8 @@ Dependencies:
 - seaborn
 - matplotlib
 - scipy.stats
+- excel_cache (Python/Raw_code, cached and typed Excel loading)
+- permutation_test (Python/Raw_code)
 """
 
 from scipy.stats import kruskal, mannwhitneyu
@@ -44,8 +48,13 @@ import seaborn as sns
 import matplotlib.pyplot as plt
 import pandas as pd
 
-# Load data from Excel
-df = pd.read_excel('Infiltration vs Metastases_abscesses.xlsx')
+import raw_code_path  # noqa: F401  (shared helper modules in Python/Raw_code)
+from excel_cache import read_excel_cached
+from permutation_test import permutation_test
+
+# Load data from Excel (untyped: box order, legend order and the p-value positions
+# (custom_heights) follow the order of the rows in the workbook)
+df = read_excel_cached('Infiltration vs Metastases_abscesses.xlsx', typed=False)
 
 # ----- Kruskal-Wallis test for liver metastases -----
 metastases_groups = [df[df['Liver metastases'] == level]['Infiltration_score'] for level in df['Liver metastases'].unique()]
@@ -81,6 +90,8 @@ for i, level in enumerate(metastases_levels):
     if len(control_vals) > 1 and len(treated_vals) > 1:
         stat, p = mannwhitneyu(control_vals, treated_vals, alternative='two-sided')
         plt.text(i, custom_heights[i], f"p = {p:.3f}", ha='center', fontsize=9)
+        p_perm = permutation_test(control_vals, treated_vals, 'mann_whitney_u', seed=0).pvalue
+        print(f"Liver metastases {level}: Mann-Whitney p = {p:.4f}, permutation p = {p_perm:.4f}")
 
 plt.xlabel("Level of Liver Metastases")
 plt.ylabel("Infiltration Score")
@@ -113,6 +124,8 @@ for i, level in enumerate(abscess_levels):
     if len(control_vals) > 1 and len(treated_vals) > 1:
         stat, p = mannwhitneyu(control_vals, treated_vals, alternative='two-sided')
         plt.text(i, custom_heights[i], f"p = {p:.3f}", ha='center', fontsize=9)
+        p_perm = permutation_test(control_vals, treated_vals, 'mann_whitney_u', seed=0).pvalue
+        print(f"Liver abscesses {level}: Mann-Whitney p = {p:.4f}, permutation p = {p_perm:.4f}")
 
 plt.xlabel("Level of Liver Abscesses")
 plt.ylabel("Infiltration Score")
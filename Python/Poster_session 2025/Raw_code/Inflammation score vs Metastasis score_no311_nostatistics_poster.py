@@ -23,6 +23,7 @@ Dependencies:
 - matplotlib
 - seaborn
 - scipy.stats (Fisher's exact test – optional, commented out)
+- excel_cache (Python/Raw_code, cached and typed Excel loading)
 '''
 
 import pandas as pd
@@ -31,11 +32,14 @@ import matplotlib.pyplot as plt
 from scipy.stats import fisher_exact
 import seaborn as sns
 
+import raw_code_path  # noqa: F401  (shared helper modules in Python/Raw_code)
+from excel_cache import read_excel_cached
+
 # Set font for plots
 plt.rcParams['font.family'] = 'Calibri'
 
 # Load data
-df = pd.read_excel("Tkanki klasyfikacja.xlsx")
+df = read_excel_cached("Tkanki klasyfikacja.xlsx")
 
 # Remove mouse 311 (outlier or missing data)
 df = df[df['Mouse number'] != 311]
@@ -52,7 +56,7 @@ df['y_base'] = df['Inflammation score'].cat.codes
 
 # Apply group-based X position offset to separate Control and Treated within categories
 group_offsets = {'Control': -0.25, 'Treated': 0.25}
-df['x_offset'] = df['Group'].map(group_offsets)
+df['x_offset'] = df['Group'].map(group_offsets).astype(float)
 df['x_pos'] = df['x_base'] + df['x_offset']
 
 # Jitter points within grid cells (GraphPad-style scatter)
@@ -71,7 +75,7 @@ def grid_jitter(n, max_cols=3, jitter=0.1):
 
 # Apply jitter to all subgroups
 df['x_jitter'], df['y_jitter'] = 0.0, 0.0
-for (x_base, y_base, group), subdf in df.groupby(['x_base', 'y_base', 'Group']):
+for (x_base, y_base, group), subdf in df.groupby(['x_base', 'y_base', 'Group'], observed=True):
     x_j, y_j = grid_jitter(len(subdf))
     df.loc[subdf.index, 'x_jitter'] = x_j
     df.loc[subdf.index, 'y_jitter'] = y_j
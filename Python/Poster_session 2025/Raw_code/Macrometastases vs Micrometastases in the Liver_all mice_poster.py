@@ -28,6 +28,7 @@ Dependencies:
 - matplotlib
 - seaborn
 - scipy
+- excel_cache (Python/Raw_code, cached and typed Excel loading)
 
 """
 
@@ -36,12 +37,15 @@ import seaborn as sns
 import matplotlib.pyplot as plt
 import scipy.stats as stats
 
+import raw_code_path  # noqa: F401  (shared helper modules in Python/Raw_code)
+from excel_cache import read_excel_cached
+
 # Set font globally
 plt.rcParams['font.family'] = 'Calibri'
 
 # Load data
 file_path = 'Tkanki klasyfikacja.xlsx'
-df = pd.read_excel(file_path, sheet_name="Wątroba - ocena")
+df = read_excel_cached(file_path, sheet_name="Wątroba - ocena")
 #df = df[df["Mouse number"] != 311]  # Delete mouse 311
 
 # Define color palette
@@ -57,7 +61,7 @@ colors = [
 # =============================================================================
 
 # Group by original metastasis categories and calculate percentages
-metastases_summary = df.groupby(['Group', 'Liver metastases']).size().unstack(fill_value=0)
+metastases_summary = df.groupby(['Group', 'Liver metastases'], observed=True).size().unstack(fill_value=0)
 metastases_summary = metastases_summary.divide(metastases_summary.sum(axis=1), axis=0) * 100
 
 # Plot
@@ -93,7 +97,7 @@ plt.show()
 df_filtered = df.copy()
 
 # Group M0/M1 as Micrometastases; M2/M3 as Macrometastases
-df_filtered['Metastases Type'] = df_filtered['Liver metastases'].replace({
+df_filtered['Metastases Type'] = df_filtered['Liver metastases'].astype(object).replace({  # Other levels are kept
     'M0': 'Micrometastases',
     'M1': 'Micrometastases',
     'M2': 'Micrometastases',
@@ -101,7 +105,7 @@ df_filtered['Metastases Type'] = df_filtered['Liver metastases'].replace({
 })
 
 # Calculate percentage distribution
-metastases_grouped = df_filtered.groupby(['Group', 'Metastases Type']).size().unstack(fill_value=0)
+metastases_grouped = df_filtered.groupby(['Group', 'Metastases Type'], observed=True).size().unstack(fill_value=0)
 metastases_grouped = metastases_grouped.divide(metastases_grouped.sum(axis=1), axis=0) * 100
 
 # Plot
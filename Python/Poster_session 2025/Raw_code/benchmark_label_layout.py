@@ -0,0 +1,91 @@
+"""
+Benchmark – Label Layout Time and Overlaps: Grid Engine vs adjust_text
+
+Synthetic volcano plot (25,000 genes, same figure size and label font as the poster plots);
+the N most significant genes get a text label, which is then placed by
+- 'grid': label_layout.grid_layout (spatial hash, bounded candidate positions)
+- 'adjusttext': adjustText.adjust_text (iterative reference)
+
+For every label count (default 50, 200, 1000) and engine:
+- layout time [s]
+- overlapping label pairs before and after the layout
+- mean label displacement from its point [px]
+(adjust_text may run out of memory at 1000 labels; this is reported instead of a result)
+
+Usage:
+    python benchmark_label_layout.py --labels 50 200 1000 --skip-adjusttext-above 1000
+
+Dependencies:
+- numpy
+- matplotlib
+- adjustText
+"""
+
+import argparse
+import time
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import numpy as np
+
+from label_layout import count_overlaps, layout_labels
+
+
+# Synthetic volcano data: log2(FC) and -log10(p) for n genes
+def synthetic_volcano(n_genes=25000, seed=0):
+    rng = np.random.default_rng(seed)
+    logfc = rng.normal(0, 1.2, n_genes)
+    logp = np.abs(logfc) * rng.gamma(2.0, 0.8, n_genes) + rng.exponential(0.4, n_genes)
+    return logfc, logp
+
+
+# One labelled plot; returns layout time, overlaps before / after and mean displacement
+def run_layout(logfc, logp, n_labels, engine, label_size=8):
+    fig, ax = plt.subplots(figsize=(12, 10))
+    ax.scatter(logfc, logp, s=10, c='lightgray')
+    ax.set_ylim(0, None)
+
+    rows = np.argsort(-logp, kind='stable')[:n_labels]
+    texts = [ax.text(logfc[row], logp[row], f'Gene{row}', fontsize=label_size, ha='center', va='bottom')
+             for row in rows]
+    overlaps_before = count_overlaps(ax, texts)
+    anchors = ax.transData.transform(np.column_stack([logfc[rows], logp[rows]]))
+
+    start = time.perf_counter()
+    layout_labels(ax, texts, engine=engine)
+    seconds = time.perf_counter() - start
+
+    overlaps_after = count_overlaps(ax, texts)
+    renderer = fig.canvas.get_renderer()
+    centers = np.array([[(box.x0 + box.x1) / 2, (box.y0 + box.y1) / 2]
+                        for box in (text.get_window_extent(renderer) for text in texts)])
+    displacement = float(np.mean(np.hypot(*(centers - anchors).T)))
+    plt.close(fig)
+    return seconds, overlaps_before, overlaps_after, displacement
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark of the label layout engines')
+    parser.add_argument('--labels', type=int, nargs='+', default=[50, 200, 1000])
+    parser.add_argument('--genes', type=int, default=25000)
+    parser.add_argument('--skip-adjusttext-above', type=int, default=None,
+                        help='do not run adjust_text for more labels than this (it can take minutes)')
+    args = parser.parse_args()
+
+    logfc, logp = synthetic_volcano(args.genes)
+    print(f"{'labels':>6}  {'engine':<10}  {'time [s]':>9}  {'overlaps before':>15}  "
+          f"{'overlaps after':>14}  {'mean shift [px]':>15}")
+    for n_labels in args.labels:
+        for engine in ('grid', 'adjusttext'):
+            if engine == 'adjusttext' and args.skip_adjusttext_above is not None \
+                    and n_labels > args.skip_adjusttext_above:
+                print(f"{n_labels:>6}  {engine:<10}  {'skipped':>9}")
+                continue
+            try:
+                seconds, before, after, shift = run_layout(logfc, logp, n_labels, engine)
+            except MemoryError:  # adjust_text builds pairwise overlap arrays for many labels
+                plt.close('all')
+                print(f"{n_labels:>6}  {engine:<10}  {'failed (out of memory)':>9}")
+                continue
+            print(f"{n_labels:>6}  {engine:<10}  {seconds:>9.2f}  {before:>15}  {after:>14}  {shift:>15.1f}")
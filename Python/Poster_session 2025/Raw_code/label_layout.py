@@ -0,0 +1,161 @@
+"""
+Fast Label Placement for Volcano Plots (replacement for iterative adjust_text)
+
+Places gene labels next to their points without overlaps, in a bounded number of steps:
+1. every label is measured once (display coordinates, pixels);
+2. labels are placed one by one in the given order (most significant genes first);
+   for each label a fixed list of candidate positions around its point is tried
+   (8 directions x `n_rings` distances, starting directly above the point);
+3. overlap checks only look at the labels / points in the neighbouring cells of a
+   uniform grid (spatial hash), so a check does not depend on the total number of labels;
+4. the first candidate without overlap is taken; if none is free, the candidate with the
+   smallest overlap area;
+5. labels that were moved away from their point get a connecting line (one LineCollection).
+
+Cost: at most n_labels x 8 x n_rings candidate checks – no iterative force simulation.
+adjust_text (adjustText) remains available as the quality reference: `layout_labels(...,
+engine='adjusttext')` and benchmark_label_layout.py compare both.
+
+Dependencies:
+- numpy
+- matplotlib
+- adjustText (only for engine='adjusttext')
+"""
+
+import numpy as np
+from matplotlib.collections import LineCollection
+
+DIRECTIONS = [(0, 1), (1, 1), (-1, 1), (1, 0), (-1, 0), (0, -1), (1, -1), (-1, -1)]
+
+
+# Uniform grid of boxes (x0, y0, x1, y1) for neighbourhood queries
+class BoxGrid:
+    def __init__(self, cell_size, capacity=1024):
+        self.cell_size = cell_size
+        self.cells = {}
+        self.boxes = np.empty((capacity, 4))
+        self.n_boxes = 0
+
+    def _cells(self, box):
+        x0, y0, x1, y1 = (int(np.floor(value / self.cell_size)) for value in box)
+        return ((i, j) for i in range(x0, x1 + 1) for j in range(y0, y1 + 1))
+
+    def add(self, box):
+        if self.n_boxes == len(self.boxes):
+            self.boxes = np.concatenate([self.boxes, np.empty_like(self.boxes)])
+        index = self.n_boxes
+        self.boxes[index] = box
+        self.n_boxes += 1
+        for cell in self._cells(box):
+            self.cells.setdefault(cell, []).append(index)
+
+    # Indices of the stored boxes in the grid cells covered by `region`
+    def neighbours(self, region):
+        indices = [index for cell in self._cells(region) for index in self.cells.get(cell, ())]
+        return np.unique(np.asarray(indices, dtype=np.intp))
+
+    # Overlap area of every candidate box (m x 4) with the stored boxes (0.0 = free)
+    def overlap(self, candidates):
+        candidates = np.asarray(candidates, dtype=float).reshape(-1, 4)
+        region = (candidates[:, 0].min(), candidates[:, 1].min(), candidates[:, 2].max(), candidates[:, 3].max())
+        others = self.boxes[self.neighbours(region)]
+        width = np.minimum(candidates[:, None, 2], others[:, 2]) - np.maximum(candidates[:, None, 0], others[:, 0])
+        height = np.minimum(candidates[:, None, 3], others[:, 3]) - np.maximum(candidates[:, None, 1], others[:, 1])
+        return (np.clip(width, 0, None) * np.clip(height, 0, None)).sum(axis=1)
+
+
+# Label boxes in display coordinates
+def text_boxes(ax, texts):
+    renderer = ax.figure.canvas.get_renderer()
+    boxes = []
+    for text in texts:
+        extent = text.get_window_extent(renderer)
+        boxes.append((extent.x0, extent.y0, extent.x1, extent.y1))
+    return np.asarray(boxes, dtype=float).reshape(-1, 4)
+
+
+# Number of overlapping label pairs (grid-based)
+def count_overlaps(ax, texts):
+    boxes = text_boxes(ax, texts)
+    if len(boxes) == 0:
+        return 0
+    grid = BoxGrid(max(1.0, float(np.median(boxes[:, 2] - boxes[:, 0]))), capacity=len(boxes))
+    overlaps = 0
+    for box in boxes:
+        others = grid.boxes[grid.neighbours(box)]
+        overlaps += int(np.count_nonzero(
+            (np.minimum(box[2], others[:, 2]) > np.maximum(box[0], others[:, 0]))
+            & (np.minimum(box[3], others[:, 3]) > np.maximum(box[1], others[:, 1]))
+        ))
+        grid.add(box)
+    return overlaps
+
+
+# Point on the border of a box on the way from its centre towards (x, y)
+def _box_edge(center, half_width, half_height, x, y):
+    dx, dy = x - center[0], y - center[1]
+    scale = min(half_width / abs(dx) if dx else np.inf, half_height / abs(dy) if dy else np.inf, 1.0)
+    return center[0] + dx * scale, center[1] + dy * scale
+
+
+# Candidate offsets in units of (label half size + point radius): rings x DIRECTIONS, nearest first
+def _candidate_offsets(n_rings):
+    return np.array([(dx * ring, dy * ring) for ring in range(1, n_rings + 1) for dx, dy in DIRECTIONS], dtype=float)
+
+
+# Grid-based label placement (see module docstring)
+def grid_layout(ax, texts, n_rings=6, padding=2.0, point_radius=3.0, line_color='gray', line_width=0.5):
+    if not texts:
+        return None
+    ax.get_xlim(), ax.get_ylim()  # Apply pending autoscaling before transforming to pixels
+    renderer = ax.figure.canvas.get_renderer()
+    to_data = ax.transData.inverted().transform
+
+    anchors = ax.transData.transform(np.asarray([text.get_position() for text in texts], dtype=float))
+    boxes = text_boxes(ax, texts)
+    half_sizes = (boxes[:, 2:] - boxes[:, :2]) / 2 + padding
+    offsets = _candidate_offsets(n_rings)
+
+    axes_box = ax.get_window_extent(renderer)
+    grid = BoxGrid(max(1.0, float(np.median(half_sizes[:, 0])) * 2), capacity=2 * len(texts))
+    for x, y in anchors:  # Labels should not cover the labelled points
+        grid.add((x - point_radius, y - point_radius, x + point_radius, y + point_radius))
+
+    centers = np.empty_like(anchors)
+    for k, ((x, y), (half_width, half_height)) in enumerate(zip(anchors, half_sizes)):
+        cx = x + offsets[:, 0] * (half_width + point_radius)
+        cy = y + offsets[:, 1] * (half_height + point_radius)
+        candidates = np.column_stack([cx - half_width, cy - half_height, cx + half_width, cy + half_height])
+        inside = ((candidates[:, 0] >= axes_box.x0) & (candidates[:, 2] <= axes_box.x1)
+                  & (candidates[:, 1] >= axes_box.y0) & (candidates[:, 3] <= axes_box.y1))
+        if inside.any():
+            candidates = candidates[inside]
+            overlap = grid.overlap(candidates)
+            free = np.flatnonzero(overlap == 0.0)
+            box = candidates[free[0] if len(free) else np.argmin(overlap)]  # Nearest free, else least overlap
+        else:  # No candidate inside the axes – keep directly above the point
+            box = candidates[0]
+        grid.add(box)
+        centers[k] = (box[0] + box[2]) / 2, (box[1] + box[3]) / 2
+
+    segments = []
+    for text, (x, y), (cx, cy), (half_width, half_height) in zip(texts, anchors, centers, half_sizes):
+        text.set_position(to_data([[cx, cy]])[0])
+        text.set_ha('center')
+        text.set_va('center')
+        if abs(cx - x) > half_width + point_radius or abs(cy - y) > half_height + point_radius:
+            segments.append([to_data([[x, y]])[0], to_data([_box_edge((cx, cy), half_width, half_height, x, y)])[0]])
+
+    lines = LineCollection(segments, colors=line_color, linewidths=line_width, zorder=1)
+    ax.add_collection(lines, autolim=False)
+    return lines
+
+
+# Place labels with the chosen engine: 'grid' (fast, bounded) or 'adjusttext' (reference)
+def layout_labels(ax, texts, engine='grid', **kwargs):
+    if engine == 'grid':
+        return grid_layout(ax, texts, **kwargs)
+    if engine == 'adjusttext':
+        from adjustText import adjust_text
+        return adjust_text(texts, arrowprops=dict(arrowstyle='-', color='gray', lw=0.5), ax=ax, **kwargs)
+    raise ValueError(f"Unknown label engine: {engine!r} (expected 'grid' or 'adjusttext')")
@@ -0,0 +1,25 @@
+"""
+Access to the Shared Helper Modules from the Poster Scripts
+
+The poster scripts use helper modules kept in Python/Raw_code (excel_cache, cluster_backend,
+clustermap_cache, lipid_stats, permutation_test, zscore_stream). Importing this module puts
+that folder on sys.path once:
+
+    import raw_code_path  # noqa: F401
+    from excel_cache import read_excel_cached
+
+Scripts run from this folder find it directly. Alternatively, set PYTHONPATH to
+Python/Raw_code (the import here is then a no-op).
+
+Dependencies:
+- os
+- sys
+"""
+
+import os
+import sys
+
+RAW_CODE_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'Raw_code'))
+
+if RAW_CODE_DIR not in sys.path:
+    sys.path.insert(0, RAW_CODE_DIR)
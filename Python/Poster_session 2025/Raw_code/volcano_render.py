@@ -0,0 +1,241 @@
+"""
+Batch Volcano Plot Renderer – All Days, Label Counts and Gene Exclusion Lists
+
+One rendering module (with a command line interface) for the poster volcano plots, replacing
+the copy-per-variant approach of 'Volcano plot_PT_day9_poster.py' and
+'Volcano plot_PT_day9_excluded_genes_poster.py'.
+
+The TSV file is parsed once; log2(FC), -log10(p) and the regulation class are computed for
+every requested day with array operations. All variants (days x label counts x exclusion
+lists) are then rendered in parallel by a process pool (Agg backend) and written as
+PNG / SVG / PDF.
+
+Variants:
+- every day from --days
+- every label count from --labels UP:DOWN (number of top 'Increased' / 'Decreased' genes,
+  ranked by -log10(p), that get a text label)
+- no exclusion, plus one variant per --exclude list (genes that are not labelled)
+Genes from --highlight are labelled in bold with a larger font, in every variant (including
+the one without exclusions); run the script twice to get variants with and without highlights.
+--style standard matches 'Volcano plot_PT_day9_poster.py', --style large matches
+'Volcano plot_PT_day9_excluded_genes_poster.py' (fonts, legend frame, axis label, title).
+Labels are placed by the grid-based engine from label_layout.py (bounded, fast); use
+--label-engine adjusttext for the previous adjust_text layout.
+
+Input:
+- summary_table_supervised_PT_PP_PT_CTRL_and_PT_PP_PT_CTRL_long_7_9_12_230524.txt
+  (tab-separated file with fold changes and unpaired t-test p-values for days 7, 9, and 12)
+
+Output:
+- Files in --outdir (default 'volcano_plots'), e.g.
+  'Volcano_plot_PT_day9_up15_down32.png', 'Volcano_plot_PT_day9_up15_down32_excluded1.png'
+
+Examples (the two poster figures for day 9, plus days 7 and 12):
+    python volcano_render.py --days 7 9 12 --labels 15:32 --style standard --formats png pdf
+    python volcano_render.py --days 7 9 12 --labels 15:32 --style large \\
+        --exclude Zbtb8b,Thsd7b,D430041D05Rik,Extl1,Gprc5c,Zfp457 \\
+        --highlight Wnt4,Adamts17,Adamts15,Vtn,Ngfr,Cxcl3,Cxcl2,Hmox1,Clec4e,Clec4d \\
+        --formats png pdf
+(the first gives the day 9 poster figure, the '_excluded1' files of the second the
+excluded-genes poster figure)
+
+Dependencies:
+- pandas
+- numpy
+- seaborn
+- matplotlib
+- adjustText (only for --label-engine adjusttext)
+"""
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+DATA_FILE = 'summary_table_supervised_PT_PP_PT_CTRL_and_PT_PP_PT_CTRL_long_7_9_12_230524.txt'
+REGULATION_LEVELS = ['Increased', 'Decreased', 'Neutral']
+PALETTE = ['#AF4647', '#517FBC', 'lightgray']
+
+# Figure styles: 'standard' reproduces 'Volcano plot_PT_day9_poster.py', 'large' reproduces
+# 'Volcano plot_PT_day9_excluded_genes_poster.py' (axis labels: font_size + 2, title: font_size + 4)
+STYLES = {
+    'standard': {'label_size': 8, 'font_size': 12, 'legend_edgecolor': 'black', 'legend_title_size': None,
+                 'xlabel': '$log_{2}$ (Fold Change)', 'title_weight': 'bold'},
+    'large': {'label_size': 14, 'font_size': 14, 'legend_edgecolor': 'lightgray', 'legend_title_size': 16,
+              'xlabel': 'log₂ (Fold Change)', 'title_weight': 'normal'},
+}
+
+# Data shared by the worker processes (set once per worker by the pool initializer)
+_TABLE = None
+
+
+# Parse the TSV once and compute the volcano coordinates and regulation for every day
+def load_volcano_table(file_path, days):
+    usecols = ['GeneName']
+    for day in days:
+        usecols += [f'folds_median_PT_PP_PT_CTRL_long_{day}', f'ttest_unpaired_p_PT_PP_PT_CTRL_long_{day}']
+    df = pd.read_csv(file_path, sep='\t', usecols=usecols)
+
+    table = {'GeneName': df['GeneName'].astype(str).to_numpy()}
+    for day in days:
+        logp = -np.log10(df[f'ttest_unpaired_p_PT_PP_PT_CTRL_long_{day}'].to_numpy())
+        logfc = np.log2(df[f'folds_median_PT_PP_PT_CTRL_long_{day}'].to_numpy())
+        significant = logp > 1.3  # p < 0.05
+        table[f'-log10(p){day}'] = logp
+        table[f'log2(FC){day}'] = logfc
+        table[f'Regulation{day}'] = np.select(
+            [significant & (logfc >= 1), significant & (logfc <= -1)], [0, 1], default=2
+        ).astype(np.int8)
+    return table
+
+
+def _init_worker(table):
+    global _TABLE
+    _TABLE = table
+
+
+# Render one variant and save it in every requested format
+def render_variant(job):
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    from label_layout import layout_labels
+
+    plt.rcParams['font.family'] = 'Calibri'
+
+    day = job['day']
+    logfc = _TABLE[f'log2(FC){day}']
+    logp = _TABLE[f'-log10(p){day}']
+    codes = _TABLE[f'Regulation{day}']
+    genes = _TABLE['GeneName']
+    regulation = pd.Categorical.from_codes(codes, categories=REGULATION_LEVELS)
+
+    start = time.perf_counter()
+    fig = plt.figure(figsize=(12, 10))
+    ax = sns.scatterplot(
+        x=logfc,
+        y=logp,
+        hue=regulation,
+        hue_order=REGULATION_LEVELS,
+        palette=PALETTE,
+        sizes=(40, 400)
+    )
+    ax.set_ylim(0, None)
+
+    # Significance cutoffs
+    ax.axhline(1.3, zorder=0, c='k', lw=1, ls='--', alpha=0.5)
+    ax.axvline(1, zorder=0, c='k', lw=1, ls='--', alpha=0.5)
+    ax.axvline(-1, zorder=0, c='k', lw=1, ls='--', alpha=0.5)
+
+    # Top significant genes for labeling (highest -log10(p) per direction)
+    labelled = []
+    for code, n_labels in ((0, job['n_up']), (1, job['n_down'])):
+        rows = np.flatnonzero(codes == code)
+        labelled.extend(rows[np.argsort(-logp[rows], kind='stable')[:n_labels]])
+
+    excluded = set(job['excluded'])
+    highlighted = set(job['highlighted'])
+    texts = []
+    for row in labelled:
+        gene = genes[row]
+        if gene in excluded:
+            continue
+        is_highlighted = gene in highlighted
+        texts.append(ax.text(
+            logfc[row], logp[row], gene,
+            fontsize=job['label_size'] + 2 if is_highlighted else job['label_size'],
+            fontweight='bold' if is_highlighted else 'normal',
+            color='black', ha='center', va='bottom'
+        ))
+    layout_labels(ax, texts, engine=job['label_engine'])
+
+    # Legend and plot aesthetics
+    plt.legend(loc=1, bbox_to_anchor=(1.01, 1), frameon=True, facecolor='white',
+               edgecolor=job['legend_edgecolor'], fontsize=job['font_size'],
+               title_fontsize=job['legend_title_size'])
+    for axis in ['bottom', 'left']:
+        ax.spines[axis].set_linewidth(1)
+    ax.spines['top'].set_visible(False)
+    ax.spines['right'].set_visible(False)
+    ax.grid(True, linestyle='--', alpha=0.3)
+    ax.tick_params(width=1.5)
+    plt.xticks(size=job['font_size'], weight='light')
+    plt.yticks(size=job['font_size'], weight='light')
+    plt.xlabel(job['xlabel'], size=job['font_size'] + 2)
+    plt.ylabel("-log(p)", size=job['font_size'] + 2)
+    ax.set_title(f'{day} Days of PP Treatment', fontsize=job['font_size'] + 4, fontweight=job['title_weight'],
+                 pad=20)
+
+    paths = []
+    for fmt in job['formats']:
+        path = os.path.join(job['outdir'], f"{job['name']}.{fmt}")
+        fig.savefig(path, dpi=300, bbox_inches='tight', facecolor='white')
+        paths.append(path)
+    plt.close(fig)
+    return paths, time.perf_counter() - start
+
+
+# All variants: days x label counts x (no exclusion + each exclusion list)
+def build_jobs(args):
+    exclusion_lists = [[]] + [[gene for gene in item.split(',') if gene] for item in args.exclude]
+    highlighted = [gene for gene in args.highlight.split(',') if gene]
+
+    jobs = []
+    for day in args.days:
+        for labels in args.labels:
+            n_up, n_down = (int(value) for value in labels.split(':'))
+            for k, excluded in enumerate(exclusion_lists):
+                suffix = f'_excluded{k}' if k else ''
+                jobs.append({
+                    **STYLES[args.style],
+                    'day': day, 'n_up': n_up, 'n_down': n_down,
+                    'excluded': excluded, 'highlighted': highlighted,
+                    'label_engine': args.label_engine,
+                    'formats': args.formats, 'outdir': args.outdir,
+                    'name': f'Volcano_plot_PT_day{day}_up{n_up}_down{n_down}{suffix}'
+                })
+    return jobs
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Render volcano plot variants in parallel')
+    parser.add_argument('--input', default=DATA_FILE, help='summary table (TSV)')
+    parser.add_argument('--days', type=int, nargs='+', default=[9])
+    parser.add_argument('--labels', nargs='+', default=['15:32'],
+                        help="label counts as UP:DOWN, e.g. 15:32 30:60")
+    parser.add_argument('--exclude', action='append', default=[],
+                        help='comma-separated genes not to label (repeat for several lists)')
+    parser.add_argument('--highlight', default='',
+                        help='comma-separated genes labelled in bold (in every variant)')
+    parser.add_argument('--style', choices=list(STYLES), default='large',
+                        help="'standard': day 9 poster figure, 'large': excluded-genes poster figure")
+    parser.add_argument('--label-engine', choices=['grid', 'adjusttext'], default='grid',
+                        help="label placement: 'grid' (fast) or 'adjusttext' (reference)")
+    parser.add_argument('--formats', nargs='+', choices=['png', 'svg', 'pdf'], default=['png'])
+    parser.add_argument('--outdir', default='volcano_plots')
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    os.makedirs(args.outdir, exist_ok=True)
+
+    start = time.perf_counter()
+    table = load_volcano_table(args.input, sorted(set(args.days)))
+    parse_time = time.perf_counter() - start
+
+    jobs = build_jobs(args)
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker, initargs=(table,)) as pool:
+        results = list(pool.map(render_variant, jobs))
+
+    render_time = sum(seconds for _, seconds in results)
+    for paths, seconds in results:
+        print(f"{seconds:6.1f} s  " + ', '.join(paths))
+    print(f"{len(jobs)} variants, TSV parsed once in {parse_time:.2f} s; "
+          f"wall time {time.perf_counter() - start:.1f} s with {args.workers} workers "
+          f"(sum of render times: {render_time:.1f} s)")
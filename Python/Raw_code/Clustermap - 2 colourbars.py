@@ -23,17 +23,32 @@ Dependencies:
 - matplotlib
 - numpy
 - scipy
+- cluster_backend (helper module in this folder: linkage with cached dendrograms,
+  raster heatmap mode)
+- zscore_stream (helper module in this folder: in-place float32 z-scores)
+
+Options:
+- clustering backend options (--cluster-rows, --method, --metric, --optimal-ordering, --raster),
+  see cluster_backend.py or run with --help
 
 """ 
 
 # Import required libraries
+import argparse
+
 import pandas as pd
-import seaborn as sns
 import matplotlib.pyplot as plt
 from matplotlib.patches import Patch
 from matplotlib.colors import Normalize
 from matplotlib.cm import ScalarMappable
-from scipy.stats import zscore
+
+from cluster_backend import add_cluster_arguments, cluster_options, clustermap
+from zscore_stream import zscore_frame
+
+# Clustering backend options (cluster_backend.py); the defaults draw the group-sorted figure
+parser = argparse.ArgumentParser(description='Z-scored immune cell clustermap')
+add_cluster_arguments(parser)
+args = parser.parse_args()
 
 plt.rcParams['font.family'] = 'Calibri'
 
@@ -44,7 +59,7 @@ df_sorted = df.sort_values("Group")
 
 # Data preparation
 cell_types = df.columns.difference(['Group', 'Infiltration_score'])
-zscored = df_sorted[cell_types].apply(zscore)
+zscored = zscore_frame(df_sorted[cell_types])  # Per cell type, float32
 
 # Colours - goups
 group_palette = {'Control': 'skyblue', 'Treated': 'lightcoral'}
@@ -62,13 +77,13 @@ col_colors = pd.DataFrame({
 }, index=df_sorted.index)
 
 # Clustermap
-g = sns.clustermap(
+g = clustermap(
     zscored.T,
+    **cluster_options(args),
     cmap="vlag",
     center=0,
     col_colors=col_colors,
     col_cluster=False,
-    row_cluster=False,
     xticklabels=True,
     yticklabels=True,
     figsize=(20, 16),
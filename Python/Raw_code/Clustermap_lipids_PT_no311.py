@@ -19,50 +19,92 @@ Output:
 
 Dependencies:
 - pandas
+- numpy
 - seaborn
 - matplotlib
 - scipy
+- cluster_backend, clustermap_cache, zscore_stream (helper modules in this folder)
+
+Z-scores, row linkage and leaf order are cached in 'clustermap_cache' (key: workbook hash,
+excluded mice, linkage method, metric and NUMERIC_VERSION): re-runs that only change the
+styling skip the numeric work and report the time saved.
 """
 
 import seaborn as sns
 import matplotlib.pyplot as plt
 import pandas as pd
-from scipy.stats import zscore
+import numpy as np
 import matplotlib.colors as mcolors
+from scipy.cluster.hierarchy import leaves_list
+
+from cluster_backend import linkage_matrix
+from clustermap_cache import ClustermapCache
+from zscore_stream import zscore_frame
 
 # Set font globally
 plt.rcParams['font.family'] = 'Calibri'
 
-# Load data from Excel
-lipids = pd.read_excel('Lipids mol%.xlsx')
-
-# Set lipid class as index
-df = lipids.set_index("Lipid class")
-
-# Split columns into MultiIndex: (Group, Mouse)
-df.columns = pd.MultiIndex.from_tuples(
-    [(col.split("_")[0], col.split("_")[1]) for col in df.columns],
-    names=["Group", "Mouse"]
-)
-
-# Exclude mouse 311
-df = df.loc[:, df.columns.get_level_values("Mouse") != "311"]
-
-# Normalize data (z-score by row/lipid class)
-df_z = df.apply(zscore, axis=1)
-
-# Separate CTRL and PP groups
-group_labels = df.columns.get_level_values("Group")
-mouse_labels = df.columns.get_level_values("Mouse")
-df_ctrl = df_z.loc[:, group_labels == "CTRL"]
-df_pp = df_z.loc[:, group_labels == "PP"]
-
-# Concatenate for visualization
-df_clustered = pd.concat([df_ctrl, df_pp], axis=1)
+# Path to Excel file, excluded mice and row clustering settings (numeric results are cached)
+file_path = 'Lipids mol%.xlsx'
+exclude_mice = ['311']
+METHOD = 'average'
+METRIC = 'euclidean'
+NUMERIC_VERSION = 5  # Increase when compute_numeric (or a helper it calls) changes the cached numbers
+
+
+# Z-scores, row linkage and leaf order (cached by input hash and parameters, see clustermap_cache.py)
+def compute_numeric():
+    # Load data from Excel
+    lipids = pd.read_excel(file_path)
+
+    # Set lipid class as index
+    df = lipids.set_index("Lipid class")
+
+    # Split columns into MultiIndex: (Group, Mouse)
+    df.columns = pd.MultiIndex.from_tuples(
+        [(col.split("_")[0], col.split("_")[1]) for col in df.columns],
+        names=["Group", "Mouse"]
+    )
+
+    # Exclude mouse 311
+    df = df.loc[:, ~df.columns.get_level_values("Mouse").isin(exclude_mice)]
+
+    # Normalize data (z-score by row/lipid class)
+    df_z = zscore_frame(df, axis=1, dtype=np.float64)  # float64: the values are printed (fmt='.2f')
+
+    # Separate CTRL and PP groups
+    group_labels = df.columns.get_level_values("Group")
+    df_ctrl = df_z.loc[:, group_labels == "CTRL"]
+    df_pp = df_z.loc[:, group_labels == "PP"]
+
+    # Concatenate for visualization
+    df_clustered = pd.concat([df_ctrl, df_pp], axis=1)
+
+    # Hierarchical clustering of the lipid classes (same method / metric as seaborn's default)
+    row_linkage = linkage_matrix(df_clustered.to_numpy(), METHOD, METRIC, cache_dir=None)
+    return {
+        'df_clustered': df_clustered,
+        'mouse_labels': list(df.columns.get_level_values("Mouse")),
+        'n_ctrl': df_ctrl.shape[1],
+        'n_pp': df_pp.shape[1],
+        'row_linkage': row_linkage,
+        'leaf_order': leaves_list(row_linkage)
+    }
+
+
+cache = ClustermapCache()
+params = {'script': 'Clustermap_lipids_PT_no311', 'exclude_mice': sorted(exclude_mice),
+          'zscore': 'rows, float64', 'method': METHOD, 'metric': METRIC}
+numeric = cache.get_or_compute(ClustermapCache.key(file_path, params, NUMERIC_VERSION), compute_numeric)
+df_clustered = numeric['df_clustered']
+mouse_labels = numeric['mouse_labels']
+n_ctrl, n_pp = numeric['n_ctrl'], numeric['n_pp']
+print(cache.report())
 
 # Create clustermap (row-clustered only, no default colorbar)
 g = sns.clustermap(
     df_clustered,
+    row_linkage=numeric['row_linkage'],  # Cached linkage: seaborn skips its own clustering
     cmap='coolwarm',
     linewidths=0.5,
     linecolor="white",
@@ -92,7 +134,7 @@ cbar.set_label("Intensity (%mol) z-score normalized", fontsize=12, rotation=270,
 cbar.ax.yaxis.set_label_position('right')
 
 # Add vertical line to separate groups
-g.ax_heatmap.axvline(x=df_ctrl.shape[1], color='white', linewidth=3)
+g.ax_heatmap.axvline(x=n_ctrl, color='white', linewidth=3)
 
 # Set mouse number labels (x-axis)
 g.ax_heatmap.set_xticks(range(len(mouse_labels)))
@@ -102,8 +144,8 @@ g.ax_heatmap.set_xticklabels(mouse_labels, rotation=45, fontsize=12)
 g.ax_heatmap.set_yticklabels(g.ax_heatmap.get_yticklabels(), fontsize=12)
 
 # Add group labels below plot
-ctrl_center = (df_ctrl.shape[1] - 1) / 2
-pp_center = df_ctrl.shape[1] + (df_pp.shape[1] - 1) / 2
+ctrl_center = (n_ctrl - 1) / 2
+pp_center = n_ctrl + (n_pp - 1) / 2
 g.ax_heatmap.text(ctrl_center, -0.7, "CTRL", ha='center', va='top', fontsize=12, transform=g.ax_heatmap.transData)
 g.ax_heatmap.text(pp_center, -0.7, "PP", ha='center', va='top', fontsize=12, transform=g.ax_heatmap.transData)
 
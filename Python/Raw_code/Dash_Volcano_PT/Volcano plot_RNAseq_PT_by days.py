@@ -24,11 +24,21 @@ Output:
         - 'Decreased' (log2FC ≤ -1 and p < 0.05)
         - 'Neutral' otherwise
     - Hover tooltip with gene name
-    - Threshold lines at log₂FC = ±1 and –log₁₀(p) = 1.3
+    - Threshold lines at log₂FC = ±1 and –log₁₀(p) = 1.3 (defaults, adjustable with sliders)
 
 Features:
 - Day selection via dropdown menu (7, 9, 12 days post-treatment)
+- Rendering mode: WebGL with the 'Neutral' cloud binned into a density grid (default)
+  or SVG with every gene as its own point
 - Dynamic updates of volcano plot on selection
+- Multi-day view: days 7, 9 and 12 side by side; clicking or searching a gene (prefix index)
+  highlights it in every panel in the browser (clientside callback)
+- Gene search API for pipelines at /api/genes (lookup, prefix/regex search, top-N per day),
+  see gene_api.py
+- Sliders for the log₂FC and -log₁₀(p) thresholds; moving a slider sends only a Patch
+  with the new colours / points and threshold lines (no full figure rebuild)
+- Figure cache (memory LRU + disk folder 'figure_cache' shared by workers),
+  pre-warmed at startup; hit/miss counters at /cache-stats
 - Publication-ready styling and layout
 
 Dependencies:
@@ -37,93 +47,209 @@ Dependencies:
 - numpy
 - plotly
 - os
+- volcano_store, regulation, volcano_figures, figure_cache, gene_index, gene_api (local helper modules)
 
 To run locally:
 1. Install dependencies: `pip install dash pandas numpy plotly`
 2. Place the input `.txt` file in the same directory
-3. Run the script: `python app.py`
+3. (Optional) Build the columnar store once: `python volcano_store.py`
+   – otherwise it is built automatically on the first start
+4. Run the script: `python app.py` (development server; set DASH_DEBUG=1 for debug mode)
+
+Production (see wsgi.py): `gunicorn -c gunicorn.conf.py wsgi:server`
 """
 
-import pandas as pd
-import numpy as np
-import plotly.express as px
-from dash import Dash, dcc, html, Input, Output
+from dash import Dash, dcc, html, Input, Output, State, no_update
+from flask import jsonify
+import importlib.util
 import os
 
-# Load the input dataset
-df = pd.read_csv('summary_table_supervised_PT_PP_PT_CTRL_and_PT_PP_PT_CTRL_long_7_9_12_230524.txt', sep='\t')
-df.drop(columns=['Chr', 'Start', 'End', 'GeneLength'], inplace=True)
-
-# Compute log2(Fold Change) and -log10(p-value) for each time point
-for day in [7, 9, 12]:
-    df[f'-log10(p){day}'] = -np.log10(df[f'ttest_unpaired_p_PT_PP_PT_CTRL_long_{day}'])
-    df[f'log2(FC){day}'] = np.log2(df[f'folds_median_PT_PP_PT_CTRL_long_{day}'])
-
-# Define a function to classify gene regulation status
-def assign_regulation(logfc, logp):
-    if logp > 1.3:
-        if logfc >= 1:
-            return 'Increased'
-        elif logfc <= -1:
-            return 'Decreased'
-    return 'Neutral'
-
-# Create the Dash application
-app = Dash(__name__)
-app.layout = html.Div([
-    html.H2("Volcano plot – Days of PP Treatment", style={'textAlign': 'center'}),
+from volcano_store import DAYS, load_volcano_frame
+from regulation import FC_THRESHOLD, P_THRESHOLD, ThresholdIndex, add_regulation_columns
+from volcano_figures import RENDER_MODES, build_multi_day_figure, build_volcano_figure, volcano_patch
+from figure_cache import FigureCache
+from gene_index import GeneHashIndex, PrefixIndex
+from gene_api import create_gene_api
+
+COMPRESS = importlib.util.find_spec('flask_compress') is not None
+
+# Load the precomputed log2(Fold Change) and -log10(p-value) columns for each time point
+# from the memory-mapped store (built from the TSV on first run, see volcano_store.py)
+df = load_volcano_frame()
+
+# Classify gene regulation status for every day once (vectorized, categorical columns)
+add_regulation_columns(df, DAYS)
+
+# Genes of each day pre-sorted by -log10(p) for the threshold sliders
+threshold_indexes = {day: ThresholdIndex(df[f'log2(FC){day}'], df[f'-log10(p){day}']) for day in DAYS}
+
+# Prefix index of the gene names for the gene search of the multi-day view
+prefix_index = PrefixIndex(df['GeneName'])
+
+# Hash index of the gene names for the gene search API
+hash_index = GeneHashIndex(df['GeneName'])
+
+# Cache of serialized figures keyed by (day, thresholds, dataset version, render mode)
+figure_cache = FigureCache()
+DATASET_VERSION = df.attrs['version']
+
+
+# Cache key of one figure (slider values rounded to their step)
+def figure_key(day, render_mode, fc_threshold=FC_THRESHOLD, p_threshold=P_THRESHOLD):
+    return (day, round(fc_threshold, 2), round(p_threshold, 2), DATASET_VERSION, render_mode)
+
+
+# Build the full figure for one day, render mode and pair of thresholds
+def build_figure(day, render_mode, fc_threshold=FC_THRESHOLD, p_threshold=P_THRESHOLD):
+    codes = threshold_indexes[day].codes(fc_threshold, p_threshold)
+    return build_volcano_figure(df, day, render_mode, codes, fc_threshold, p_threshold)
+
+
+# Pre-warm the cache with every day and rendering mode (default thresholds)
+for day in DAYS:
+    for render_mode in RENDER_MODES:
+        figure_cache.get_or_build(figure_key(day, render_mode), lambda: build_volcano_figure(df, day, render_mode))
+
+# Create the Dash application (gzip/brotli compression of responses when flask-compress is installed)
+app = Dash(__name__, compress=COMPRESS)
+app.server.config['COMPRESS_ALGORITHM'] = ['br', 'gzip']
+
+# Single-day view – one volcano plot with day, render mode and threshold controls
+single_day_view = html.Div([
     dcc.Dropdown(
         id='day-selector',
-        options=[{'label': f'{day} days', 'value': day} for day in [7, 9, 12]],
+        options=[{'label': f'{day} days', 'value': day} for day in DAYS],
         value=9,
         clearable=False
     ),
+    dcc.RadioItems(
+        id='render-mode',
+        options=[
+            {'label': 'WebGL (neutral genes binned)', 'value': 'webgl'},
+            {'label': 'SVG (all genes)', 'value': 'svg'}
+        ],
+        value='webgl',
+        inline=True
+    ),
+    html.Label("log₂(Fold Change) threshold (±)"),
+    dcc.Slider(id='fc-threshold', min=0, max=4, step=0.1, value=FC_THRESHOLD,
+               marks={value: str(value) for value in range(5)}, updatemode='drag'),
+    html.Label("-log₁₀(p) threshold"),
+    dcc.Slider(id='p-threshold', min=0, max=6, step=0.1, value=P_THRESHOLD,
+               marks={value: str(value) for value in range(7)}, updatemode='drag'),
     dcc.Graph(id='volcano-plot')
 ])
 
+# Multi-day view – all days side by side, gene search and highlighting run in the browser
+multi_day_view = html.Div([
+    dcc.Input(id='gene-search', type='text', placeholder='Search gene (prefix, e.g. Cxcl)', debounce=False),
+    html.Div(id='gene-matches', style={'margin': '6px 0'}),
+    dcc.Graph(id='multi-day-plot'),
+    dcc.Store(id='gene-prefix-index', data=prefix_index.to_dict())
+])
+
+app.layout = html.Div([
+    html.H2("Volcano plot – Days of PP Treatment", style={'textAlign': 'center'}),
+    dcc.Tabs(id='view-tabs', value='single-day', children=[
+        dcc.Tab(label='Single day', value='single-day', children=single_day_view),
+        dcc.Tab(label='All days (gene tracking)', value='multi-day', children=multi_day_view)
+    ])
+])
+
 # Define callback to update volcano plot based on selected time point
 @app.callback(
     Output('volcano-plot', 'figure'),
-    Input('day-selector', 'value')
+    Input('day-selector', 'value'),
+    Input('render-mode', 'value'),
+    State('fc-threshold', 'value'),
+    State('p-threshold', 'value')
 )
-def update_volcano_plot(day):
-    temp_df = df.copy()
-    temp_df['log2FC'] = temp_df[f'log2(FC){day}']
-    temp_df['-log10p'] = temp_df[f'-log10(p){day}']
-    temp_df['Regulation'] = temp_df.apply(lambda row: assign_regulation(row['log2FC'], row['-log10p']), axis=1)
-
-    fig = px.scatter(
-        temp_df,
-        x='log2FC',
-        y='-log10p',
-        color='Regulation',
-        color_discrete_map={
-            'Increased': '#AF4647',
-            'Decreased': '#517FBC',
-            'Neutral': 'lightgray'
-        },
-        hover_name='GeneName',
-        title=f'Volcano Plot – {day} Days of PP Treatment',
-        height=700,
-        width=800
-    )
-
-    # Add threshold lines for significance
-    fig.add_hline(y=1.3, line_dash='dash', line_color='gray')
-    fig.add_vline(x=1, line_dash='dash', line_color='gray')
-    fig.add_vline(x=-1, line_dash='dash', line_color='gray')
-
-    fig.update_layout(
-        xaxis_title='log₂(Fold Change)',
-        yaxis_title='-log(p)',
-        font=dict(size=14),
-        legend=dict(title='Regulation'),
-        plot_bgcolor='white'
-    )
-
-    return fig
-    
-# Run the app
+def update_volcano_plot(day, render_mode='webgl', fc_threshold=FC_THRESHOLD, p_threshold=P_THRESHOLD):
+    # Plot the precomputed columns of the selected day directly – no copy of the frame;
+    # repeated selections are served from the figure cache
+    return figure_cache.get_figure(figure_key(day, render_mode, fc_threshold, p_threshold),
+                                   lambda: build_figure(day, render_mode, fc_threshold, p_threshold))
+
+
+# Threshold sliders – recolor the current figure with a Patch instead of rebuilding it
+@app.callback(
+    Output('volcano-plot', 'figure', allow_duplicate=True),
+    Input('fc-threshold', 'value'),
+    Input('p-threshold', 'value'),
+    State('day-selector', 'value'),
+    State('render-mode', 'value'),
+    prevent_initial_call=True
+)
+def update_thresholds(fc_threshold, p_threshold, day, render_mode):
+    codes = threshold_indexes[day].codes(fc_threshold, p_threshold)
+    return volcano_patch(df, day, render_mode, codes, fc_threshold, p_threshold)
+
+
+# Multi-day view – loaded when its tab is opened for the first time (default thresholds)
+@app.callback(
+    Output('multi-day-plot', 'figure'),
+    Input('view-tabs', 'value'),
+    State('multi-day-plot', 'figure')
+)
+def load_multi_day_plot(tab, current_figure):
+    if tab != 'multi-day' or current_figure:
+        return no_update
+    codes_by_day = {day: threshold_indexes[day].codes() for day in DAYS}
+    return figure_cache.get_figure(figure_key('all', 'multi-day'),
+                                   lambda: build_multi_day_figure(df, DAYS, codes_by_day))
+
+
+# Gene tracking – clientside callback (no server round trip): a clicked gene or all genes
+# matching the searched prefix (binary search over the prebuilt sorted index) are selected
+# in every panel; the panels share the gene order, so the same point indices apply to all
+app.clientside_callback(
+    """
+    function(search, clickData, figure, index) {
+        if (!figure) {
+            return [window.dash_clientside.no_update, ''];
+        }
+        const triggered = dash_clientside.callback_context.triggered.map(t => t.prop_id);
+        let rows = [];
+        if (triggered.includes('multi-day-plot.clickData') && clickData && clickData.points.length) {
+            rows = [clickData.points[0].pointIndex];
+        } else if (search) {
+            const prefix = search.toLowerCase();
+            const keys = index.keys;
+            let low = 0, high = keys.length;
+            while (low < high) {
+                const mid = (low + high) >> 1;
+                if (keys[mid] < prefix) { low = mid + 1; } else { high = mid; }
+            }
+            for (let i = low; i < keys.length && keys[i].startsWith(prefix) && rows.length < index.limit; i++) {
+                rows.push(index.rows[i]);
+            }
+        }
+        const names = rows.map(row => figure.data[0].hovertext[row]);
+        const data = figure.data.map(trace => Object.assign({}, trace, {selectedpoints: rows.length ? rows : null}));
+        const message = search && !rows.length ? 'No gene found' : names.join(', ');
+        return [Object.assign({}, figure, {data: data}), message];
+    }
+    """,
+    Output('multi-day-plot', 'figure', allow_duplicate=True),
+    Output('gene-matches', 'children'),
+    Input('gene-search', 'value'),
+    Input('multi-day-plot', 'clickData'),
+    State('multi-day-plot', 'figure'),
+    State('gene-prefix-index', 'data'),
+    prevent_initial_call=True
+)
+
+
+# Gene search API (HTTP/JSON) for pipelines – mounted on the Flask server of the app
+app.server.register_blueprint(create_gene_api(df, DAYS, threshold_indexes, prefix_index, hash_index))
+
+
+# Cache hit/miss counters of this worker
+@app.server.route('/cache-stats')
+def cache_stats():
+    return jsonify(figure_cache.stats())
+
+# Run the app with the development server (production: gunicorn, see wsgi.py)
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 8051))
-    app.run(debug=True, host='0.0.0.0', port=port)
+    app.run(debug=os.environ.get('DASH_DEBUG') == '1', host='0.0.0.0', port=port)
@@ -0,0 +1,114 @@
+"""
+Callback Latency Benchmark – Volcano Plot Update per Day
+
+This script measures how long the Dash callback `update_volcano_plot` takes
+for each day of the dropdown (7, 9, 12), comparing:
+- 'legacy':  df.copy() + row-by-row assign_regulation via DataFrame.apply(axis=1)
+- 'current': the figure of the app built from scratch (precomputed regulation columns)
+- 'cached':  the callback of the app `update_volcano_plot` (served from the figure cache)
+
+It also measures the threshold slider callback `update_thresholds` (Patch with new
+colours / points and threshold lines) over a sweep of slider positions, per day and
+render mode. Target: under ~50 ms per slider move.
+
+The figure / Patch is serialized to JSON in all cases, as Dash does before sending it to the browser.
+
+Input:
+- The same input as the app (TSV summary table or the 'volcano_store' folder)
+
+Output:
+- Printed median latency [ms] per day and variant
+- Printed mean / max slider latency [ms] per day and render mode
+
+Dependencies:
+- pandas
+- plotly
+- dash
+- timeit
+
+To run:
+- Run: python benchmark_callback.py [number_of_repeats]
+"""
+
+import importlib.util
+import json
+import sys
+import time
+import timeit
+
+import numpy as np
+import plotly.express as px
+from plotly.utils import PlotlyJSONEncoder
+
+APP_FILE = 'Volcano plot_RNAseq_PT_by days.py'
+
+
+# Import the Dash app script (its file name contains spaces)
+def load_app_module(path=APP_FILE):
+    spec = importlib.util.spec_from_file_location('volcano_app', path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules['volcano_app'] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+# Original per-row classification used before the vectorized version
+def assign_regulation(logfc, logp):
+    if logp > 1.3:
+        if logfc >= 1:
+            return 'Increased'
+        elif logfc <= -1:
+            return 'Decreased'
+    return 'Neutral'
+
+
+# Original callback body (copy of the frame + apply(axis=1))
+def legacy_update_volcano_plot(df, day):
+    temp_df = df.copy()
+    temp_df['log2FC'] = temp_df[f'log2(FC){day}']
+    temp_df['-log10p'] = temp_df[f'-log10(p){day}']
+    temp_df['Regulation'] = temp_df.apply(lambda row: assign_regulation(row['log2FC'], row['-log10p']), axis=1)
+    fig = px.scatter(temp_df, x='log2FC', y='-log10p', color='Regulation',
+                     color_discrete_map={'Increased': '#AF4647', 'Decreased': '#517FBC', 'Neutral': 'lightgray'},
+                     hover_name='GeneName', height=700, width=800)
+    fig.add_hline(y=1.3, line_dash='dash', line_color='gray')
+    fig.add_vline(x=1, line_dash='dash', line_color='gray')
+    fig.add_vline(x=-1, line_dash='dash', line_color='gray')
+    return fig
+
+
+# Median time of one call [ms]
+def time_call(func, repeat):
+    times = sorted(timeit.repeat(func, number=1, repeat=repeat))
+    return times[len(times) // 2] * 1000
+
+
+if __name__ == '__main__':
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    app_module = load_app_module()
+    df = app_module.df
+    legacy_df = df[['GeneName'] + [col for col in df.columns if col.startswith(('log2(FC)', '-log10(p)'))]]
+
+    print(f"{len(df)} genes, {repeat} repeats per day (figure serialized to JSON)")
+    print(f"{'day':>4} {'legacy median':>15} {'current median':>15} {'cached median':>15} {'speed-up':>9}")
+    for day in app_module.DAYS:
+        legacy_ms = time_call(lambda: legacy_update_volcano_plot(legacy_df, day).to_json(), repeat)
+        current_ms = time_call(lambda: app_module.build_figure(day, 'svg').to_json(), repeat)
+        cached_ms = time_call(lambda: json.dumps(app_module.update_volcano_plot(day, 'svg'), cls=PlotlyJSONEncoder),
+                              repeat)
+        print(f"{day:>4} {legacy_ms:>12.1f} ms {current_ms:>12.1f} ms {cached_ms:>12.1f} ms "
+              f"{legacy_ms / current_ms:>8.1f}x")
+
+    # Slider sweep: every log2FC step at a fixed p threshold and every p step at a fixed FC threshold
+    moves = [(fc, 1.3) for fc in np.arange(0, 4.01, 0.1)] + [(1.0, p) for p in np.arange(0, 6.01, 0.1)]
+    print(f"\nSlider moves ({len(moves)} per day and mode, Patch serialized to JSON)")
+    print(f"{'day':>4} {'mode':>6} {'mean':>10} {'max':>10}")
+    for day in app_module.DAYS:
+        for render_mode in app_module.RENDER_MODES:
+            times = []
+            for fc_threshold, p_threshold in moves:
+                start = time.perf_counter()
+                patch = app_module.update_thresholds(fc_threshold, p_threshold, day, render_mode)
+                json.dumps(patch.to_plotly_json(), cls=PlotlyJSONEncoder)
+                times.append((time.perf_counter() - start) * 1000)
+            print(f"{day:>4} {render_mode:>6} {np.mean(times):>7.1f} ms {np.max(times):>7.1f} ms")
@@ -0,0 +1,60 @@
+"""
+Figure Payload Benchmark – SVG (all genes) vs WebGL (binned Neutral cloud)
+
+This script compares the two rendering modes of the volcano plot for each day:
+- number of points sent to the browser
+- JSON payload size (raw and gzip-compressed, as sent by a compressing server)
+- server time to build and serialize the figure [ms]
+- time to render the figure to PNG with kaleido [ms] (headless Chromium running plotly.js;
+  used as a proxy for the browser render time, skipped if kaleido is not installed)
+
+Input:
+- The same input as the app (TSV summary table or the 'volcano_store' folder)
+
+Dependencies:
+- pandas
+- numpy
+- plotly
+- kaleido (optional)
+- volcano_store, regulation, volcano_figures (local helper modules)
+
+To run:
+- Run: python benchmark_figures.py [number_of_repeats]
+"""
+
+import gzip
+import sys
+import timeit
+
+from volcano_store import DAYS, load_volcano_frame
+from regulation import add_regulation_columns
+from volcano_figures import RENDER_MODES, build_volcano_figure
+
+try:
+    import kaleido  # noqa: F401 – only needed for the render timing
+    HAS_KALEIDO = True
+except ImportError:
+    HAS_KALEIDO = False
+
+
+# Median time of one call [ms]
+def time_call(func, repeat):
+    times = sorted(timeit.repeat(func, number=1, repeat=repeat))
+    return times[len(times) // 2] * 1000
+
+
+if __name__ == '__main__':
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    df = add_regulation_columns(load_volcano_frame(), DAYS)
+
+    print(f"{len(df)} genes, {repeat} repeats" + ("" if HAS_KALEIDO else " (kaleido not installed – render time skipped)"))
+    print(f"{'day':>4} {'mode':>6} {'points':>8} {'JSON [kB]':>10} {'gzip [kB]':>10} {'build+json [ms]':>16} {'render [ms]':>12}")
+    for day in DAYS:
+        for mode in RENDER_MODES:
+            fig = build_volcano_figure(df, day, mode)
+            payload = fig.to_json().encode('UTF-8')
+            n_points = sum(len(trace.x) for trace in fig.data)
+            build_ms = time_call(lambda: build_volcano_figure(df, day, mode).to_json(), repeat)
+            render = f"{time_call(lambda: fig.to_image(format='png'), repeat):>12.1f}" if HAS_KALEIDO else f"{'-':>12}"
+            print(f"{day:>4} {mode:>6} {n_points:>8} {len(payload) / 1024:>10.1f} "
+                  f"{len(gzip.compress(payload)) / 1024:>10.1f} {build_ms:>16.1f} {render}")
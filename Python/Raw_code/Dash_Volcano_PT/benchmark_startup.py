@@ -0,0 +1,100 @@
+"""
+Startup Benchmark – TSV Parsing vs Memory-Mapped Columnar Store
+
+This script measures how long a Dash worker needs to load the volcano dataset
+and how much memory it uses, comparing:
+- 'tsv':   the original path (pd.read_csv of the whole summary table + log2/-log10 per day)
+- 'store': the memory-mapped columnar store from volcano_store.py
+
+Each variant is run several times in a fresh Python process (like a cold worker start).
+Reported per variant (median of the runs):
+- load time [ms]
+- peak RSS [MB]
+- private memory [MB] (Linux only) – the part that is multiplied by the number of workers;
+  mmap pages of the store are shared between workers and counted as shared memory
+
+Input:
+- summary_table_supervised_PT_PP_PT_CTRL_and_PT_PP_PT_CTRL_long_7_9_12_230524.txt
+  in the working directory
+
+Dependencies:
+- pandas
+- numpy
+- subprocess
+- volcano_store (local helper module)
+
+To run:
+- Run: python benchmark_startup.py [number_of_runs]
+"""
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from volcano_store import DATA_FILE, build_store
+
+# Code executed in the child process for each variant
+LOAD_TSV = f"""
+import pandas as pd
+import numpy as np
+df = pd.read_csv({DATA_FILE!r}, sep='\\t')
+df.drop(columns=['Chr', 'Start', 'End', 'GeneLength'], inplace=True)
+for day in [7, 9, 12]:
+    df[f'-log10(p){{day}}'] = -np.log10(df[f'ttest_unpaired_p_PT_PP_PT_CTRL_long_{{day}}'])
+    df[f'log2(FC){{day}}'] = np.log2(df[f'folds_median_PT_PP_PT_CTRL_long_{{day}}'])
+"""
+
+LOAD_STORE = """
+from volcano_store import load_volcano_frame
+df = load_volcano_frame()
+df['-log10(p)9'].sum()  # touch one column, as the first callback would
+"""
+
+MEASURE = """
+import json, resource, time
+import pandas, numpy
+start = time.perf_counter()
+{code}
+elapsed = time.perf_counter() - start
+private_kb = None
+try:
+    with open('/proc/self/smaps_rollup') as file:
+        fields = dict(line.split(':', 1) for line in file if ':' in line)
+    private_kb = sum(int(fields[key].split()[0]) for key in ('Private_Clean', 'Private_Dirty'))
+except OSError:
+    pass
+print(json.dumps({{'seconds': elapsed,
+                  'maxrss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+                  'private_kb': private_kb}}))
+"""
+
+
+# Run one variant in a fresh interpreter and return its measurements
+def run_variant(code):
+    output = subprocess.run([sys.executable, '-c', MEASURE.format(code=code)],
+                            capture_output=True, text=True, check=True, cwd=os.getcwd())
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+# Median of the runs for one variant
+def summarize(name, runs):
+    load_ms = statistics.median(run['seconds'] for run in runs) * 1000
+    rss_mb = statistics.median(run['maxrss_kb'] for run in runs) / 1024
+    line = f"{name:<6} load: {load_ms:8.1f} ms   peak RSS: {rss_mb:7.1f} MB"
+    if runs[0]['private_kb'] is not None:
+        private_mb = statistics.median(run['private_kb'] for run in runs) / 1024
+        line += f"   private: {private_mb:7.1f} MB"
+    print(line)
+
+
+if __name__ == '__main__':
+    n_runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+
+    # The store is built once beforehand (ingest step), not during the measured start
+    build_store()
+
+    print(f"Dataset: {DATA_FILE} ({n_runs} runs per variant, pandas/numpy import excluded)")
+    summarize('tsv', [run_variant(LOAD_TSV) for _ in range(n_runs)])
+    summarize('store', [run_variant(LOAD_STORE) for _ in range(n_runs)])
@@ -0,0 +1,142 @@
+"""
+Figure Cache for the Dash Volcano App
+
+Two-level cache of serialized (JSON) volcano figures:
+1. in-memory LRU cache (bounded, per worker process),
+2. local disk cache (folder 'figure_cache'), shared by all gunicorn workers on the machine.
+
+Cache key: (day, log2FC threshold, -log10(p) threshold, dataset version, render mode).
+The dataset version is the content hash stored in the columnar store (volcano_store.py),
+so a new summary table never returns figures of the old one. The disk file name also
+hashes FIGURE_VERSION: the disk cache outlives a deploy, so increase it whenever the
+figure code (volcano_figures.py, layout, colours) changes, or the workers keep serving
+figures built by the old code.
+
+Files are written to a temporary name and moved into place, so a worker never reads
+a half-written figure from another worker. The disk cache is bounded as well – the
+least recently used files are removed when it grows above `max_disk_items`.
+
+Temporary file names include the process and thread id: gunicorn runs gthread workers, so
+two threads of one worker can miss the same key at the same time.
+
+The memory LRU also keeps the parsed figure dict of every entry (parsed once, on the first
+get_figure call), so a memory hit returns it without parsing the JSON again. The dict is
+shared between hits: callers must not modify it.
+
+Hit and miss counters (memory hits, disk hits, misses) are kept per worker process.
+
+Dependencies:
+- hashlib
+- json
+- os
+- threading
+- collections.OrderedDict
+"""
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+CACHE_DIR = 'figure_cache'
+FIGURE_VERSION = 1  # Part of the disk cache key – increase when the figures change
+
+
+class FigureCache:
+    def __init__(self, cache_dir=CACHE_DIR, max_items=32, max_disk_items=256):
+        self.cache_dir = cache_dir
+        self.max_items = max_items
+        self.max_disk_items = max_disk_items
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.counters = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0}
+        os.makedirs(cache_dir, exist_ok=True)
+
+    # Cache file of one key (hash of the figure version and the key tuple – safe as a file name)
+    def _path(self, key):
+        digest = hashlib.sha1(repr((FIGURE_VERSION, key)).encode('UTF-8')).hexdigest()
+        return os.path.join(self.cache_dir, f'{digest}.json')
+
+    # Put a serialized figure (and its parsed dict, if known) in the memory LRU, dropping the oldest entries
+    def _remember(self, key, payload, figure=None):
+        with self._lock:
+            self._memory[key] = (payload, figure)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_items:
+                self._memory.popitem(last=False)
+
+    def _count(self, counter):
+        with self._lock:
+            self.counters[counter] += 1
+
+    # Remove the least recently used files above the disk limit
+    def _prune_disk(self):
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if not entry.name.endswith('.json'):
+                continue
+            try:
+                entries.append((entry.stat().st_mtime, entry.path))
+            except FileNotFoundError:
+                pass  # Removed by another worker's prune in the meantime
+        if len(entries) <= self.max_disk_items:
+            return
+        entries.sort()
+        for _, path in entries[:len(entries) - self.max_disk_items]:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass  # Already removed by another worker
+
+    # Memory LRU entry (payload, figure dict or None) of `key`, counted as a memory hit
+    def _memory_entry(self, key):
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                self.counters['memory_hits'] += 1
+            return entry
+
+    # Serialized figure from the disk cache, or built and stored there on a miss
+    def _load_or_build(self, key, build_figure):
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='UTF-8') as file:
+                payload = file.read()
+            os.utime(path)  # Mark as recently used for the disk LRU
+            self._count('disk_hits')
+        except FileNotFoundError:
+            payload = build_figure().to_json()
+            tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'  # One per writing thread
+            with open(tmp_path, 'w', encoding='UTF-8') as file:
+                file.write(payload)
+            os.replace(tmp_path, path)
+            self._prune_disk()
+            self._count('misses')
+        return payload
+
+    # Return the serialized figure for `key`, building and storing it on a miss
+    def get_or_build(self, key, build_figure):
+        entry = self._memory_entry(key)
+        if entry is not None:
+            return entry[0]
+        payload = self._load_or_build(key, build_figure)
+        self._remember(key, payload)
+        return payload
+
+    # Figure as a dict, ready to be returned from a Dash callback (parsed once per memory entry)
+    def get_figure(self, key, build_figure):
+        entry = self._memory_entry(key)
+        if entry is not None and entry[1] is not None:
+            return entry[1]
+        payload = entry[0] if entry is not None else self._load_or_build(key, build_figure)
+        figure = json.loads(payload)
+        self._remember(key, payload, figure)
+        return figure
+
+    # Counters and sizes for the statistics endpoint
+    def stats(self):
+        with self._lock:
+            return dict(self.counters, memory_items=len(self._memory), max_items=self.max_items,
+                        pid=os.getpid())
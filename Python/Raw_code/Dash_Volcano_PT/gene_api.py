@@ -0,0 +1,184 @@
+"""
+Gene Search API for the Volcano Dataset (HTTP/JSON)
+
+Flask blueprint mounted on the Dash server (app.server) that lets pipelines query
+fold change and p-value of genes from the same summary table as the Dash volcano app.
+
+Endpoints (all GET, lookup also accepts POST with a JSON body):
+- /api/genes/lookup?genes=Cxcl2,Hmox1       batch lookup by exact gene name
+  POST /api/genes/lookup {"genes": [...]}    (case-insensitive fallback; unknown genes are
+                                             returned with "found": false)
+- /api/genes/search?prefix=Cxcl              all genes starting with a prefix (case-insensitive)
+- /api/genes/search?regex=^Cxcl[0-9]+$       genes matching a regular expression
+  (optional: ignore_case=1, limit=N)
+- /api/genes/top?day=9&n=50&direction=up     top-N genes by significance (-log10(p)) for one day;
+                                             direction: any (default), up (log2FC > 0), down (log2FC < 0)
+
+Every gene record contains 'gene', 'row' and 'log2FC_{day}', '-log10p_{day}', 'p_{day}'
+for all days (missing / infinite values as null).
+
+Indexes (built once at startup, no query scans the whole table):
+- lookup: hash index gene name -> rows
+- prefix: sorted gene names + binary search (PrefixIndex)
+- regex:  a literal prefix after '^' (e.g. '^Cxcl') narrows the candidates with the prefix
+          index first; other patterns are matched against the gene name list only
+- top:    genes of each day pre-sorted by -log10(p) (ThresholdIndex); the sorted order is
+          read from the most significant gene until N genes are found
+
+Responses are JSON arrays streamed in chunks of CHUNK_SIZE records, so large result sets
+(e.g. a short prefix or a broad regex) are not built in memory as one string.
+
+Dependencies:
+- flask (installed with dash)
+- numpy
+- json
+- re
+"""
+
+import json
+import re
+
+import numpy as np
+from flask import Blueprint, Response, request, stream_with_context
+
+CHUNK_SIZE = 500        # Records per streamed chunk
+MAX_TOP = 5000          # Largest N accepted by /top
+MAX_PATTERN_LENGTH = 200
+LITERAL_PREFIX = re.compile(r'\^([A-Za-z0-9_\-]*)')
+
+
+# Literal prefix of an anchored regex ('^Cxcl[0-9]+' -> 'Cxcl'); a character followed
+# by a quantifier is dropped, because it may be optional; alternations are not narrowed
+def literal_prefix(pattern):
+    match = LITERAL_PREFIX.match(pattern)
+    if not match or '|' in pattern:
+        return ''
+    prefix = match.group(1)
+    if prefix and pattern[match.end():match.end() + 1] in ('?', '*', '{'):
+        prefix = prefix[:-1]
+    return prefix
+
+
+# JSON-safe list of floats (NaN / inf -> None)
+def _clean(values):
+    values = np.asarray(values, dtype=np.float64)
+    return [value if np.isfinite(value) else None for value in values.tolist()]
+
+
+def create_gene_api(df, days, threshold_indexes, prefix_index, hash_index):
+    api = Blueprint('gene_api', __name__, url_prefix='/api/genes')
+
+    genes = df['GeneName'].astype(str).to_numpy()
+    columns = {day: (df[f'log2(FC){day}'].to_numpy(), df[f'-log10(p){day}'].to_numpy()) for day in days}
+
+    # Gene records for a chunk of row numbers (column-wise, one array operation per column)
+    def records(rows):
+        rows = np.asarray(rows, dtype=np.int64)
+        chunk = [{'gene': genes[row], 'row': int(row)} for row in rows]
+        for day, (logfc, logp) in columns.items():
+            for key, values in ((f'log2FC_{day}', _clean(logfc[rows])),
+                                (f'-log10p_{day}', _clean(logp[rows])),
+                                (f'p_{day}', _clean(10.0 ** -np.asarray(logp[rows], dtype=np.float64)))):
+                for record, value in zip(chunk, values):
+                    record[key] = value
+        return chunk
+
+    # Streamed JSON array – `items` yields lists of records
+    def stream(items):
+        def generate():
+            yield '['
+            first = True
+            for chunk in items:
+                for record in chunk:
+                    yield ('' if first else ',') + json.dumps(record)
+                    first = False
+            yield ']'
+        return Response(stream_with_context(generate()), mimetype='application/json')
+
+    # Stream the records of an array of rows chunk by chunk
+    def stream_rows(rows):
+        return stream(records(rows[start:start + CHUNK_SIZE]) for start in range(0, len(rows), CHUNK_SIZE))
+
+    def error(message, status=400):
+        return Response(json.dumps({'error': message}), status=status, mimetype='application/json')
+
+    @api.route('/lookup', methods=['GET', 'POST'])
+    def lookup():
+        if request.method == 'POST':
+            names = (request.get_json(silent=True) or {}).get('genes', [])
+        else:
+            names = [name for name in request.args.get('genes', '').split(',') if name]
+        if not isinstance(names, list) or not names:
+            return error("Provide gene names: ?genes=A,B or POST {\"genes\": [...]}")
+
+        def items():
+            for start in range(0, len(names), CHUNK_SIZE):
+                chunk = []
+                for name in names[start:start + CHUNK_SIZE]:
+                    rows = hash_index.lookup(str(name))
+                    if rows:
+                        chunk += [dict(record, query=name, found=True) for record in records(rows)]
+                    else:
+                        chunk.append({'query': name, 'found': False})
+                yield chunk
+        return stream(items())
+
+    @api.route('/search')
+    def search():
+        prefix = request.args.get('prefix')
+        pattern = request.args.get('regex')
+        limit = request.args.get('limit', type=int)
+
+        if prefix is not None:
+            rows = prefix_index.search(prefix, limit=limit)
+            return stream_rows(rows)
+
+        if pattern is None:
+            return error("Provide ?prefix=... or ?regex=...")
+        if len(pattern) > MAX_PATTERN_LENGTH:
+            return error(f"Regex longer than {MAX_PATTERN_LENGTH} characters")
+        try:
+            regex = re.compile(pattern, re.IGNORECASE if request.args.get('ignore_case') == '1' else 0)
+        except re.error as exc:
+            return error(f"Invalid regex: {exc}")
+
+        # Narrow the candidates with the prefix index when the pattern starts with a literal
+        names, rows = prefix_index.candidates(literal_prefix(pattern))
+        matches = np.asarray([row for name, row in zip(names, rows) if regex.search(name)], dtype=np.int64)
+        matches.sort()
+        if limit is not None:
+            matches = matches[:limit]
+        return stream_rows(matches)
+
+    @api.route('/top')
+    def top():
+        day = request.args.get('day', type=int)
+        n = request.args.get('n', default=50, type=int)
+        direction = request.args.get('direction', 'any')
+        if day not in threshold_indexes:
+            return error(f"Unknown day; available days: {list(threshold_indexes)}")
+        if not 0 < n <= MAX_TOP:
+            return error(f"n must be between 1 and {MAX_TOP}")
+        if direction not in ('any', 'up', 'down'):
+            return error("direction must be 'any', 'up' or 'down'")
+
+        index = threshold_indexes[day]
+        if direction == 'any':
+            return stream_rows(index.top(n))
+
+        # Walk the pre-sorted order from the most significant gene until n genes are found
+        descending = index.order[::-1]
+        logfc = index.sorted_logfc[::-1]
+        selected = []
+        found = 0
+        for start in range(0, len(descending), CHUNK_SIZE):
+            fc_chunk = logfc[start:start + CHUNK_SIZE]
+            mask = fc_chunk > 0 if direction == 'up' else fc_chunk < 0
+            rows = descending[start:start + CHUNK_SIZE][mask][:n - found]
+            selected.append(rows)
+            found += len(rows)
+            if found == n:
+                break
+        return stream_rows(np.concatenate(selected) if selected else np.zeros(0, dtype=np.int64))
+
+    return api
@@ -0,0 +1,82 @@
+"""
+Gene Name Indexes for the Dash Volcano App
+
+Helper module with prebuilt indexes over the gene names of the summary table:
+- GeneHashIndex: exact (or case-insensitive) gene name -> row numbers, O(1) per gene
+- PrefixIndex: sorted gene names for prefix search
+
+PrefixIndex:
+The gene names are lower-cased and sorted once; all genes starting with a prefix are then
+a contiguous range of the sorted list, found with two binary searches – no scan of the
+whole transcriptome per keystroke.
+
+The same sorted list is sent to the browser (dcc.Store), where the clientside gene search
+of the multi-day view runs the same binary search in JavaScript.
+
+Dependencies:
+- numpy
+"""
+
+import numpy as np
+
+MAX_MATCHES = 50  # Genes highlighted at most for one search
+
+
+class PrefixIndex:
+    def __init__(self, gene_names):
+        names = np.asarray([str(name) for name in gene_names], dtype=object)
+        keys = np.asarray([name.lower() for name in names], dtype=str)
+        order = np.argsort(keys, kind='stable')
+        self.keys = keys[order]
+        self.names = names[order]
+        self.rows = order
+
+    # Range [start, stop) of the sorted keys starting with `prefix`
+    def _range(self, prefix):
+        prefix = prefix.lower()
+        start = np.searchsorted(self.keys, prefix, side='left')
+        stop = np.searchsorted(self.keys, prefix + '\uffff', side='left')
+        return start, stop
+
+    # Row numbers (in the data frame order) of the genes starting with `prefix` (limit=None: all)
+    def search(self, prefix, limit=MAX_MATCHES):
+        start, stop = self._range(prefix)
+        if limit is not None:
+            stop = min(stop, start + limit)
+        return self.rows[start:stop]
+
+    # Gene names and row numbers of all genes starting with `prefix`
+    def candidates(self, prefix):
+        start, stop = self._range(prefix)
+        return self.names[start:stop], self.rows[start:stop]
+
+    # Number of genes starting with `prefix`
+    def count(self, prefix):
+        start, stop = self._range(prefix)
+        return int(stop - start)
+
+    # JSON-serializable form for the browser (dcc.Store)
+    def to_dict(self, limit=MAX_MATCHES):
+        return {
+            'keys': self.keys.tolist(),
+            'rows': self.rows.tolist(),
+            'limit': limit
+        }
+
+
+# Hash index: exact gene name -> row numbers (case-insensitive fallback)
+class GeneHashIndex:
+    def __init__(self, gene_names):
+        self.rows = {}
+        self.rows_lower = {}
+        for row, name in enumerate(gene_names):
+            name = str(name)
+            self.rows.setdefault(name, []).append(row)
+            self.rows_lower.setdefault(name.lower(), []).append(row)
+
+    # Row numbers of one gene (empty list if unknown)
+    def lookup(self, name):
+        rows = self.rows.get(name)
+        if rows is None:
+            rows = self.rows_lower.get(name.lower(), [])
+        return rows
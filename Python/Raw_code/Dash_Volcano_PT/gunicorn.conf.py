@@ -0,0 +1,22 @@
+"""
+gunicorn Configuration – Production Profile of the Dash Volcano App
+
+- preload_app: the app (dataset, indexes, figure cache) is loaded once in the master
+  process and shared copy-on-write by the forked workers
+- workers: WEB_CONCURRENCY environment variable, default 2 x CPU cores + 1
+- worker_class 'gthread': every worker serves several requests at once with threads
+  (callbacks mostly wait on the figure cache / JSON serialization)
+
+Run: gunicorn -c gunicorn.conf.py wsgi:server
+"""
+
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 8051)}"
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+preload_app = True
+timeout = 60
+keepalive = 5
@@ -0,0 +1,140 @@
+"""
+Load Test for the Dash Volcano App – Callback Latency at N Concurrent Users
+
+Plain asyncio HTTP/1.1 client (standard library only). Every simulated user opens one
+keep-alive connection and repeatedly triggers the volcano plot callback
+(POST /_dash-update-component, as the browser does when the day dropdown changes),
+cycling through the days and render modes. Responses are requested with
+'Accept-Encoding: br, gzip' like a browser, so compression is part of the measurement.
+
+Output:
+- requests, errors, throughput [req/s]
+- latency p50 / p90 / p99 / max [ms]
+- mean response size [kB] (as sent over the wire)
+
+Usage:
+- Start the app, e.g. gunicorn -c gunicorn.conf.py wsgi:server
+- Run: python load_test.py --url http://127.0.0.1:8051 --users 20 --requests 50
+
+Dependencies:
+- asyncio
+- json
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from itertools import cycle
+from urllib.parse import urlsplit
+
+DAYS = [7, 9, 12]
+RENDER_MODES = ['webgl', 'svg']
+
+
+# Body of the Dash callback request for one day / render mode
+def callback_payload(day, render_mode):
+    return json.dumps({
+        'output': 'volcano-plot.figure',
+        'outputs': {'id': 'volcano-plot', 'property': 'figure'},
+        'inputs': [
+            {'id': 'day-selector', 'property': 'value', 'value': day},
+            {'id': 'render-mode', 'property': 'value', 'value': render_mode}
+        ],
+        'state': [
+            {'id': 'fc-threshold', 'property': 'value', 'value': 1.0},
+            {'id': 'p-threshold', 'property': 'value', 'value': 1.3}
+        ],
+        'changedPropIds': ['day-selector.value']
+    }).encode('UTF-8')
+
+
+# Read one HTTP response (Content-Length or chunked); returns status and body size
+async def read_response(reader):
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError('Connection closed by server')
+    status = int(status_line.split()[1])
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+
+    if headers.get('transfer-encoding', '').lower() == 'chunked':
+        size = 0
+        while True:
+            chunk_size = int((await reader.readline()).split(b';')[0], 16)
+            await reader.readexactly(chunk_size + 2)  # chunk + CRLF
+            size += chunk_size
+            if chunk_size == 0:
+                break
+        return status, size
+    length = int(headers.get('content-length', 0))
+    await reader.readexactly(length)
+    return status, length
+
+
+# One simulated user: sequential requests over one keep-alive connection
+async def user(host, port, path, n_requests, offset, latencies, sizes, errors):
+    reader, writer = await asyncio.open_connection(host, port)
+    selections = cycle([(day, mode) for day in DAYS for mode in RENDER_MODES])
+    for _ in range(offset):
+        next(selections)
+    try:
+        for _ in range(n_requests):
+            body = callback_payload(*next(selections))
+            request = (f'POST {path} HTTP/1.1\r\nHost: {host}:{port}\r\n'
+                       f'Content-Type: application/json\r\nAccept-Encoding: br, gzip\r\n'
+                       f'Content-Length: {len(body)}\r\nConnection: keep-alive\r\n\r\n').encode('latin-1') + body
+            start = time.perf_counter()
+            writer.write(request)
+            await writer.drain()
+            status, size = await read_response(reader)
+            latencies.append((time.perf_counter() - start) * 1000)
+            sizes.append(size)
+            if status != 200:
+                errors.append(status)
+    except (ConnectionError, asyncio.IncompleteReadError) as exc:
+        errors.append(repr(exc))
+    finally:
+        writer.close()
+
+
+# Percentile of a sorted list (nearest rank)
+def percentile(sorted_values, q):
+    index = min(len(sorted_values) - 1, max(0, int(round(q / 100 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+async def main(url, n_users, n_requests):
+    parts = urlsplit(url)
+    host, port = parts.hostname, parts.port or 80
+    path = (parts.path.rstrip('/') or '') + '/_dash-update-component'
+
+    latencies, sizes, errors = [], [], []
+    start = time.perf_counter()
+    await asyncio.gather(*(user(host, port, path, n_requests, i, latencies, sizes, errors)
+                           for i in range(n_users)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    print(f"Users: {n_users}, requests per user: {n_requests}, total: {len(latencies)}, errors: {len(errors)}")
+    if latencies:
+        print(f"Throughput: {len(latencies) / elapsed:.1f} req/s")
+        print(f"Latency p50: {percentile(latencies, 50):.1f} ms   p90: {percentile(latencies, 90):.1f} ms   "
+              f"p99: {percentile(latencies, 99):.1f} ms   max: {latencies[-1]:.1f} ms")
+        print(f"Mean response size: {sum(sizes) / len(sizes) / 1024:.1f} kB")
+    if errors:
+        print(f"First errors: {errors[:5]}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Load test of the volcano plot callback')
+    parser.add_argument('--url', default='http://127.0.0.1:8051')
+    parser.add_argument('--users', type=int, default=10, help='concurrent users')
+    parser.add_argument('--requests', type=int, default=30, help='requests per user')
+    args = parser.parse_args()
+    asyncio.run(main(args.url, args.users, args.requests))
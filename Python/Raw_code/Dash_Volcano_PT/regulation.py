@@ -0,0 +1,81 @@
+"""
+Gene Regulation Classification for the Dash Volcano App
+
+Helper module that labels every gene as 'Increased', 'Decreased' or 'Neutral'
+with array operations over the log2(FC) / -log10(p) columns, instead of calling
+a Python function row by row.
+
+Classification (same rules as the original assign_regulation):
+- 'Increased': -log10(p) > 1.3 and log2FC ≥ 1
+- 'Decreased': -log10(p) > 1.3 and log2FC ≤ -1
+- 'Neutral' otherwise (including missing values)
+
+The thresholds can be changed (threshold sliders of the app): ThresholdIndex keeps
+the genes of one day sorted by -log10(p), so a new classification only touches the
+genes above the p-value cutoff.
+
+Dependencies:
+- pandas
+- numpy
+"""
+
+import numpy as np
+import pandas as pd
+
+REGULATION_LEVELS = ['Increased', 'Decreased', 'Neutral']
+REGULATION_COLORS = {
+    'Increased': '#AF4647',
+    'Decreased': '#517FBC',
+    'Neutral': 'lightgray'
+}
+
+FC_THRESHOLD = 1.0  # |log2FC| cutoff
+P_THRESHOLD = 1.3   # -log10(p) cutoff (p < 0.05)
+
+
+# Vectorized classification – returns a categorical with REGULATION_LEVELS
+def classify_regulation(logfc, logp, fc_threshold=FC_THRESHOLD, p_threshold=P_THRESHOLD):
+    logfc = np.asarray(logfc)
+    logp = np.asarray(logp)
+    significant = logp > p_threshold
+    codes = np.select(
+        [significant & (logfc >= fc_threshold), significant & (logfc <= -fc_threshold)],
+        [0, 1],
+        default=2
+    ).astype(np.int8)
+    return pd.Categorical.from_codes(codes, categories=REGULATION_LEVELS)
+
+
+# Add one 'Regulation{day}' categorical column per day (computed once at startup)
+def add_regulation_columns(df, days, fc_threshold=FC_THRESHOLD, p_threshold=P_THRESHOLD):
+    for day in days:
+        df[f'Regulation{day}'] = classify_regulation(df[f'log2(FC){day}'], df[f'-log10(p){day}'],
+                                                     fc_threshold, p_threshold)
+    return df
+
+
+# Genes of one day pre-sorted by -log10(p), so the significant genes for any p threshold
+# are a contiguous tail of the sorted arrays (found with a binary search)
+class ThresholdIndex:
+    def __init__(self, logfc, logp):
+        logfc = np.asarray(logfc, dtype=np.float64)
+        logp = np.asarray(logp, dtype=np.float64)
+        self.n_genes = len(logp)
+        order = np.argsort(logp, kind='stable')  # NaN p-values are sorted to the end
+        self.order = order[:np.count_nonzero(~np.isnan(logp))]
+        self.sorted_logp = logp[self.order]
+        self.sorted_logfc = logfc[self.order]
+
+    # Regulation codes (0 = Increased, 1 = Decreased, 2 = Neutral) in the original gene order
+    def codes(self, fc_threshold=FC_THRESHOLD, p_threshold=P_THRESHOLD):
+        start = np.searchsorted(self.sorted_logp, p_threshold, side='right')  # first -log10(p) > threshold
+        genes = self.order[start:]
+        logfc = self.sorted_logfc[start:]
+        codes = np.full(self.n_genes, 2, dtype=np.int8)
+        codes[genes[logfc <= -fc_threshold]] = 1
+        codes[genes[logfc >= fc_threshold]] = 0  # Same priority as classify_regulation when the threshold is 0
+        return codes
+
+    # Indices of the `n` most significant genes (highest -log10(p) first)
+    def top(self, n):
+        return self.order[::-1][:n]
@@ -0,0 +1,203 @@
+"""
+Volcano Figure Builders for the Dash Volcano App
+
+Helper module with the two rendering modes of the volcano plot:
+- 'svg':   every gene as its own SVG point, in one trace coloured per point
+           (regulation code 0/1/2 mapped through a discrete colour scale)
+- 'webgl': Scattergl traces; every significant gene ('Increased' / 'Decreased') stays
+           an individual hoverable point, while the 'Neutral' cloud near the origin is
+           binned into a density grid – one point per occupied cell, placed at the mean
+           position of its genes, with the gene count in the tooltip.
+           The binning is deterministic, so the same input always gives the same figure.
+
+Both modes share the threshold lines and the layout of the original app.
+
+Threshold sliders do not rebuild the figure: `volcano_patch` returns a Dash Patch with
+only the new threshold lines and
+- 'svg':   the new marker colours (one small integer per gene),
+- 'webgl': the new point data of the three traces (significant genes + density grid).
+
+The multi-day view (`build_multi_day_figure`) puts one WebGL panel per day side by side.
+Every panel holds all genes in the same row order (shared gene index), so point i is the
+same gene in each panel and a selection can be copied from one panel to the others.
+
+Dependencies:
+- pandas
+- numpy
+- plotly
+- dash
+- regulation (local helper module)
+"""
+
+import numpy as np
+import plotly.graph_objects as go
+from dash import Patch
+from plotly.subplots import make_subplots
+
+from regulation import REGULATION_COLORS, REGULATION_LEVELS, FC_THRESHOLD, P_THRESHOLD
+
+RENDER_MODES = ['svg', 'webgl']
+GRID_SIZE = 120  # Cells per axis of the Neutral density grid
+
+# Discrete colour scale for the regulation codes (0 = Increased, 1 = Decreased, 2 = Neutral)
+REGULATION_COLORSCALE = [[code / 2, REGULATION_COLORS[level]] for code, level in enumerate(REGULATION_LEVELS)]
+GENE_HOVER = '<b>%{hovertext}</b><br>log2FC=%{x}<br>-log10p=%{y}<extra></extra>'
+
+
+# Regulation codes of one day at the default thresholds (precomputed categorical column)
+def regulation_codes(df, day):
+    return df[f'Regulation{day}'].cat.codes.to_numpy()
+
+
+# Threshold lines for significance (layout shapes, so a Patch can replace them)
+def threshold_shapes(fc_threshold=FC_THRESHOLD, p_threshold=P_THRESHOLD):
+    line = dict(dash='dash', color='gray')
+    return [
+        dict(type='line', xref='x domain', x0=0, x1=1, yref='y', y0=p_threshold, y1=p_threshold, line=line),
+        dict(type='line', xref='x', x0=fc_threshold, x1=fc_threshold, yref='y domain', y0=0, y1=1, line=line),
+        dict(type='line', xref='x', x0=-fc_threshold, x1=-fc_threshold, yref='y domain', y0=0, y1=1, line=line)
+    ]
+
+
+# Common layout of all volcano figures
+def style_volcano_layout(fig, day, fc_threshold=FC_THRESHOLD, p_threshold=P_THRESHOLD):
+    fig.update_layout(
+        title=f'Volcano Plot – {day} Days of PP Treatment',
+        height=700,
+        width=800,
+        xaxis_title='log₂(Fold Change)',
+        yaxis_title='-log(p)',
+        font=dict(size=14),
+        legend=dict(title='Regulation'),
+        plot_bgcolor='white',
+        shapes=threshold_shapes(fc_threshold, p_threshold)
+    )
+
+
+# SVG mode – every gene as its own point, coloured by its regulation code
+def build_svg_figure(df, day, codes):
+    fig = go.Figure(go.Scatter(
+        x=df[f'log2(FC){day}'].to_numpy(),
+        y=df[f'-log10(p){day}'].to_numpy(),
+        mode='markers',
+        marker=dict(color=codes, colorscale=REGULATION_COLORSCALE, cmin=0, cmax=2, showscale=False),
+        hovertext=df['GeneName'].astype(str).to_numpy(),
+        hovertemplate=GENE_HOVER,
+        showlegend=False
+    ))
+    # Legend entries only (the points themselves are in the single trace above)
+    for level in REGULATION_LEVELS:
+        fig.add_trace(go.Scatter(x=[None], y=[None], mode='markers', name=level,
+                                 marker=dict(color=REGULATION_COLORS[level])))
+    return fig
+
+
+# Bin points into a grid_size x grid_size grid; returns mean x, mean y and count per occupied cell
+def bin_points(x, y, grid_size=GRID_SIZE):
+    finite = np.isfinite(x) & np.isfinite(y)
+    x = x[finite].astype(np.float64)
+    y = y[finite].astype(np.float64)
+    if x.size == 0:
+        return x, y, np.zeros(0, dtype=np.int64)
+
+    # Cell index of every point (edges from the data range, last edge inclusive)
+    def cell_index(values):
+        low, high = values.min(), values.max()
+        scale = grid_size / (high - low) if high > low else 0.0
+        return np.minimum(((values - low) * scale).astype(np.int64), grid_size - 1)
+
+    flat = cell_index(x) * grid_size + cell_index(y)
+    _, inverse, counts = np.unique(flat, return_inverse=True, return_counts=True)
+    mean_x = np.bincount(inverse, weights=x) / counts
+    mean_y = np.bincount(inverse, weights=y) / counts
+    return mean_x, mean_y, counts
+
+
+# Point data of the three WebGL traces (Increased, Decreased, binned Neutral)
+def webgl_trace_data(df, day, codes, grid_size=GRID_SIZE):
+    x = df[f'log2(FC){day}'].to_numpy()
+    y = df[f'-log10(p){day}'].to_numpy()
+    genes = df['GeneName']
+
+    traces = []
+    for code in (0, 1):  # 'Increased', 'Decreased'
+        mask = codes == code
+        traces.append(dict(x=x[mask], y=y[mask], hovertext=genes[mask].astype(str).to_numpy()))
+
+    mean_x, mean_y, counts = bin_points(x[codes == 2], y[codes == 2], grid_size)
+    traces.append(dict(x=mean_x, y=mean_y, customdata=counts,
+                       marker=dict(color=REGULATION_COLORS['Neutral'], size=np.clip(4 + np.log2(counts), 4, 12))))
+    return traces
+
+
+# WebGL mode – significant genes as points, Neutral genes as a density grid
+def build_webgl_figure(df, day, codes, grid_size=GRID_SIZE):
+    increased, decreased, neutral = webgl_trace_data(df, day, codes, grid_size)
+    fig = go.Figure()
+    for level, data in zip(REGULATION_LEVELS[:2], (increased, decreased)):
+        fig.add_trace(go.Scattergl(mode='markers', name=level, marker=dict(color=REGULATION_COLORS[level]),
+                                   hovertemplate=GENE_HOVER, **data))
+    fig.add_trace(go.Scattergl(mode='markers', name='Neutral',
+                               hovertemplate='%{customdata} neutral genes<extra></extra>', **neutral))
+    return fig
+
+
+# Build the volcano figure for one day in the requested rendering mode
+def build_volcano_figure(df, day, mode='webgl', codes=None, fc_threshold=FC_THRESHOLD, p_threshold=P_THRESHOLD):
+    if codes is None:
+        codes = regulation_codes(df, day)
+    if mode == 'svg':
+        fig = build_svg_figure(df, day, codes)
+    elif mode == 'webgl':
+        fig = build_webgl_figure(df, day, codes)
+    else:
+        raise ValueError(f"Unknown render mode: {mode!r} (expected one of {RENDER_MODES})")
+    style_volcano_layout(fig, day, fc_threshold, p_threshold)
+    return fig
+
+
+# Incremental update after a threshold change – only colours / point data and threshold lines
+def volcano_patch(df, day, mode, codes, fc_threshold, p_threshold):
+    patched = Patch()
+    if mode == 'svg':
+        patched['data'][0]['marker']['color'] = codes
+    else:
+        for i, data in enumerate(webgl_trace_data(df, day, codes)):
+            for prop, value in data.items():
+                patched['data'][i][prop] = value
+    patched['layout']['shapes'] = threshold_shapes(fc_threshold, p_threshold)
+    return patched
+
+
+# Multi-day view – one WebGL panel per day, all genes in the same row order in every panel
+def build_multi_day_figure(df, days, codes_by_day, fc_threshold=FC_THRESHOLD, p_threshold=P_THRESHOLD):
+    fig = make_subplots(rows=1, cols=len(days), shared_yaxes=True, horizontal_spacing=0.03,
+                        subplot_titles=[f'{day} Days' for day in days])
+    genes = df['GeneName'].astype(str).to_numpy()
+    for col, day in enumerate(days, start=1):
+        fig.add_trace(go.Scattergl(
+            x=df[f'log2(FC){day}'].to_numpy(),
+            y=df[f'-log10(p){day}'].to_numpy(),
+            mode='markers',
+            name=f'{day} days',
+            marker=dict(color=codes_by_day[day], colorscale=REGULATION_COLORSCALE, cmin=0, cmax=2,
+                        showscale=False, size=5),
+            selected=dict(marker=dict(color='black', size=10)),
+            unselected=dict(marker=dict(opacity=0.25)),
+            hovertext=genes,
+            hovertemplate=GENE_HOVER,
+            showlegend=False
+        ), row=1, col=col)
+        for shape in threshold_shapes(fc_threshold, p_threshold):
+            fig.add_shape(row=1, col=col, **shape)
+        fig.update_xaxes(title_text='log₂(Fold Change)', row=1, col=col)
+
+    fig.update_yaxes(title_text='-log(p)', row=1, col=1)
+    fig.update_layout(
+        title='Volcano Plots – Days of PP Treatment (click or search a gene to track it)',
+        height=600,
+        font=dict(size=14),
+        plot_bgcolor='white',
+        clickmode='event'
+    )
+    return fig
@@ -0,0 +1,163 @@
+"""
+Columnar Store for the Dash Volcano App – Precomputed log2(FC) / -log10(p) per Day
+
+This helper module converts the RNA-seq summary table into a compact, memory-mapped
+columnar store, so that the Dash workers do not have to parse the whole TSV file
+and recompute the volcano coordinates every time they start.
+All workers open the same files read-only via mmap, so the operating system keeps
+a single copy of the data in memory (page cache) instead of one copy per worker.
+
+Input:
+- A tab-separated text file:
+  summary_table_supervised_PT_PP_PT_CTRL_and_PT_PP_PT_CTRL_long_7_9_12_230524.txt
+- Required columns:
+    - 'GeneName': gene identifier
+    - 'folds_median_PT_PP_PT_CTRL_long_{day}': median fold change (FC) for each day
+    - 'ttest_unpaired_p_PT_PP_PT_CTRL_long_{day}': unpaired t-test p-value for each day
+
+Output (folder 'volcano_store'):
+- values.npy: float32 matrix (genes x columns, column-major) with
+  'log2(FC){day}' and '-log10(p){day}' for every day
+- gene_codes.npy: int32 codes of the gene names
+- meta.json: column names, days, gene name dictionary (categories),
+  source file signature and dataset version
+
+Dependencies:
+- pandas
+- numpy
+- json
+- hashlib
+- os
+
+To build the store (ingest step):
+- Run: python volcano_store.py
+"""
+
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+DATA_FILE = 'summary_table_supervised_PT_PP_PT_CTRL_and_PT_PP_PT_CTRL_long_7_9_12_230524.txt'
+STORE_DIR = 'volcano_store'
+DAYS = [7, 9, 12]
+
+VALUES_FILE = 'values.npy'
+CODES_FILE = 'gene_codes.npy'
+META_FILE = 'meta.json'
+
+
+# Column names used by the app for each day
+def value_columns(days=DAYS):
+    columns = []
+    for day in days:
+        columns += [f'log2(FC){day}', f'-log10(p){day}']
+    return columns
+
+
+# Size and modification time of the source file (used to detect a stale store)
+def source_signature(tsv_path):
+    stat = os.stat(tsv_path)
+    return {'name': os.path.basename(tsv_path), 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+# Content hash of the source file – identifies the dataset version
+def dataset_version(tsv_path):
+    sha = hashlib.sha1()
+    with open(tsv_path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1 << 20), b''):
+            sha.update(chunk)
+    return sha.hexdigest()[:12]
+
+
+# Save an array next to its final name and move it into place at the end
+def _save_atomic(path, array):
+    tmp_path = path + '.tmp.npy'
+    np.save(tmp_path, array)
+    os.replace(tmp_path, path)
+
+
+# Ingest step: parse the TSV once and write the columnar store
+def build_store(tsv_path=DATA_FILE, store_dir=STORE_DIR, days=DAYS):
+    usecols = ['GeneName']
+    for day in days:
+        usecols += [f'folds_median_PT_PP_PT_CTRL_long_{day}', f'ttest_unpaired_p_PT_PP_PT_CTRL_long_{day}']
+    df = pd.read_csv(tsv_path, sep='\t', usecols=usecols)
+
+    # Column-major float32 matrix – every column is one contiguous block on disk
+    columns = value_columns(days)
+    values = np.empty((len(df), len(columns)), dtype=np.float32, order='F')
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for i, day in enumerate(days):
+            values[:, 2 * i] = np.log2(df[f'folds_median_PT_PP_PT_CTRL_long_{day}'].to_numpy(dtype=np.float64))
+            values[:, 2 * i + 1] = -np.log10(df[f'ttest_unpaired_p_PT_PP_PT_CTRL_long_{day}'].to_numpy(dtype=np.float64))
+
+    # Gene names as a categorical dictionary (codes + categories)
+    codes, categories = pd.factorize(df['GeneName'].astype(str))
+
+    os.makedirs(store_dir, exist_ok=True)
+    _save_atomic(os.path.join(store_dir, VALUES_FILE), values)
+    _save_atomic(os.path.join(store_dir, CODES_FILE), codes.astype(np.int32))
+
+    meta = {
+        'days': list(days),
+        'columns': columns,
+        'n_genes': int(len(df)),
+        'categories': categories.tolist(),
+        'source': source_signature(tsv_path),
+        'version': dataset_version(tsv_path),
+    }
+    tmp_meta = os.path.join(store_dir, META_FILE + '.tmp')
+    with open(tmp_meta, 'w', encoding='UTF-8') as file:
+        json.dump(meta, file)
+    os.replace(tmp_meta, os.path.join(store_dir, META_FILE))
+    return meta
+
+
+# Read the store metadata (None if the store has not been built yet)
+def read_meta(store_dir=STORE_DIR):
+    meta_path = os.path.join(store_dir, META_FILE)
+    if not os.path.exists(meta_path):
+        return None
+    with open(meta_path, 'r', encoding='UTF-8') as file:
+        return json.load(file)
+
+
+# Check whether the store is missing or older than the source TSV
+def store_is_stale(tsv_path=DATA_FILE, store_dir=STORE_DIR):
+    meta = read_meta(store_dir)
+    if meta is None:
+        return True
+    if not os.path.exists(tsv_path):
+        return False  # Deployed without the TSV – the store is the only source
+    signature = source_signature(tsv_path)
+    return meta['source']['size'] != signature['size'] or meta['source']['mtime_ns'] != signature['mtime_ns']
+
+
+# Open the store read-only; the float columns stay memory-mapped
+def load_store(store_dir=STORE_DIR):
+    meta = read_meta(store_dir)
+    values = np.load(os.path.join(store_dir, VALUES_FILE), mmap_mode='r')
+    codes = np.load(os.path.join(store_dir, CODES_FILE), mmap_mode='r')
+    return values, codes, meta
+
+
+# Build the app DataFrame on top of the memory-mapped store (rebuilds the store if stale)
+def load_volcano_frame(tsv_path=DATA_FILE, store_dir=STORE_DIR):
+    if store_is_stale(tsv_path, store_dir):
+        build_store(tsv_path, store_dir)
+    values, codes, meta = load_store(store_dir)
+
+    # copy=False keeps the float block backed by the mmap instead of a private copy
+    df = pd.DataFrame(values, columns=meta['columns'], copy=False)
+    df.insert(0, 'GeneName', pd.Categorical.from_codes(codes, categories=meta['categories']))
+    df.attrs['version'] = meta['version']
+    return df
+
+
+if __name__ == '__main__':
+    meta = build_store()
+    print(f"Store written to '{STORE_DIR}': {meta['n_genes']} genes, "
+          f"days {meta['days']}, version {meta['version']}")
@@ -0,0 +1,54 @@
+"""
+Production Entry Point (WSGI) for the Dash Volcano App
+
+Replaces the development server (`app.run`) on the hosted instance with gunicorn.
+
+- `create_app()` is the app factory: it imports the Dash app script once, which opens the
+  memory-mapped columnar store, builds the regulation columns and indexes and pre-warms
+  the figure cache.
+- `server` is the Flask (WSGI) application used by gunicorn.
+- gunicorn.conf.py sets `preload_app = True`, so this module is imported in the gunicorn
+  master process before the workers are forked: the dataset, indexes and cached figures
+  are loaded once and shared copy-on-write by all workers (the mmap'ed store pages are
+  shared through the page cache anyway).
+- Responses (callbacks, layout, API) are compressed with brotli or gzip, depending on the
+  client's Accept-Encoding (flask-compress, enabled in the app script).
+
+To run:
+- Install dependencies: `pip install -r requirements.txt`
+- Run: gunicorn -c gunicorn.conf.py wsgi:server
+- Load test: python load_test.py --users 20 --requests 50
+
+Dependencies:
+- gunicorn
+- flask-compress, brotli
+- dash
+"""
+
+import importlib.util
+import os
+import sys
+
+APP_FILE = 'Volcano plot_RNAseq_PT_by days.py'
+APP_MODULE = 'volcano_app'
+
+
+# App factory – import the Dash app script (its file name contains spaces) once per process
+def create_app():
+    if APP_MODULE in sys.modules:
+        return sys.modules[APP_MODULE].app
+
+    app_dir = os.path.dirname(os.path.abspath(__file__))
+    os.chdir(app_dir)  # The store, the TSV and the figure cache live next to the script
+    if app_dir not in sys.path:
+        sys.path.insert(0, app_dir)
+
+    spec = importlib.util.spec_from_file_location(APP_MODULE, os.path.join(app_dir, APP_FILE))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[APP_MODULE] = module
+    spec.loader.exec_module(module)
+    return module.app
+
+
+app = create_app()
+server = app.server
@@ -4,12 +4,26 @@ Lipid Class Analysis Script
 This script processes an Excel file containing lipid class composition (%mol) in tumor samples
 from mice divided into experimental groups (CTRL and PP). For each lipid class (sheet), it:
 
-1. Excludes data from mouse #311,
-2. Tests each lipid species for statistical differences between groups,
-3. Selects lipids with significant differences (p < 0.05),
+1. Excludes data from mouse #311 (--exclude-mice),
+2. Tests each lipid species for statistical differences between groups
+   (all species of a sheet in one batched call, see lipid_stats.py; Welch t-test or
+   Mann-Whitney U by Shapiro-Wilk at --normality-alpha, 0.05, independent of --alpha),
+3. Selects lipids with significant differences (p < 0.05, --alpha),
 4. Plots boxplots + jitter plots for significant lipids,
 5. Saves plots to PNG files,
-6. Aggregates all statistical results into a single Excel file.
+6. Aggregates all statistical results into a single Excel file, with effect sizes
+   (Hedges' g + bootstrap 95% CI, rank-biserial r) and p-values adjusted over all tests
+   of the workbook (Benjamini-Hochberg, Benjamini-Yekutieli, Holm) and permutation p-values
+   (exact for small groups, see permutation_test.py).
+
+The workbook is read once (all sheets in one pass; with the fast calamine reader if
+python-calamine is installed). Sheets are analysed and plotted in parallel by a process pool
+(--workers, default: all cores); results are merged in workbook sheet order.
+
+Per-sheet results and plots are cached by content (sheet data + parameters, see
+sheet_cache.py): only sheets that changed since the last run, or all sheets after a
+parameter change, are recomputed. --force recomputes everything; cache statistics are
+printed at the end.
 
 Input:
 - Excel file "Lipid_classes_%mol.xlsx" with multiple sheets, each containing lipid data.
@@ -17,7 +31,8 @@ Input:
 
 Output:
 - PNG plots for each lipid class with significant differences, saved in folder "lipid_plots".
-- Excel file "Results_summary.xlsx" aggregating statistical test results across sheets.
+- Excel file "Results_summary.xlsx" aggregating statistical test results across sheets
+  (test, statistic, p-value, effect sizes, permutation and BH / BY / Holm adjusted p-values).
 
 Dependencies:
 - pandas
@@ -25,116 +40,174 @@ Dependencies:
 - seaborn
 - matplotlib.pyplot
 - os
+- python-calamine (optional, faster xlsx reading)
+- lipid_stats, multiple_testing, permutation_test, sheet_cache (helper modules in this folder)
 '''
 
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from importlib.util import find_spec
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
 import pandas as pd
-import scipy.stats as stats
 import seaborn as sns
-import matplotlib.pyplot as plt
-import os
+
+from lipid_stats import ALPHA, N_BOOTSTRAP, NORMALITY_ALPHA, TEST_POLICY, sheet_results
+from multiple_testing import add_adjusted_columns
+from sheet_cache import SheetCache
 
 # Path to Excel file
 file_path = "Lipid_classes_%mol.xlsx"
-excel_file = pd.ExcelFile(file_path)
-sheet_names = excel_file.sheet_names
 
 # Folder for plots
 output_folder = "lipid_plots"
-os.makedirs(output_folder, exist_ok=True)
 
-# Storage for aggregated results
-all_results = []
+# Exclude specific mice
+exclude_mice = [311]
 
-# Exclude specific mouse
-exclude_mouse = 311
+# calamine parses xlsx much faster than openpyxl (pandas >= 2.2, optional)
+EXCEL_ENGINE = 'calamine' if find_spec('python_calamine') else None
 
-# Analyze each sheet (lipid class)
-for sheet in sheet_names:
-    df = pd.read_excel(file_path, sheet_name=sheet)
-    if 'Mouse number' not in df.columns or 'Group' not in df.columns:
-        continue  # Skip incomplete or empty sheets
 
-    # Remove excluded mouse
-    df = df[df['Mouse number'] != exclude_mouse]
+# Boxplot + stripplot of the significant lipids of one sheet
+def plot_significant(sheet, df_melted, significant_lipids, p_values, alpha=ALPHA):
+    df_significant = df_melted[df_melted['Lipid'].isin(significant_lipids)]
 
-    # Melt to long format
-    df_melted = df.melt(id_vars=['Mouse number', 'Group'], var_name='Lipid', value_name='Value')
+    plt.figure(figsize=(10, 6))
 
-    significant_lipids = []
-    p_values = {}
-    results = []
-
-    for lipid in df.columns[2:]:  # Skip 'Mouse number' and 'Group'
-        group_ctrl = df_melted[(df_melted['Lipid'] == lipid) & (df_melted['Group'] == 'CTRL')]['Value']
-        group_pp = df_melted[(df_melted['Lipid'] == lipid) & (df_melted['Group'] == 'PP')]['Value']
-
-        # Choose statistical test based on normality
-        if group_ctrl.nunique() == 1 or group_pp.nunique() == 1:
-            stat, p_value = stats.mannwhitneyu(group_ctrl, group_pp, alternative='two-sided')
-            test_used = 'Mann-Whitney U'
-        else:
-            _, p_norm_ctrl = stats.shapiro(group_ctrl)
-            _, p_norm_pp = stats.shapiro(group_pp)
-
-            if p_norm_ctrl > 0.05 and p_norm_pp > 0.05:
-                stat, p_value = stats.ttest_ind(group_ctrl, group_pp, equal_var=False)
-                test_used = 't-test'
-            else:
-                stat, p_value = stats.mannwhitneyu(group_ctrl, group_pp, alternative='two-sided')
-                test_used = 'Mann-Whitney U'
-
-        results.append({
-            'Sheet': sheet,
-            'Lipid': lipid,
-            'Statistic': stat,
-            'p-value': p_value,
-            'Test': test_used
-        })
-
-        if p_value < 0.05:
-            significant_lipids.append(lipid)
-            p_values[lipid] = p_value
-
-    results_df = pd.DataFrame(results)
-    all_results.append(results_df)
-
-    # Plot only significant lipids
-    if significant_lipids:
-        df_significant = df_melted[df_melted['Lipid'].isin(significant_lipids)]
+    # Define colors
+    transparent_pink = (1.0, 0.5, 0.5, 1)
+    transparent_purple = (0.6, 0.2, 0.7, 1)
+
+    palette = {'CTRL': 'lightgray', 'PP': 'darkgray'}
+    palette2 = {'CTRL': transparent_purple, 'PP': transparent_pink}
 
-        plt.figure(figsize=(10, 6))
+    # Boxplot
+    ax = sns.boxplot(data=df_significant, x='Lipid', y='Value', hue='Group', palette=palette2, showfliers=False)
 
-        # Define colors
-        transparent_pink = (1.0, 0.5, 0.5, 1)
-        transparent_purple = (0.6, 0.2, 0.7, 1)
+    # Stripplot overlay
+    sns.stripplot(data=df_significant, x='Lipid', y='Value', hue='Group', palette=palette,
+                  dodge=True, jitter=True, marker='o', alpha=0.7, linewidth=0.5, size=7)
 
-        palette = {'CTRL': 'lightgray', 'PP': 'darkgray'}
-        palette2 = {'CTRL': transparent_purple, 'PP': transparent_pink}
+    # Annotate p-values
+    for i, lipid in enumerate(significant_lipids):
+        p = p_values[lipid]
+        x_pos = i
+        y_max = df_significant[df_significant['Lipid'] == lipid]['Value'].max()
+        y_offset = y_max * 0.05
+        ax.text(x_pos, y_max + y_offset, f"p={p:.3f}", ha='center', fontsize=10, color='black')
 
-        # Boxplot
-        ax = sns.boxplot(data=df_significant, x='Lipid', y='Value', hue='Group', palette=palette2, showfliers=False)
+    sns.despine(top=True, right=True)
 
-        # Stripplot overlay
-        sns.stripplot(data=df_significant, x='Lipid', y='Value', hue='Group', palette=palette,
-                      dodge=True, jitter=True, marker='o', alpha=0.7, linewidth=0.5, size=7)
+    plt.xticks(rotation=45)
+    plt.title(f"{sheet} [%mol] (p < {alpha})")
+    plt.legend(title="Group", loc='upper left', bbox_to_anchor=(1, 1))
+    plt.tight_layout()
+    plt.savefig(os.path.join(output_folder, f"{sheet}.png"), dpi=300)
+    plt.close()
 
-        # Annotate p-values
-        for i, lipid in enumerate(significant_lipids):
-            p = p_values[lipid]
-            x_pos = i
-            y_max = df_significant[df_significant['Lipid'] == lipid]['Value'].max()
-            y_offset = y_max * 0.05
-            ax.text(x_pos, y_max + y_offset, f"p={p:.3f}", ha='center', fontsize=10, color='black')
 
-        sns.despine(top=True, right=True)
+# Statistics and plot of one sheet (lipid class); runs in a worker process.
+# Returns the results table and the plot path (None if no lipid is significant).
+def analyze_sheet(job):
+    sheet, df, params = job
+    plot_path = os.path.join(output_folder, f"{sheet}.png")
 
-        plt.xticks(rotation=45)
-        plt.title(f"{sheet} [%mol] (p < 0.05)")
-        plt.legend(title="Group", loc='upper left', bbox_to_anchor=(1, 1))
-        plt.tight_layout()
-        plt.savefig(os.path.join(output_folder, f"{sheet}.png"), dpi=300)
-        plt.close()
+    # Remove excluded mice
+    df = df[~df['Mouse number'].isin(params['exclude_mice'])]
 
-# Save combined results to Excel
-final_results_df = pd.concat(all_results, ignore_index=True)
-final_results_df.to_excel("Results_summary.xlsx", index=False)
+    # Melt to long format
+    df_melted = df.melt(id_vars=['Mouse number', 'Group'], var_name='Lipid', value_name='Value')
+
+    # Statistical tests for all lipid species at once (see lipid_stats.py)
+    results_df = sheet_results(df, sheet, normality_alpha=params['normality_alpha'], n_boot=params['n_boot'],
+                               n_permutations=params['n_permutations'], seed=params['seed'])
+
+    significant = results_df[results_df['p-value'] < params['alpha']]
+    significant_lipids = significant['Lipid'].tolist()
+    p_values = dict(zip(significant['Lipid'], significant['p-value']))
+
+    # Plot only significant lipids (and remove the plot of an earlier run otherwise)
+    if significant_lipids:
+        plot_significant(sheet, df_melted, significant_lipids, p_values, params['alpha'])
+        return results_df, plot_path
+    if os.path.exists(plot_path):
+        os.remove(plot_path)
+    return results_df, None
+
+
+# Write the cached plot of a sheet (or remove an outdated one)
+def restore_plot(sheet, png):
+    plot_path = os.path.join(output_folder, f"{sheet}.png")
+    if png is not None:
+        with open(plot_path, 'wb') as file:
+            file.write(png)
+    elif os.path.exists(plot_path):
+        os.remove(plot_path)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Lipid class analysis (CTRL vs PP)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='parallel worker processes')
+    parser.add_argument('--permutations', type=int, default=10000,
+                        help='permutation test: exact if the groups allow at most this many relabellings, '
+                             'otherwise this many random ones (0 = off)')
+    parser.add_argument('--exclude-mice', type=int, nargs='*', default=exclude_mice, help='mouse numbers to exclude')
+    parser.add_argument('--alpha', type=float, default=ALPHA, help='significance level')
+    parser.add_argument('--normality-alpha', type=float, default=NORMALITY_ALPHA,
+                        help='Shapiro-Wilk level that picks Welch t-test vs Mann-Whitney U (independent of --alpha)')
+    parser.add_argument('--force', action='store_true', help='ignore cached sheet results and recompute all')
+    args = parser.parse_args()
+    params = {
+        'exclude_mice': sorted(args.exclude_mice), 'alpha': args.alpha,
+        'normality_alpha': args.normality_alpha, 'test_policy': TEST_POLICY,
+        'n_permutations': args.permutations, 'n_boot': N_BOOTSTRAP, 'seed': 0
+    }
+
+    start = time.perf_counter()
+    os.makedirs(output_folder, exist_ok=True)
+    cache = SheetCache()
+
+    # Read all sheets in one pass (dict: sheet name -> DataFrame, in workbook order)
+    sheets = pd.read_excel(file_path, sheet_name=None, engine=EXCEL_ENGINE)
+    sheets = {sheet: df for sheet, df in sheets.items()
+              if 'Mouse number' in df.columns and 'Group' in df.columns}  # Skip incomplete or empty sheets
+    read_time = time.perf_counter() - start
+
+    # Unchanged sheets come from the cache, the others are analysed in parallel
+    keys = {sheet: SheetCache.key(sheet, df, params) for sheet, df in sheets.items()}
+    results_by_sheet = {}
+    for sheet, key in keys.items():
+        cached = None if args.force else cache.get(key)
+        if cached is not None:
+            results_by_sheet[sheet], png = cached
+            restore_plot(sheet, png)
+    jobs = [(sheet, df, params) for sheet, df in sheets.items() if sheet not in results_by_sheet]
+
+    # map() returns the results in job order
+    if jobs:
+        with ProcessPoolExecutor(max_workers=min(args.workers, len(jobs))) as pool:
+            for (sheet, _, _), (results_df, plot_path) in zip(jobs, pool.map(analyze_sheet, jobs)):
+                png = None
+                if plot_path is not None:
+                    with open(plot_path, 'rb') as file:
+                        png = file.read()
+                cache.put(keys[sheet], results_df, png)
+                results_by_sheet[sheet] = results_df
+
+    # Save combined results to Excel (workbook sheet order)
+    final_results_df = pd.concat([results_by_sheet[sheet] for sheet in sheets], ignore_index=True)
+    add_adjusted_columns(final_results_df)  # Multiple-testing correction over all sheets
+    final_results_df.to_excel("Results_summary.xlsx", index=False)
+
+    stats = cache.stats()
+    print(f"{len(sheets)} sheets: workbook read in {read_time:.1f} s, "
+          f"total {time.perf_counter() - start:.1f} s with {args.workers} workers")
+    print(f"Cache: {len(sheets) - len(jobs)} sheets reused, {len(jobs)} recomputed"
+          + (f" ({', '.join(sheet for sheet, _, _ in jobs)})" if jobs else '')
+          + f"; {stats['entries']} entries, {stats['size_mb']:.1f} MB in '{cache.cache_dir}'"
+          + (" (--force)" if args.force else ''))
@@ -16,36 +16,72 @@ Output:
 - Kaplan-Meier survival plots for each lipid (PP and CTRL groups)
 - Log-rank p-values annotated on the plots
 
+Batch mode (--batch, headless):
+- median splits, Kaplan-Meier median survival times and log-rank statistics of all lipids
+  in one vectorized pass per group (boolean membership matrix, see survival_stats.py)
+- plots rendered in parallel by a process pool (Agg backend, --workers), saved as 300-dpi
+  PNGs in --outdir for both groups
+- stat_results (group, lipid, median, group sizes, median survival above / below,
+  log-rank statistic and p-value) written
+  to 'KM_logrank_results.xlsx'
+Cutpoint mode (--cutpoint, headless): instead of the median, the optimal cutpoint of every
+lipid (maximally selected log-rank statistic over all cuts between distinct values, at least
+--min-prop of the mice on each side), with p-values corrected for the cutpoint search by
+--permutations permutations (one precomputed permutation matrix per group, shared by all
+lipids; see survival_stats.py). Results in 'KM_cutpoint_results.xlsx', plots of the optimal
+splits as 'KM_cutpoint_<group>_<lipid>.png' in --outdir.
+Cox mode (--cox, headless): one Cox proportional hazards model per lipid over all mice,
+adjusted for group (PP vs CTRL), all lipids fitted at once by batched Newton-Raphson (Efron
+ties, see survival_stats.py). Hazard ratio per unit %mol with 95% CI, Wald p-value, the group
+hazard ratio and BH / BY / Holm adjusted p-values (multiple_testing.py) in
+'Cox_screen_results.xlsx', plus the run time per 100 lipids.
+Without --batch, --cutpoint or --cox the script shows the plots interactively, one lipid after another.
+
 Dependencies:
 - pandas
 - matplotlib
 - lifelines
 - scipy
+- numpy
+- survival_stats, multiple_testing (helper modules in this folder)
 """
 
 # Import required libraries
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
 import pandas as pd
+import matplotlib
 import matplotlib.pyplot as plt
 from lifelines import KaplanMeierFitter
 from lifelines.statistics import logrank_test
-from scipy.stats import shapiro, mannwhitneyu, ttest_ind
+from scipy.stats import norm, shapiro, mannwhitneyu, ttest_ind
+
+from multiple_testing import add_adjusted_columns
+from survival_stats import MIN_PROP, N_PERMUTATIONS, cox_screen, kaplan_meier_matrix, logrank_test_matrix, \
+    maxstat_logrank, permutation_matrix
+
+TIME_COLUMN = 'Number of days since PP administration'
 
 # Load Excel data containing survival times and lipid concentrations
 file_path = 'PUFA_serum_%mol.xlsx'
 df = pd.read_excel(file_path)
 
+# Assume all mice died (i.e., event occurred for all) – set before splitting, so both groups have it
+df['Event'] = 1
+
 # Split data into PP and CTRL groups based on the 'Group' column
 pp_group = df[df['Group'] == 'PP']
 ctrl_group = df[df['Group'] == 'CTRL']
 
-# Assume all mice died (i.e., event occurred for all)
-df['Event'] = 1
-
-# Prepare list for potential statistical results (not used later in this version)
+# Statistical results of the batch mode (one row per lipid and group)
 stat_results = []
 
-# Select lipid columns (assuming they start at the 5th column)
-lipids = df.columns[4:]
+# Select lipid columns (assuming they start at the 5th column; 'Event' was just appended)
+lipids = df.columns[4:].drop('Event')
 
 # Plot Kaplan-Meier curves for the PP group
 def plot_km_for_pp(lipid):
@@ -123,10 +159,180 @@ def plot_km_for_ctrl(lipid):
     # plt.savefig(f"KM_CTRL_{lipid}.png")
     plt.show()
 
-# Run analysis for each lipid
-for lipid in lipids:
-    plot_km_for_pp(lipid)
-    plot_km_for_ctrl(lipid)
+# Sanitize lipid name for file naming
+def safe_name(lipid):
+    return lipid.replace("(", "").replace(")", "").replace("/", "_").replace("\\", "_")
+
+
+# Median splits and log-rank tests of all lipids of one group at once (batch mode)
+def median_split_stats(group_df, group_name):
+    values = group_df[lipids].to_numpy(dtype=float)
+    medians = np.nanmedian(values, axis=0)
+    above = values > medians
+    below = values <= medians  # Mice with missing values are in neither subgroup
+    times = group_df[TIME_COLUMN].to_numpy(dtype=float)
+    events = group_df['Event'].to_numpy(dtype=bool)
+    result = logrank_test_matrix(times, events, above, below)
+    median_above = kaplan_meier_matrix(times, events, above).median
+    median_below = kaplan_meier_matrix(times, events, below).median
+
+    rows, jobs = [], []
+    for k, lipid in enumerate(lipids):
+        rows.append({
+            'Group': group_name,
+            'Lipid': lipid,
+            'Median': medians[k],
+            'N above median': int(above[:, k].sum()),
+            'N below median': int(below[:, k].sum()),
+            'Median survival above (days)': median_above[k],
+            'Median survival below (days)': median_below[k],
+            'Log-rank statistic': result.statistic[k],
+            'p-value': result.pvalue[k]
+        })
+        jobs.append({
+            'lipid': lipid, 'group': group_name, 'p_value': result.pvalue[k],
+            'above': (times[above[:, k]], events[above[:, k]]),
+            'below': (times[below[:, k]], events[below[:, k]])
+        })
+    return rows, jobs
+
+
+# Optimal cutpoints (maximally selected log-rank statistics) of all lipids of one group (cutpoint mode)
+def cutpoint_stats(group_df, group_name, permutations, min_prop=MIN_PROP):
+    values = group_df[lipids].to_numpy(dtype=float)
+    times = group_df[TIME_COLUMN].to_numpy(dtype=float)
+    events = group_df['Event'].to_numpy(dtype=bool)
+    result = maxstat_logrank(times, events, values, min_prop=min_prop, permutations=permutations)
+
+    rows, jobs = [], []
+    for k, lipid in enumerate(lipids):
+        rows.append({
+            'Group': group_name,
+            'Lipid': lipid,
+            'Cutpoint': result.cutpoint[k],
+            'N above cutpoint': result.n_above[k],
+            'N below cutpoint': result.n_below[k],
+            'Max log-rank statistic': result.statistic[k],
+            'p-value (unadjusted)': result.pvalue[k],
+            'p-value (permutation)': result.pvalue_permutation[k]
+        })
+        if np.isnan(result.cutpoint[k]):
+            continue
+        above = values[:, k] > result.cutpoint[k]
+        below = values[:, k] <= result.cutpoint[k]
+        jobs.append({
+            'lipid': lipid, 'group': group_name, 'p_value': result.pvalue_permutation[k],
+            'split': 'Cutpoint', 'prefix': 'KM_cutpoint',
+            'above': (times[above], events[above]),
+            'below': (times[below], events[below])
+        })
+    return rows, jobs
+
+
+# Cox model "lipid + group" of every lipid over all mice (Cox mode)
+def cox_stats(df):
+    values = df[lipids].to_numpy(dtype=float)
+    times = df[TIME_COLUMN].to_numpy(dtype=float)
+    events = df['Event'].to_numpy(dtype=bool)
+    group = (df['Group'] == 'PP').to_numpy(dtype=float)
+    result = cox_screen(times, events, values, group)
+
+    z = norm.ppf(0.975)
+    cox_df = pd.DataFrame({
+        'Lipid': lipids,
+        'N': result.n,
+        'Hazard ratio': np.exp(result.coef[:, 0]),
+        'HR CI low': np.exp(result.coef[:, 0] - z * result.se[:, 0]),
+        'HR CI high': np.exp(result.coef[:, 0] + z * result.se[:, 0]),
+        'p-value': result.pvalue[:, 0],
+        'Group HR (PP vs CTRL)': np.exp(result.coef[:, 1]),
+        'Group p-value': result.pvalue[:, 1],
+        'Converged': result.converged
+    })
+    return add_adjusted_columns(cox_df)
+
+
+# Render one Kaplan-Meier plot to PNG (batch mode, runs in a worker process)
+def render_km(job, outdir):
+    matplotlib.use('Agg')
+    kmf = KaplanMeierFitter()
+    fig = plt.figure(figsize=(8, 6))
+    split = job.get('split', 'Median')
+    for subgroup, label in (('above', f'Above {split}'), ('below', f'Below {split}')):
+        times, events = job[subgroup]
+        kmf.fit(times, event_observed=events)
+        kmf.plot(label=f"{label} ({job['group']})")
+
+    p_label = 'Log-rank p-value' if split == 'Median' else 'Permutation-corrected p-value'
+    plt.text(0.05, 0.05, f"{p_label}: {job['p_value']:.3f}", transform=plt.gca().transAxes,
+             fontsize=9, bbox=dict(facecolor='white', alpha=0.7, edgecolor='black'))
+    plt.title(f"Survival Curve for {job['lipid']} ({job['group']})")
+    plt.xlabel('Days since PP administration')
+    plt.ylabel('Survival Probability')
+    plt.legend()
+    path = os.path.join(outdir, f"{job.get('prefix', 'KM')}_{job['group']}_{safe_name(job['lipid'])}.png")
+    fig.savefig(path, dpi=300, bbox_inches='tight')
+    plt.close(fig)
+    return path
+
+
+def _render_km_job(args):
+    return render_km(*args)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Kaplan-Meier analysis of serum lipids (median split)')
+    parser.add_argument('--batch', action='store_true', help='headless: all statistics + parallel PNG rendering')
+    parser.add_argument('--cutpoint', action='store_true',
+                        help='headless: optimal cutpoint per lipid (maximally selected log-rank statistics, '
+                             'permutation-corrected) instead of the median split')
+    parser.add_argument('--permutations', type=int, default=N_PERMUTATIONS, help='permutations (cutpoint mode)')
+    parser.add_argument('--min-prop', type=float, default=MIN_PROP,
+                        help='smallest share of mice on either side of a cutpoint (cutpoint mode)')
+    parser.add_argument('--cox', action='store_true',
+                        help='headless: Cox model per lipid adjusted for group, hazard ratios + FDR')
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--outdir', default='km_plots')
+    parser.add_argument('--results', default=None,
+                        help="results table (default: 'KM_logrank_results.xlsx', cutpoint mode: 'KM_cutpoint_results.xlsx')")
+    args = parser.parse_args()
+    if args.results is None:
+        args.results = ('Cox_screen_results.xlsx' if args.cox else
+                        'KM_cutpoint_results.xlsx' if args.cutpoint else 'KM_logrank_results.xlsx')
+
+    if args.cox:
+        start = time.perf_counter()
+        cox_df = cox_stats(df)
+        cox_time = time.perf_counter() - start
+        cox_df.to_excel(args.results, index=False)
+        print(f"Cox screen: {len(lipids)} lipids in {cox_time:.3f} s "
+              f"({cox_time / len(lipids) * 100:.3f} s per 100 features), "
+              f"{(~cox_df['Converged']).sum()} not converged; results in '{args.results}'")
+    elif not (args.batch or args.cutpoint):
+        # Run analysis for each lipid
+        for lipid in lipids:
+            plot_km_for_pp(lipid)
+            plot_km_for_ctrl(lipid)
+    else:
+        start = time.perf_counter()
+        render_jobs = []
+        for group_df, group_name in ((pp_group, 'PP'), (ctrl_group, 'CTRL')):
+            if args.cutpoint:
+                # One precomputed permutation matrix per group, shared by all lipids
+                permutations = permutation_matrix(len(group_df), args.permutations, seed=0)
+                rows, jobs = cutpoint_stats(group_df, group_name, permutations, args.min_prop)
+            else:
+                rows, jobs = median_split_stats(group_df, group_name)
+            stat_results.extend(rows)
+            render_jobs.extend(jobs)
+        stats_time = time.perf_counter() - start
+
+        os.makedirs(args.outdir, exist_ok=True)
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            paths = list(pool.map(_render_km_job, [(job, args.outdir) for job in render_jobs]))
 
-# (Optional) Convert stat_results into DataFrame – currently unused
-stat_results_df = pd.DataFrame(stat_results)
+        stat_results_df = pd.DataFrame(stat_results)
+        stat_results_df.to_excel(args.results, index=False)
+        print(f"{len(lipids)} lipids x 2 groups ({'optimal cutpoint' if args.cutpoint else 'median split'}): statistics in {stats_time:.3f} s, "
+              f"{len(paths)} plots in '{args.outdir}', total {time.perf_counter() - start:.1f} s "
+              f"with {args.workers} workers; results in '{args.results}'")
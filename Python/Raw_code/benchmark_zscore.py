@@ -0,0 +1,79 @@
+"""
+Benchmark – Streaming Z-scores (zscore_stream.py) vs df.apply(zscore)
+
+Synthetic TPM-like matrix: --genes rows (log-normal values) x --mice columns. Compared for
+per-column (immune cell clustermaps, df.apply(zscore)) and per-row (lipid clustermap,
+df.apply(zscore, axis=1)) normalization:
+- run time
+- peak memory allocated during the normalization (tracemalloc; NumPy buffers included)
+- maximum difference of the z-scores (float32 vs float64: ~1e-6)
+
+The memory-mapped path (npy_from_chunks + zscore_npy, --chunk-rows rows at a time) is timed
+on the same matrix written to a temporary .npy file; its peak memory is bounded by the
+chunk size, not by the matrix.
+
+Usage:
+    python benchmark_zscore.py --genes 20000 --mice 40
+
+Dependencies:
+- numpy
+- pandas
+- scipy
+- zscore_stream (helper module in this folder)
+"""
+
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+from scipy.stats import zscore
+
+from zscore_stream import npy_from_chunks, zscore_frame, zscore_npy
+
+
+# (result, seconds, peak MB) of one call
+def measure(function):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = function()
+    seconds = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1] / 2**20
+    tracemalloc.stop()
+    return result, seconds, peak
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Streaming z-scores vs df.apply(zscore)')
+    parser.add_argument('--genes', type=int, default=20000)
+    parser.add_argument('--mice', type=int, default=40)
+    parser.add_argument('--chunk-rows', type=int, default=4096)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(rng.lognormal(2, 1.5, (args.genes, args.mice)),
+                      columns=[f'Mouse {i}' for i in range(args.mice)])
+    print(f"{args.genes} x {args.mice} matrix ({df.to_numpy().nbytes / 2**20:.1f} MB as float64)")
+
+    for axis, label in ((0, 'per column'), (1, 'per row')):
+        if axis == 0:
+            reference, apply_time, apply_peak = measure(lambda: df.apply(zscore))
+        else:
+            reference, apply_time, apply_peak = measure(lambda: df.apply(zscore, axis=1, result_type='broadcast'))
+        result, stream_time, stream_peak = measure(lambda: zscore_frame(df, axis=axis))
+        difference = np.abs(result.to_numpy(dtype=float) - reference.to_numpy()).max()
+        print(f"{label}: apply(zscore) {apply_time:7.3f} s, peak {apply_peak:7.1f} MB | "
+              f"zscore_frame {stream_time:7.3f} s, peak {stream_peak:7.1f} MB "
+              f"({apply_time / stream_time:.0f}x faster) | max |difference| {difference:.1e}")
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'matrix.npy')
+            chunks = (df.iloc[start:start + args.chunk_rows] for start in range(0, args.genes, args.chunk_rows))
+            npy_from_chunks(chunks, path)
+            _, mmap_time, mmap_peak = measure(lambda: zscore_npy(path, axis=axis, chunk_rows=args.chunk_rows))
+            difference = np.abs(np.load(path).astype(float) - reference.to_numpy()).max()
+        print(f"{'':>{len(label)}}  zscore_npy (memory-mapped, {args.chunk_rows} rows per chunk) {mmap_time:7.3f} s, "
+              f"peak {mmap_peak:7.1f} MB | max |difference| {difference:.1e}")
@@ -0,0 +1,200 @@
+"""
+Scalable Clustering Backend for the Clustermaps
+
+sns.clustermap computes a dense float64 distance matrix and a SciPy linkage on every call
+and draws the heatmap cell by cell (pcolormesh). That is fine for ~36 ImmuCellAI cell types,
+but not for gene-level TPM matrices (20k rows). This module:
+
+- condensed_distances: pairwise distances as a condensed vector (n(n-1)/2 values), filled
+  block by block ('euclidean', 'sqeuclidean', 'correlation', 'cosine'), without pdist's
+  dense temporaries. Each block is computed in float64 (the expansion |a|^2 + |b|^2 - 2ab
+  cancels badly for near-duplicate rows in float32) and stored as `dtype`: float32 by
+  default (half of pdist's memory, for distances that are only kept or drawn), float64 for
+  the linkage; distances are clipped at 0, and near-duplicate rows (squared distance below
+  CANCELLATION x the squared norms) are recomputed from their differences
+- linkage_matrix: hierarchical clustering of the rows, on float64 data. Up to PDIST_ROWS
+  rows the distances come from scipy's pdist, so the linkage is exactly seaborn's (no
+  reordered leaves at near-ties); larger matrices use condensed_distances(dtype=float64).
+  scipy and fastcluster only cluster float64 distances, so the distance vector takes
+  8 bytes per pair (20k rows: 1.6 GB, the same as pdist): fastcluster clusters it in place,
+  scipy's linkage works on its own copy (peak 16 bytes per pair). fastcluster is used if
+  installed (for 'ward' / 'centroid' / 'median' with Euclidean distances directly on the
+  data, without any distance matrix). These three methods need Euclidean distances and
+  raise ValueError with any other metric. Optional optimal leaf ordering (scipy; O(n^3),
+  meant for small matrices). Linkages are cached on disk (folder 'cluster_cache', key:
+  SHA-256 of the data + metric + method + ordering), so re-rendering a figure reuses the
+  dendrogram.
+- clustermap: sns.clustermap with the cached linkages passed in (seaborn then skips its
+  own clustering) and a raster mode that replaces the pcolormesh heatmap with a single
+  imshow image (same colormap and normalization); 'auto' switches to it above
+  RASTER_CELLS cells.
+- add_cluster_arguments / cluster_options: the shared command-line options of the
+  clustermap scripts:
+  - --cluster-rows: cluster the rows (--method, --metric, --optimal-ordering); the dendrogram
+    is cached in 'cluster_cache' and reused when the figure is re-rendered
+  - --raster auto|on|off: heatmap as one imshow image instead of pcolormesh cells (auto: large
+    matrices, e.g. gene-level TPM)
+
+Dependencies:
+- argparse (the parser is created by the calling script)
+- hashlib
+- os
+- numpy
+- scipy.cluster.hierarchy
+- seaborn
+- fastcluster (optional, faster linkage)
+"""
+
+import hashlib
+import os
+from importlib.util import find_spec
+
+import numpy as np
+import scipy.cluster.hierarchy as hierarchy
+import seaborn as sns
+from scipy.spatial.distance import pdist
+
+HAS_FASTCLUSTER = find_spec('fastcluster') is not None
+if HAS_FASTCLUSTER:
+    import fastcluster
+
+CACHE_DIR = 'cluster_cache'
+METRICS = ['euclidean', 'sqeuclidean', 'correlation', 'cosine']
+VECTOR_METHODS = ['ward', 'centroid', 'median']  # Euclidean only (fastcluster.linkage_vector)
+PDIST_ROWS = 4000  # Up to this many rows the linkage uses scipy's pdist (seaborn's distances)
+RASTER_CELLS = 100_000  # 'auto' raster mode above this many heatmap cells
+BLOCK_ROWS = 256  # Rows per float64 block (block_rows x n values)
+CANCELLATION = 1e-4  # Squared distances below this fraction of |a|^2 + |b|^2 are recomputed directly
+LINKAGE_VERSION = 3  # Part of the linkage cache key – bump when the distance/linkage code changes
+
+
+# Condensed pairwise distances of the rows of `data` (computed in float64, stored as `dtype`,
+# same order as scipy's pdist)
+def condensed_distances(data, metric='euclidean', block_rows=BLOCK_ROWS, dtype=np.float32):
+    if metric not in METRICS:
+        raise ValueError(f"Unknown metric: {metric!r} (expected one of {METRICS})")
+    x = np.asarray(data, dtype=np.float64)
+    if metric in ('correlation', 'cosine'):
+        if metric == 'correlation':
+            x = x - x.mean(axis=1, keepdims=True)
+        norms = np.linalg.norm(x, axis=1, keepdims=True)
+        x = x / np.where(norms > 0, norms, 1)
+    else:
+        x = x - x.mean(axis=0)  # Distances are unchanged; smaller norms, less cancellation
+    squared_norms = np.einsum('ij,ij->i', x, x)
+
+    n = len(x)
+    condensed = np.empty(n * (n - 1) // 2, dtype=dtype)
+    offset = 0
+    for start in range(0, n - 1, block_rows):
+        stop = min(start + block_rows, n - 1)
+        block = x[start:stop] @ x[start + 1:].T  # rows start..stop-1 against all later rows
+        for i in range(start, stop):
+            dots = block[i - start, i - start:]
+            if metric in ('correlation', 'cosine'):
+                row = np.maximum(1 - dots, 0)
+            else:
+                scale = squared_norms[i] + squared_norms[i + 1:]
+                row = np.maximum(scale - 2 * dots, 0)
+                close = row < CANCELLATION * scale  # Near-duplicate rows: sum of squared differences
+                if close.any():
+                    row[close] = np.square(x[i + 1:][close] - x[i]).sum(axis=1)
+                if metric == 'euclidean':
+                    row = np.sqrt(row)
+            condensed[offset:offset + len(row)] = row
+            offset += len(row)
+    return condensed
+
+
+# float64 condensed distances for the linkage: scipy's pdist (seaborn's) for small matrices
+def _linkage_distances(data, metric):
+    if len(data) <= PDIST_ROWS:
+        if metric not in METRICS:
+            raise ValueError(f"Unknown metric: {metric!r} (expected one of {METRICS})")
+        return pdist(data, metric)
+    return condensed_distances(data, metric, dtype=np.float64)
+
+
+# Linkage of the rows of `data` (scipy format), from the cache if available
+def linkage_matrix(data, method='average', metric='euclidean', optimal_ordering=False, cache_dir=CACHE_DIR):
+    if method in VECTOR_METHODS and metric != 'euclidean':
+        raise ValueError(f"Method {method!r} requires the euclidean metric, got {metric!r}")
+    data = np.ascontiguousarray(data, dtype=np.float64)
+    path = None
+    if cache_dir is not None:
+        digest = hashlib.sha256(f'{LINKAGE_VERSION}|{data.shape}|{method}|{metric}|{optimal_ordering}'.encode('UTF-8'))
+        digest.update(data.tobytes())
+        path = os.path.join(cache_dir, f'{digest.hexdigest()}.npy')
+        if os.path.exists(path):
+            return np.load(path)
+
+    condensed = None
+    if HAS_FASTCLUSTER and method in VECTOR_METHODS:
+        linkage = fastcluster.linkage_vector(data, method=method)
+    else:
+        condensed = _linkage_distances(data, metric)
+        if HAS_FASTCLUSTER:
+            # In place unless the distances are still needed for the leaf ordering
+            linkage = fastcluster.linkage(condensed, method=method, preserve_input=optimal_ordering)
+        else:
+            linkage = hierarchy.linkage(condensed, method=method)
+    if optimal_ordering:
+        if condensed is None:
+            condensed = _linkage_distances(data, metric)
+        linkage = hierarchy.optimal_leaf_ordering(linkage, condensed)
+
+    if path is not None:
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_path = f'{path}.{os.getpid()}.tmp.npy'
+        np.save(tmp_path, linkage)
+        os.replace(tmp_path, path)
+    return linkage
+
+
+# Replace the pcolormesh heatmap of a ClusterGrid by one imshow image (same colours)
+def rasterize_heatmap(g):
+    ax = g.ax_heatmap
+    mesh = ax.collections[0]
+    ax.imshow(np.ma.masked_invalid(g.data2d.to_numpy(dtype=float)), cmap=mesh.get_cmap(), norm=mesh.norm,
+              aspect='auto', interpolation='nearest', extent=(0, g.data2d.shape[1], g.data2d.shape[0], 0))
+    mesh.remove()
+    return g
+
+
+# sns.clustermap with the backend's (cached) linkages and an optional raster heatmap;
+# raster: True, False or 'auto' (more than RASTER_CELLS cells)
+def clustermap(data, row_cluster=False, col_cluster=False, method='average', metric='euclidean',
+               optimal_ordering=False, raster='auto', cache_dir=CACHE_DIR, **kwargs):
+    values = data.to_numpy(dtype=float)
+    if row_cluster:
+        kwargs['row_linkage'] = linkage_matrix(values, method, metric, optimal_ordering, cache_dir)
+    if col_cluster:
+        kwargs['col_linkage'] = linkage_matrix(values.T, method, metric, optimal_ordering, cache_dir)
+    g = sns.clustermap(data, row_cluster=row_cluster, col_cluster=col_cluster, **kwargs)
+    if raster is True or (raster == 'auto' and values.size > RASTER_CELLS):
+        rasterize_heatmap(g)
+    return g
+
+
+# Add the clustering backend options (--cluster-rows, --method, --metric, --optimal-ordering,
+# --raster) to an argparse parser; the defaults draw the unclustered (group-sorted) figure
+def add_cluster_arguments(parser):
+    group = parser.add_argument_group('clustering backend (cluster_backend.py)')
+    group.add_argument('--cluster-rows', action='store_true', help='cluster the rows (e.g. cell types)')
+    group.add_argument('--method', default='average', help='linkage method')
+    group.add_argument('--metric', default='euclidean', choices=METRICS, help='distance metric')
+    group.add_argument('--optimal-ordering', action='store_true', help='optimal leaf ordering of the dendrogram')
+    group.add_argument('--raster', choices=['auto', 'on', 'off'], default='auto',
+                       help='draw the heatmap as one image (auto: large matrices only)')
+    return parser
+
+
+# clustermap() keyword arguments from the parsed options of add_cluster_arguments
+def cluster_options(args):
+    return {
+        'row_cluster': args.cluster_rows,
+        'method': args.method,
+        'metric': args.metric,
+        'optimal_ordering': args.optimal_ordering,
+        'raster': {'auto': 'auto', 'on': True, 'off': False}[args.raster],
+    }
@@ -0,0 +1,90 @@
+"""
+On-Disk Cache of the Numeric Part of the Clustermaps (z-scores, linkage, leaf order)
+
+Re-styling a clustermap (colours, fonts, colorbar positions) does not change the numbers
+behind it. The clustermap scripts (Clustermap_lipids_PT_no311.py, the significance
+clustermap of the poster) therefore store their numeric results here: the z-scored
+matrix, the row linkage and leaf order, and (significance clustermap) the statistical
+results table. A styling-only re-run reads them back without parsing the workbook.
+
+Cache key (SHA-256): SHA-256 of the input workbook file + the parameters that change the
+numbers (metric, linkage method, excluded mice, test settings) + the code version of the
+script's compute function + CACHE_VERSION. Editing the workbook or changing a parameter
+therefore recomputes; anything else is a cache hit. The cache cannot see code changes:
+each script keeps a NUMERIC_VERSION next to its compute function and increases it whenever
+that function (or a helper it calls) changes the numbers.
+
+A missing, truncated or unreadable cache file is recomputed and overwritten.
+
+One pickle file per key (folder 'clustermap_cache'), written to a temporary name and
+moved into place, holding the entry dict and the time it took to compute. Hits, misses
+and the time saved (compute time minus load time) are counted and reported.
+
+Dependencies:
+- hashlib
+- json
+- os
+- pickle
+- time
+- excel_cache (file_hash)
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import time
+
+from excel_cache import file_hash
+
+CACHE_DIR = 'clustermap_cache'
+CACHE_VERSION = 1  # Increase when the cached entries change layout (the scripts' code versions cover the numbers)
+
+
+class ClustermapCache:
+    def __init__(self, cache_dir=CACHE_DIR):
+        self.cache_dir = cache_dir
+        self.counters = {'hits': 0, 'misses': 0, 'saved': 0.0}
+        os.makedirs(cache_dir, exist_ok=True)
+
+    # Hash of the input file, the parameters of the numeric work and the code version of the compute function
+    @staticmethod
+    def key(input_path, params, code_version):
+        digest = hashlib.sha256()
+        digest.update(json.dumps({'params': params, 'code_version': code_version, 'version': CACHE_VERSION},
+                                 sort_keys=True, default=str).encode('UTF-8'))
+        digest.update(file_hash(input_path).encode('UTF-8'))
+        return digest.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f'{key}.pkl')
+
+    # Cached entry for `key`, or compute() (returns a dict) and store it
+    def get_or_compute(self, key, compute):
+        start = time.perf_counter()
+        try:
+            with open(self._path(key), 'rb') as file:
+                stored = pickle.load(file)
+        except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError, KeyError):
+            stored = None  # Missing, truncated or corrupt cache file: compute again
+        if stored is not None:
+            self.counters['hits'] += 1
+            self.counters['saved'] += stored['compute_time'] - (time.perf_counter() - start)
+            return stored['entry']
+
+        self.counters['misses'] += 1
+        entry = compute()
+        path = self._path(key)
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'wb') as file:
+            pickle.dump({'entry': entry, 'compute_time': time.perf_counter() - start}, file,
+                        protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+        return entry
+
+    # One-line summary: hits / misses and time saved
+    def report(self):
+        if self.counters['hits']:
+            return (f"Clustermap cache: {self.counters['hits']} hit(s), numeric work skipped, "
+                    f"{self.counters['saved']:.2f} s saved ('{self.cache_dir}')")
+        return f"Clustermap cache: {self.counters['misses']} miss(es), numeric results stored in '{self.cache_dir}'"
@@ -0,0 +1,403 @@
+"""
+Batch Clustermap Rendering from Declarative Specs
+
+The clustermap scripts (Clustermap - 2 colourbars.py, Clustermap_lipids_PT_no311.py and the
+two immune cell clustermaps of the poster) differ mainly in the input workbook and in the
+colour bar / legend layout. This module draws all of them from one spec file
+(clustermap_specs.json) and renders the figures in parallel worker processes (Agg
+backend), so the whole figure set is regenerated with one command:
+
+    python clustermap_render.py clustermap_specs.json --workers 8 --outdir clustermaps
+
+Spec file: {"defaults": {...}, "figures": [{...}, ...]}; every figure is the defaults
+updated with its own keys (DEFAULTS below lists all keys). The main ones:
+- name, input, sheet: output file stem and workbook
+- mice: 'rows' (one row per mouse, e.g. ImmuCellAI output; 'index' is the mouse number
+  column, 'group' the group column) or 'columns' (one column per mouse named
+  Group_Mouse, e.g. 'Lipids mol%.xlsx'; 'index' is the feature label column)
+- groups, exclude_mice, features: group order (control first), mice left out, features
+  drawn (None: all numeric columns that are not colour bars)
+- zscore, zscore_dtype: z-score every feature across the mice (zscore_stream.py; 'float32',
+  or 'float64' for annotated figures whose printed values should match df.apply(zscore))
+- row_cluster, col_cluster, method, metric, optimal_ordering, raster ('auto', true, false):
+  cluster_backend.py
+- color_bars: colour bars above the heatmap, e.g. {"column": "Group", "palette": {...}}
+  (categorical) or {"column": "Infiltration_score", "colors": [...], "colorbar": [x, y, w, h]}
+  (continuous, with its own colorbar)
+- highlight: outline features whose control vs treated p-value (lipid_stats.compare_groups_levene,
+  normality / equal variance level NORMALITY_ALPHA) is below 'alpha' (red) or 'trend' (gray)
+- value_colorbar, title, title_position, group_legend, group_separator, group_labels,
+  annotate, fontsize, subplots_adjust: layout
+- remove_unused_axes: delete every axes of the clustermap except the heatmap and the row
+  dendrogram (column dendrogram space, colour bar axes) before the colorbars are added, as
+  Clustermap_lipids_PT_no311.py does
+- xtick_offset: position of the mouse labels within their column (0.5: centre, 0: left edge
+  like Clustermap_lipids_PT_no311.py)
+
+Data reuse: every workbook sheet is loaded once per run (excel_cache.py, which also keeps it
+between runs), and the z-scored matrix, colour bar data and p-values are prepared once per
+distinct data setup (input, sheet, layout, excluded mice, features, groups, colour bar
+columns) and shared by all specs that use it, whatever their colours and layout. Row / column linkages go through the on-disk dendrogram cache of
+cluster_backend.py, shared by the workers.
+
+Dependencies:
+- argparse
+- copy
+- json
+- os
+- time
+- concurrent.futures
+- numpy
+- pandas
+- matplotlib
+- seaborn (through cluster_backend)
+- cluster_backend, excel_cache, lipid_stats, zscore_stream (helper modules in this folder)
+"""
+
+import argparse
+import copy
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+from matplotlib.cm import ScalarMappable
+from matplotlib.collections import PatchCollection
+from matplotlib.colors import LinearSegmentedColormap, Normalize
+from matplotlib.patches import Patch, Rectangle
+
+from cluster_backend import clustermap
+from excel_cache import read_excel_cached
+from lipid_stats import NORMALITY_ALPHA, compare_groups_levene
+from zscore_stream import zscore_frame
+
+# Every spec key with its default value (the spec file's "defaults" and each figure update these)
+DEFAULTS = {
+    'name': None,
+    'input': None,
+    'sheet': 0,
+    'mice': 'rows',
+    'index': 'Mouse number',
+    'group': 'Group',
+    'groups': ['Control', 'Treated'],
+    'exclude_mice': [],
+    'features': None,
+    'zscore': True,
+    'zscore_dtype': 'float32',
+    'replace_underscores': True,
+    'row_cluster': False,
+    'col_cluster': False,
+    'method': 'average',
+    'metric': 'euclidean',
+    'optimal_ordering': False,
+    'raster': 'auto',
+    'cmap': 'vlag',
+    'center': 0,
+    'figsize': [20, 16],
+    'dendrogram_ratio': None,
+    'linewidths': 0,
+    'linecolor': 'white',
+    'annotate': False,
+    'font': 'Calibri',
+    'dpi': 300,
+    'color_bars': [],
+    'value_colorbar': [1.0, 0.2, 0.015, 0.4],
+    'value_label': 'Z-score',
+    'title': None,
+    'title_position': [0.6, 0.8],  # Figure title (suptitle) position; None: title above the heatmap
+    'xlabel': 'Mouse number',
+    'ylabel': None,
+    'group_legend': True,
+    'group_separator': False,
+    'group_labels': False,
+    'highlight': None,
+    'remove_unused_axes': False,
+    'xtick_offset': 0.5,
+    'subplots_adjust': {'left': 0.15, 'right': 0.9, 'top': 0.9, 'bottom': 0.15},
+    'fontsize': {
+        'title': 16, 'axis_label': 14, 'ticks': 14, 'legend': 12, 'legend_title': 14,
+        'colorbar_label': 14, 'colorbar_ticks': 12, 'color_bar_labels': None, 'group_labels': 12
+    }
+}
+DATA_KEYS = ['input', 'sheet', 'mice', 'index', 'group', 'groups', 'exclude_mice', 'features',
+             'zscore', 'zscore_dtype', 'replace_underscores']
+
+
+# Figure specs of a spec file: defaults updated with every figure's own keys
+def load_specs(path):
+    with open(path, encoding='UTF-8') as file:
+        spec_file = json.load(file)
+    defaults = copy.deepcopy(DEFAULTS)
+    defaults.update(spec_file.get('defaults', {}))
+    specs = []
+    for figure in spec_file['figures']:
+        spec = copy.deepcopy(defaults)
+        fontsize = {**spec['fontsize'], **figure.get('fontsize', {})}
+        spec.update(figure)
+        spec['fontsize'] = fontsize
+        unknown = set(spec) - set(DEFAULTS)
+        if unknown:
+            raise ValueError(f"{spec['name']}: unknown spec keys {sorted(unknown)}")
+        if spec['name'] is None or spec['input'] is None:
+            raise ValueError(f"Every figure needs a 'name' and an 'input': {figure}")
+        specs.append(spec)
+    return specs
+
+
+# Key of the data a spec draws (not its colours or layout): specs with the same key share one prepared matrix
+def data_key(spec):
+    setup = {key: spec[key] for key in DATA_KEYS}
+    setup['color_bars'] = [bar['column'] for bar in spec['color_bars']]
+    return json.dumps(setup, sort_keys=True, default=str)
+
+
+# Features x mice values, per-mouse annotations (group + colour bar columns) and group order
+def _features_by_mice(df, spec):
+    group, groups = spec['group'], spec['groups']
+    excluded = {str(mouse) for mouse in spec['exclude_mice']}
+    if spec['mice'] == 'rows':
+        df = df[~df[spec['index']].astype(str).isin(excluded)].set_index(spec['index'])
+        df = df.sort_values(group)
+        bar_columns = [bar['column'] for bar in spec['color_bars'] if bar['column'] != group]
+        features = spec['features'] or df.select_dtypes('number').columns.difference(bar_columns)
+        values = df[features].T
+        annotations = df[[group] + bar_columns].copy()
+    elif spec['mice'] == 'columns':
+        df = df.set_index(spec['index'])
+        labels = pd.DataFrame([str(column).split('_', 1) for column in df.columns], columns=[group, 'Mouse'])
+        keep = [labels.index[(labels[group] == name) & ~labels['Mouse'].isin(excluded)] for name in groups]
+        order = np.concatenate(keep)  # Mice of the first group, then the second (column order within)
+        values = df.iloc[:, order]
+        values.columns = labels['Mouse'].to_numpy()[order]
+        if spec['features']:
+            values = values.loc[spec['features']]
+        annotations = pd.DataFrame({group: labels[group].to_numpy()[order]}, index=values.columns)
+    else:
+        raise ValueError(f"{spec['name']}: 'mice' must be 'rows' or 'columns', got {spec['mice']!r}")
+    return values, annotations
+
+
+# Heatmap matrix (z-scored features x mice), annotations and (with_p_values) the highlight p-values
+def prepare_data(spec, frames, with_p_values=False):
+    sheet_key = (spec['input'], spec['sheet'])
+    if sheet_key not in frames:
+        frames[sheet_key] = read_excel_cached(spec['input'], sheet_name=spec['sheet'])
+    values, annotations = _features_by_mice(frames[sheet_key], spec)
+
+    p_values = None
+    if with_p_values:
+        group = annotations[spec['group']].astype(str).to_numpy()
+        raw = values.to_numpy(dtype=float)
+        tests = compare_groups_levene(raw[:, group == spec['groups'][0]].T, raw[:, group == spec['groups'][1]].T,
+                                      normality_alpha=NORMALITY_ALPHA)
+        p_values = pd.Series(tests.p_value, index=values.index)
+
+    dtype = np.dtype(spec['zscore_dtype'])
+    matrix = zscore_frame(values, axis=1, dtype=dtype) if spec['zscore'] else values.astype(dtype)
+    if spec['replace_underscores']:
+        matrix.index = matrix.index.astype(str).str.replace('_', ' ')
+        if p_values is not None:
+            p_values.index = matrix.index
+    return {'matrix': matrix, 'annotations': annotations, 'p_values': p_values}
+
+
+# Colour of every mouse per colour bar, plus (label, norm, cmap, position) of the continuous ones
+def _color_bars(spec, annotations):
+    col_colors, colorbars = {}, []
+    for bar in spec['color_bars']:
+        column = bar['column']
+        label = bar.get('label', column)
+        if 'palette' in bar:
+            col_colors[label] = annotations[column].astype(str).map(bar['palette']).astype(object)
+        else:
+            cmap = LinearSegmentedColormap.from_list(label, bar['colors']) if 'colors' in bar \
+                else plt.get_cmap(bar.get('cmap', 'Purples'))
+            values = annotations[column].astype(float)
+            norm = Normalize(vmin=values.min(), vmax=values.max())
+            col_colors[label] = values.map(lambda x: cmap(norm(x)))
+            if bar.get('colorbar'):
+                colorbars.append((label, norm, cmap, bar['colorbar'], bar.get('labelpad', -60)))
+    return (pd.DataFrame(col_colors, index=annotations.index) if col_colors else None), colorbars
+
+
+# Outline the highlighted heatmap rows (red: p < alpha, gray: p < trend), placed through the leaf order
+def _highlight_rows(g, matrix, p_values, highlight):
+    alpha, trend = highlight.get('alpha', 0.05), highlight.get('trend', 0.1)
+    leaf_order = g.dendrogram_row.reordered_ind if g.dendrogram_row is not None else np.arange(len(matrix))
+    row_position = np.empty(len(matrix), dtype=int)
+    row_position[leaf_order] = np.arange(len(matrix))
+
+    p = p_values.reindex(matrix.index).to_numpy()
+    highlighted = p < trend  # NaN p-values are never highlighted
+    rows = row_position[highlighted]
+    red = p[highlighted] < alpha
+    order = np.argsort(rows, kind='stable')  # Top to bottom
+    rows, red = rows[order], red[order]
+    boxes = PatchCollection(
+        [Rectangle((0, y), matrix.shape[1], 1) for y in rows],
+        facecolor='none',
+        edgecolor=np.where(red, 'red', 'gray'),
+        linewidth=np.where(red, 2, 1)
+    )
+    g.ax_heatmap.add_collection(boxes)
+
+
+# Draw one figure and save it as PNG (runs in a worker process)
+def render_spec(job):
+    spec, data, outdir = job
+    start = time.perf_counter()
+    plt.rcParams['font.family'] = spec['font']
+    fontsize = spec['fontsize']
+    matrix, annotations = data['matrix'], data['annotations']
+    col_colors, colorbars = _color_bars(spec, annotations)
+
+    options = {}
+    if spec['dendrogram_ratio'] is not None:
+        options['dendrogram_ratio'] = tuple(spec['dendrogram_ratio'])
+    if spec['annotate']:
+        options.update(annot=True, fmt=spec['annotate'] if isinstance(spec['annotate'], str) else '.2f')
+    g = clustermap(
+        matrix,
+        row_cluster=spec['row_cluster'],
+        col_cluster=spec['col_cluster'],
+        method=spec['method'],
+        metric=spec['metric'],
+        optimal_ordering=spec['optimal_ordering'],
+        raster=spec['raster'],
+        cmap=spec['cmap'],
+        center=spec['center'],
+        col_colors=col_colors,
+        linewidths=spec['linewidths'],
+        linecolor=spec['linecolor'],
+        xticklabels=True,
+        yticklabels=True,
+        figsize=tuple(spec['figsize']),
+        cbar_pos=None,
+        **options
+    )
+
+    # Remove unused axes (e.g. column dendrogram space); colorbars are added below
+    if spec['remove_unused_axes']:
+        for ax in list(g.fig.axes):
+            if ax not in [g.ax_heatmap, g.ax_row_dendrogram]:
+                g.fig.delaxes(ax)
+        col_colors = None  # Colour bar axes removed: no labels to style
+
+    # Colour bar labels
+    if col_colors is not None and fontsize['color_bar_labels']:
+        for tick in g.ax_col_colors.yaxis.get_ticklabels():
+            tick.set_fontsize(fontsize['color_bar_labels'])
+            tick.set_fontweight('bold')
+
+    # Colorbar of the heatmap values (right)
+    if spec['value_colorbar']:
+        norm = Normalize(vmin=matrix.min().min(), vmax=matrix.max().max())
+        cbar = g.fig.colorbar(ScalarMappable(cmap=spec['cmap'], norm=norm), cax=g.fig.add_axes(spec['value_colorbar']))
+        cbar.set_label(spec['value_label'], fontsize=fontsize['colorbar_label'], rotation=-90, labelpad=10)
+        if fontsize['colorbar_ticks']:
+            cbar.ax.tick_params(labelsize=fontsize['colorbar_ticks'])
+
+    # Title: figure title at title_position, or above the heatmap
+    if spec['title']:
+        if spec['title_position']:
+            x, y = spec['title_position']
+            g.fig.suptitle(spec['title'], fontsize=fontsize['title'], x=x, y=y)
+        else:
+            g.ax_heatmap.set_title(spec['title'], fontsize=fontsize['title'], fontweight='bold', pad=35)
+
+    # Group legend under the heatmap (colours of the categorical group bar)
+    palette = next((bar['palette'] for bar in spec['color_bars']
+                    if bar['column'] == spec['group'] and 'palette' in bar), None)
+    if spec['group_legend'] and palette:
+        g.ax_heatmap.legend(
+            handles=[Patch(facecolor=color, label=label) for label, color in palette.items()],
+            title=spec['group'],
+            title_fontsize=fontsize['legend_title'],
+            fontsize=fontsize['legend'],
+            loc='upper center',
+            bbox_to_anchor=(0.5, -0.08),
+            ncol=len(palette),
+            frameon=False
+        )
+
+    # Colorbars of the continuous colour bars (e.g. Infiltration Score, left)
+    for label, norm, cmap, position, labelpad in colorbars:
+        cbar = g.fig.colorbar(ScalarMappable(norm=norm, cmap=cmap), cax=g.fig.add_axes(position))
+        cbar.set_label(label, fontsize=fontsize['colorbar_label'], labelpad=labelpad, rotation=90)
+        if fontsize['colorbar_ticks']:
+            cbar.ax.tick_params(labelsize=fontsize['colorbar_ticks'])
+
+    # Group separator line and group names (mice are ordered by group)
+    group = annotations[spec['group']].astype(str).to_numpy()
+    if spec['group_separator'] or spec['group_labels']:
+        n_first = int((group == spec['groups'][0]).sum())
+        if spec['group_separator']:
+            g.ax_heatmap.axvline(x=n_first, color='white', linewidth=3)
+        if spec['group_labels']:
+            for name, center in ((spec['groups'][0], (n_first - 1) / 2),
+                                 (spec['groups'][1], n_first + (len(group) - n_first - 1) / 2)):
+                g.ax_heatmap.text(center, -0.7, name, ha='center', va='top', fontsize=fontsize['group_labels'],
+                                  transform=g.ax_heatmap.transData)
+
+    if spec['subplots_adjust']:
+        g.fig.subplots_adjust(**spec['subplots_adjust'])
+
+    # Axis labels and ticks
+    g.ax_heatmap.set_xlabel(spec['xlabel'] or '', fontsize=fontsize['axis_label'])
+    if spec['ylabel']:
+        g.ax_heatmap.set_ylabel(spec['ylabel'], rotation=270, labelpad=-0.5, fontsize=fontsize['axis_label'])
+    xticklabels = g.ax_heatmap.get_xticklabels()
+    if spec['xtick_offset'] != 0.5:
+        g.ax_heatmap.set_xticks(np.arange(matrix.shape[1]) + spec['xtick_offset'])
+    g.ax_heatmap.set_xticklabels(xticklabels, fontsize=fontsize['ticks'], rotation=45)
+    g.ax_heatmap.set_yticklabels(g.ax_heatmap.get_yticklabels(), fontsize=fontsize['ticks'])
+
+    if spec['highlight'] and data['p_values'] is not None:
+        _highlight_rows(g, matrix, data['p_values'], spec['highlight'])
+
+    path = os.path.join(outdir, f"{spec['name']}.png")
+    g.fig.savefig(path, dpi=spec['dpi'], bbox_inches='tight', pad_inches=0.1)
+    plt.close(g.fig)
+    return path, time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Render clustermaps from a spec file')
+    parser.add_argument('specs', nargs='?', default=os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                                 'clustermap_specs.json'),
+                        help='spec file (JSON)')
+    parser.add_argument('--outdir', default='clustermaps', help='output folder for the PNG files')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='parallel worker processes')
+    parser.add_argument('--only', nargs='*', help='render only the figures with these names')
+    parser.add_argument('--dpi', type=int, help='resolution of all figures (default: the spec dpi)')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    specs = load_specs(args.specs)
+    if args.only:
+        specs = [spec for spec in specs if spec['name'] in args.only]
+    for spec in specs:
+        spec['dpi'] = args.dpi or spec['dpi']
+    os.makedirs(args.outdir, exist_ok=True)
+
+    # Each sheet loaded once, each data setup prepared once (shared by the specs that use it)
+    frames, prepared = {}, {}
+    highlighted = {data_key(spec) for spec in specs if spec['highlight']}
+    for spec in specs:
+        key = data_key(spec)
+        if key not in prepared:
+            prepared[key] = prepare_data(spec, frames, with_p_values=key in highlighted)
+    prepare_time = time.perf_counter() - start
+
+    jobs = [(spec, prepared[data_key(spec)], args.outdir) for spec in specs]
+    if jobs:
+        with ProcessPoolExecutor(max_workers=min(args.workers, len(jobs))) as pool:
+            for spec, (path, seconds) in zip(specs, pool.map(render_spec, jobs)):
+                print(f"{spec['name']}: {seconds:.1f} s -> {path}")
+    print(f"{len(specs)} figures from {len(frames)} sheet(s) ({len(prepared)} data setups, prepared in "
+          f"{prepare_time:.1f} s), total {time.perf_counter() - start:.1f} s with {args.workers} workers")
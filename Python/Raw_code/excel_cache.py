@@ -0,0 +1,166 @@
+"""
+Cached Excel Loading Shared by the Analysis Scripts
+
+xlsx parsing is the slowest step of most scripts, and the poster set reads the same few
+workbooks again and again ('Tkanki klasyfikacja.xlsx', 'Infiltration vs Metastases_abscesses.xlsx',
+'UTF-8Lista przerzutów_CTC_13.05.2025.xlsx', 'ImmuCellAI_mouse_abundance_result_threshold_9.xlsx').
+read_excel_cached() parses a sheet once and stores it next to the workbook (folder
+'.excel_cache'): as Parquet if pyarrow is installed, otherwise as a pickle. Later calls read
+the stored copy.
+
+Invalidation: the workbook's modification time and size are compared with the cached ones;
+if they differ, the SHA-256 of the file decides. A workbook that was only touched keeps its
+cache, an edited one is parsed again (all of its sheets).
+
+Typed columns (applied on every load, cached or not):
+- 'Group'             categorical (e.g. Control / Treated, CTRL / PP)
+- 'Liver metastases'  ordered categorical M0 < M1 < M2 < M3
+- 'Liver abscesses'   ordered categorical A0 < A1 < A2 < A3
+Values outside the expected levels are kept (appended as extra levels), never set to NaN.
+
+Every load prints one line with the load time and the time saved against parsing the xlsx
+(measured when the cache entry was created).
+
+Dependencies:
+- hashlib
+- json
+- os
+- pickle
+- time
+- pandas
+- pyarrow (optional, Parquet storage)
+- python-calamine (optional, faster xlsx parsing)
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import time
+from importlib.util import find_spec
+
+import pandas as pd
+
+CACHE_DIR = '.excel_cache'
+CACHE_VERSION = 1  # Increase when the stored layout changes
+STORE_FORMAT = 'parquet' if find_spec('pyarrow') else 'pickle'
+EXCEL_ENGINE = 'calamine' if find_spec('python_calamine') else None
+
+# Column name -> levels (None: the values found, sorted); M / A scores are ordered
+CATEGORIES = {
+    'Group': None,
+    'Liver metastases': ['M0', 'M1', 'M2', 'M3'],
+    'Liver abscesses': ['A0', 'A1', 'A2', 'A3']
+}
+
+
+# SHA-256 of a file, read in 1 MB blocks
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(2**20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+# Categorical dtypes for the known columns (in place, returns df)
+def apply_types(df):
+    for column, levels in CATEGORIES.items():
+        if column not in df.columns:
+            continue
+        values = df[column].dropna().unique().tolist()
+        if levels is None:
+            df[column] = pd.Categorical(df[column], categories=sorted(values, key=str))
+        else:
+            extra = sorted((value for value in values if value not in levels), key=str)
+            df[column] = pd.Categorical(df[column], categories=levels + extra, ordered=True)
+    return df
+
+
+def _write_atomic(path, write):
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    write(tmp_path)
+    os.replace(tmp_path, path)
+
+
+# Metadata of a workbook's cache (None if missing or from another cache version)
+def _read_meta(meta_path):
+    try:
+        with open(meta_path, encoding='UTF-8') as file:
+            meta = json.load(file)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+    return meta if meta.get('version') == CACHE_VERSION else None
+
+
+def _write_meta(meta_path, meta):
+    def write(path):
+        with open(path, 'w', encoding='UTF-8') as file:
+            json.dump(meta, file, indent=1)
+    _write_atomic(meta_path, write)
+
+
+# Store / load one sheet (Parquet if possible, pickle otherwise); returns the format used
+def _store(df, path_stem):
+    if STORE_FORMAT == 'parquet':
+        try:
+            _write_atomic(f'{path_stem}.parquet', lambda path: df.to_parquet(path, index=True))
+            return 'parquet'
+        except (TypeError, ValueError, ImportError):  # e.g. mixed-type object columns
+            pass
+    _write_atomic(f'{path_stem}.pkl', df.to_pickle)
+    return 'pickle'
+
+
+def _load(path_stem, store_format):
+    if store_format == 'parquet':
+        return pd.read_parquet(f'{path_stem}.parquet')
+    return pd.read_pickle(f'{path_stem}.pkl')
+
+
+# pd.read_excel for one sheet, through the cache; `typed` applies the categorical dtypes
+def read_excel_cached(path, sheet_name=0, typed=True, verbose=True, **kwargs):
+    path = os.path.abspath(path)
+    cache_dir = os.path.join(os.path.dirname(path), CACHE_DIR)
+    os.makedirs(cache_dir, exist_ok=True)
+    workbook_id = hashlib.sha256(path.encode('UTF-8')).hexdigest()[:12]
+    meta_path = os.path.join(cache_dir, f'{workbook_id}.json')
+    sheet_key = json.dumps({'sheet': sheet_name, 'kwargs': kwargs}, sort_keys=True, default=str)
+    sheet_id = hashlib.sha256(sheet_key.encode('UTF-8')).hexdigest()[:12]
+    path_stem = os.path.join(cache_dir, f'{workbook_id}-{sheet_id}')
+
+    start = time.perf_counter()
+    stat = os.stat(path)
+    meta = _read_meta(meta_path)
+    if meta is not None and (meta['mtime_ns'], meta['size']) != (stat.st_mtime_ns, stat.st_size):
+        # Modification time or size changed: reuse the cache only if the content is the same
+        if file_hash(path) == meta['sha256']:
+            meta.update(mtime_ns=stat.st_mtime_ns, size=stat.st_size)
+            _write_meta(meta_path, meta)
+        else:
+            meta = None
+    if meta is None:
+        meta = {'version': CACHE_VERSION, 'workbook': path, 'mtime_ns': stat.st_mtime_ns,
+                'size': stat.st_size, 'sha256': file_hash(path), 'sheets': {}}
+
+    entry = meta['sheets'].get(sheet_id)
+    df = None
+    if entry is not None:
+        try:
+            df = _load(path_stem, entry['format'])
+        except (OSError, ValueError, EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+            df = None  # Missing, truncated or corrupt cache file: parse the xlsx again
+    if df is not None:
+        load_time = time.perf_counter() - start
+        message = (f"{os.path.basename(path)} [{sheet_name}]: cache {load_time:.2f} s "
+                   f"(xlsx {entry['parse_time']:.2f} s, saved {entry['parse_time'] - load_time:.2f} s)")
+    else:
+        parse_start = time.perf_counter()
+        df = pd.read_excel(path, sheet_name=sheet_name, engine=EXCEL_ENGINE, **kwargs)
+        parse_time = time.perf_counter() - parse_start
+        meta['sheets'][sheet_id] = {'sheet': sheet_key, 'format': _store(df, path_stem), 'parse_time': parse_time}
+        _write_meta(meta_path, meta)
+        message = f"{os.path.basename(path)} [{sheet_name}]: parsed xlsx in {parse_time:.2f} s and cached"
+    if verbose:
+        print(message)
+    return apply_types(df) if typed else df
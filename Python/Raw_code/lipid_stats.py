@@ -0,0 +1,219 @@
+"""
+Vectorized Two-Group Statistics for Lipid Sheets (CTRL vs PP)
+
+Batched replacement of the per-lipid test loop in Lipids_PT_no311.py. A sheet is pivoted
+once into two matrices (mice x lipid species, one per group) and every test is computed for
+all lipid columns in one scipy.stats call with axis=0.
+
+Test choice per lipid (same rule as the original loop):
+- one group has a single unique value -> Mann-Whitney U
+- both groups normal (Shapiro-Wilk p > normality_alpha) -> Welch t-test
+- otherwise -> Mann-Whitney U
+The normality level only picks the test; it is fixed at NORMALITY_ALPHA = 0.05 as in the
+original loop and is independent of the significance level used to select lipids (ALPHA).
+
+compare_groups_levene applies the rule of the immune cell significance clustermap instead
+(Student's t-test if both groups are normal and Levene's test finds equal variances,
+Mann-Whitney U otherwise) and also returns the Shapiro-Wilk and Levene p-values. It is not
+tied to CTRL / PP: its groups are just the first and second matrix (e.g. Control / Treated
+immune cell abundances), hence the field names p_norm_first / p_norm_second.
+
+The p-values and test choices are identical to the per-lipid loop:
+- Shapiro-Wilk, the Welch t-test and Mann-Whitney U are each called only on the columns
+  that use them;
+- scipy's mannwhitneyu(method='auto') decides between the exact and the asymptotic
+  p-value once per call (asymptotic if *any* column has ties), so columns with and
+  without ties are tested in separate calls with the method the single-column call
+  would have chosen;
+- lipids with missing values give NaN statistic / p-value (Mann-Whitney U), as before.
+
+Effect sizes (PP relative to CTRL, positive = higher in PP), computed for all columns at once:
+- Hedges' g (bias-corrected standardized mean difference) with a percentile bootstrap CI;
+  the bootstrap draws one resampling-index matrix per group (n_boot x group size) and
+  applies it to all lipids in one pass (lipid columns are processed in memory-bounded
+  chunks, never one lipid or one resample at a time)
+- rank-biserial correlation (from the Mann-Whitney U rank sums)
+
+Permutation p-values (permutation_test.py): exact when the groups are small enough to
+enumerate all relabellings, for all lipids at once; Welch t statistic for lipids tested with
+the t-test, U statistic for lipids tested with Mann-Whitney U.
+
+Dependencies:
+- numpy
+- pandas
+- scipy.stats
+"""
+
+import warnings
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+import scipy.stats as stats
+
+from permutation_test import N_PERMUTATIONS, permutation_test
+
+ALPHA = 0.05  # Significance level (selection of lipids)
+NORMALITY_ALPHA = 0.05  # Shapiro-Wilk / Levene level that picks the test
+GROUPS = ('CTRL', 'PP')
+ID_COLUMNS = ['Mouse number', 'Group']
+T_TEST = 't-test'
+MANN_WHITNEY = 'Mann-Whitney U'
+TEST_POLICY = 'constant->MWU; Shapiro both > normality_alpha->Welch t; else MWU'  # Part of the results cache key
+N_BOOTSTRAP = 2000
+CI_LEVEL = 0.95
+BOOTSTRAP_CHUNK_BYTES = 64 * 2**20
+
+LeveneTests = namedtuple('LeveneTests', ['statistic', 'p_value', 'test', 'p_norm_first', 'p_norm_second', 'p_var'])
+
+
+# Pivot a sheet (one row per mouse) into CTRL and PP matrices (mice x lipids)
+def group_matrices(df, lipids, groups=GROUPS):
+    values = df[lipids].to_numpy(dtype=float)
+    group = df['Group'].to_numpy()
+    return values[group == groups[0]], values[group == groups[1]]
+
+
+# Columns without tied values across both groups (the exact Mann-Whitney U p-value applies)
+def _untied_columns(ctrl, pp):
+    ordered = np.sort(np.concatenate([ctrl, pp]), axis=0)
+    return ~(np.diff(ordered, axis=0) == 0).any(axis=0)
+
+
+# Mann-Whitney U per column with the method the single-column call would choose
+def mannwhitneyu_columns(ctrl, pp):
+    statistic = np.empty(ctrl.shape[1])
+    p_value = np.empty(ctrl.shape[1])
+    if ctrl.shape[0] > 8 and pp.shape[0] > 8:
+        batches = [(np.ones(ctrl.shape[1], dtype=bool), 'asymptotic')]
+    else:
+        untied = _untied_columns(ctrl, pp)
+        batches = [(untied, 'exact'), (~untied, 'asymptotic')]
+    for columns, method in batches:
+        if columns.any():
+            result = stats.mannwhitneyu(ctrl[:, columns], pp[:, columns], alternative='two-sided',
+                                        axis=0, method=method)
+            statistic[columns], p_value[columns] = result.statistic, result.pvalue
+    return statistic, p_value
+
+
+# All tests for all lipid columns; returns statistic, p-value and test name per column
+def compare_groups(ctrl, pp, normality_alpha=NORMALITY_ALPHA):
+    n_lipids = ctrl.shape[1]
+    statistic = np.full(n_lipids, np.nan)
+    p_value = np.full(n_lipids, np.nan)
+    use_t_test = np.zeros(n_lipids, dtype=bool)
+
+    complete = ~(np.isnan(ctrl).any(axis=0) | np.isnan(pp).any(axis=0))  # NaN -> NaN result (as before)
+    constant = (ctrl.max(axis=0, initial=-np.inf) == ctrl.min(axis=0, initial=np.inf)) \
+        | (pp.max(axis=0, initial=-np.inf) == pp.min(axis=0, initial=np.inf))
+    normality = complete & ~constant
+    if normality.any():
+        p_norm_ctrl = stats.shapiro(ctrl[:, normality], axis=0).pvalue
+        p_norm_pp = stats.shapiro(pp[:, normality], axis=0).pvalue
+        use_t_test[normality] = (p_norm_ctrl > normality_alpha) & (p_norm_pp > normality_alpha)
+
+    if use_t_test.any():
+        result = stats.ttest_ind(ctrl[:, use_t_test], pp[:, use_t_test], equal_var=False, axis=0)
+        statistic[use_t_test], p_value[use_t_test] = result.statistic, result.pvalue
+
+    use_mwu = complete & ~use_t_test
+    if use_mwu.any():
+        statistic[use_mwu], p_value[use_mwu] = mannwhitneyu_columns(ctrl[:, use_mwu], pp[:, use_mwu])
+
+    test = np.where(use_t_test, T_TEST, MANN_WHITNEY).astype(object)
+    return statistic, p_value, test
+
+
+# Student's t-test where both groups (any two: first, second) are normal with equal variances (Levene),
+# else Mann-Whitney U
+def compare_groups_levene(first, second, normality_alpha=NORMALITY_ALPHA):
+    p_norm_first = stats.shapiro(first, axis=0).pvalue
+    p_norm_second = stats.shapiro(second, axis=0).pvalue
+    p_var = stats.levene(first, second, axis=0).pvalue
+
+    use_t_test = (p_norm_first > normality_alpha) & (p_norm_second > normality_alpha) & (p_var > normality_alpha)
+    statistic = np.full(first.shape[1], np.nan)
+    p_value = np.full(first.shape[1], np.nan)
+    if use_t_test.any():
+        result = stats.ttest_ind(first[:, use_t_test], second[:, use_t_test], axis=0)
+        statistic[use_t_test], p_value[use_t_test] = result.statistic, result.pvalue
+    if (~use_t_test).any():
+        statistic[~use_t_test], p_value[~use_t_test] = mannwhitneyu_columns(first[:, ~use_t_test],
+                                                                            second[:, ~use_t_test])
+
+    test = np.where(use_t_test, T_TEST, MANN_WHITNEY).astype(object)
+    return LeveneTests(statistic, p_value, test, p_norm_first, p_norm_second, p_var)
+
+
+# Hedges' g of PP vs CTRL along axis -2 (mice); works on (..., mice, lipids) arrays
+def hedges_g(ctrl, pp):
+    n1, n2 = ctrl.shape[-2], pp.shape[-2]
+    pooled_var = ((n1 - 1) * ctrl.var(axis=-2, ddof=1) + (n2 - 1) * pp.var(axis=-2, ddof=1)) / (n1 + n2 - 2)
+    correction = 1 - 3 / (4 * (n1 + n2) - 9)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return (pp.mean(axis=-2) - ctrl.mean(axis=-2)) / np.sqrt(pooled_var) * correction
+
+
+# Rank-biserial correlation of PP vs CTRL per column (1 = every PP value above every CTRL value)
+def rank_biserial(ctrl, pp):
+    n1, n2 = ctrl.shape[0], pp.shape[0]
+    ranks = stats.rankdata(np.concatenate([ctrl, pp]), axis=0)
+    u_ctrl = ranks[:n1].sum(axis=0) - n1 * (n1 + 1) / 2
+    return 1 - 2 * u_ctrl / (n1 * n2)
+
+
+# Percentile bootstrap CI of Hedges' g for all columns from one resampling-index matrix per group
+def bootstrap_hedges_g_ci(ctrl, pp, n_boot=N_BOOTSTRAP, level=CI_LEVEL, seed=0):
+    rng = np.random.default_rng(seed)
+    index_ctrl = rng.integers(0, ctrl.shape[0], (n_boot, ctrl.shape[0]))
+    index_pp = rng.integers(0, pp.shape[0], (n_boot, pp.shape[0]))
+
+    n_lipids = ctrl.shape[1]
+    chunk = max(1, BOOTSTRAP_CHUNK_BYTES // (8 * n_boot * (ctrl.shape[0] + pp.shape[0])))
+    low, high = np.empty(n_lipids), np.empty(n_lipids)
+    quantiles = [(1 - level) / 2, (1 + level) / 2]
+    for start in range(0, n_lipids, chunk):
+        columns = slice(start, start + chunk)
+        g = hedges_g(ctrl[:, columns][index_ctrl], pp[:, columns][index_pp])  # (n_boot, chunk)
+        g[~np.isfinite(g)] = np.nan  # Resamples with zero variance
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)  # All-NaN columns (missing values) -> NaN CI
+            low[columns], high[columns] = np.nanquantile(g, quantiles, axis=0)
+    missing = np.isnan(ctrl).any(axis=0) | np.isnan(pp).any(axis=0)
+    low[missing], high[missing] = np.nan, np.nan
+    return low, high
+
+
+# Permutation p-value per lipid, with the statistic of the test chosen for it
+def permutation_p_values(ctrl, pp, test, n_permutations=N_PERMUTATIONS, seed=0):
+    p_value = np.full(ctrl.shape[1], np.nan)
+    for test_name, statistic in ((T_TEST, 'welch_t'), (MANN_WHITNEY, 'mann_whitney_u')):
+        columns = test == test_name
+        if columns.any():
+            p_value[columns] = permutation_test(ctrl[:, columns], pp[:, columns], statistic,
+                                                n_permutations, seed=seed).pvalue
+    return p_value
+
+
+# Results table of one sheet: tests and effect sizes per lipid
+def sheet_results(df, sheet, normality_alpha=NORMALITY_ALPHA, n_boot=N_BOOTSTRAP, n_permutations=N_PERMUTATIONS,
+                  seed=0):
+    lipids = [column for column in df.columns if column not in ID_COLUMNS]
+    ctrl, pp = group_matrices(df, lipids)
+    statistic, p_value, test = compare_groups(ctrl, pp, normality_alpha)
+    ci_low, ci_high = bootstrap_hedges_g_ci(ctrl, pp, n_boot, seed=seed)
+    results = pd.DataFrame({
+        'Sheet': sheet,
+        'Lipid': lipids,
+        'Statistic': statistic,
+        'p-value': p_value,
+        'Test': test,
+        "Hedges' g": hedges_g(ctrl, pp),
+        "Hedges' g CI low": ci_low,
+        "Hedges' g CI high": ci_high,
+        'Rank-biserial r': rank_biserial(ctrl, pp)
+    })
+    if n_permutations:
+        results['p-value (permutation)'] = permutation_p_values(ctrl, pp, test, n_permutations, seed)
+    return results
@@ -0,0 +1,56 @@
+"""
+Multiple-Testing Correction of p-values (vectorized)
+
+Adjusted p-values for a whole results table in one sorted pass (no per-test loop):
+- 'fdr_bh'  Benjamini-Hochberg false discovery rate
+- 'fdr_by'  Benjamini-Yekutieli false discovery rate (valid under any dependence)
+- 'holm'    Holm step-down family-wise error rate
+
+NaN p-values (e.g. lipids with missing values) are left as NaN and are not counted as tests.
+The results match scipy.stats.false_discovery_control (BH, BY) and
+statsmodels.stats.multitest.multipletests (all three methods).
+
+Dependencies:
+- numpy
+"""
+
+import numpy as np
+
+METHODS = ['fdr_bh', 'fdr_by', 'holm']
+COLUMN_NAMES = {'fdr_bh': 'p-value (BH)', 'fdr_by': 'p-value (BY)', 'holm': 'p-value (Holm)'}
+
+
+# Adjusted p-values (same shape as `p_values`)
+def adjust_pvalues(p_values, method='fdr_bh'):
+    if method not in METHODS:
+        raise ValueError(f"Unknown correction method: {method!r} (expected one of {METHODS})")
+    p_values = np.asarray(p_values, dtype=float)
+    adjusted = np.full(p_values.shape, np.nan)
+    valid = ~np.isnan(p_values)
+    n_tests = int(valid.sum())
+    if n_tests == 0:
+        return adjusted
+
+    order = np.argsort(p_values[valid], kind='stable')
+    sorted_p = p_values[valid][order]
+    rank = np.arange(1, n_tests + 1)
+
+    if method == 'holm':
+        sorted_adjusted = np.maximum.accumulate(sorted_p * (n_tests - rank + 1))
+    else:
+        scale = n_tests / rank
+        if method == 'fdr_by':
+            scale = scale * np.sum(1.0 / rank)
+        sorted_adjusted = np.minimum.accumulate((sorted_p * scale)[::-1])[::-1]
+
+    valid_adjusted = np.empty(n_tests)
+    valid_adjusted[order] = np.minimum(sorted_adjusted, 1.0)
+    adjusted[valid] = valid_adjusted
+    return adjusted
+
+
+# Add one adjusted p-value column per method to a results table (in place)
+def add_adjusted_columns(results, p_column='p-value', methods=METHODS):
+    for method in methods:
+        results[COLUMN_NAMES[method]] = adjust_pvalues(results[p_column].to_numpy(), method)
+    return results
@@ -0,0 +1,151 @@
+"""
+Two-Group Permutation Tests for Many Features at Once (CTRL vs PP / Control vs Treated)
+
+Exact or Monte Carlo permutation p-values for every feature (lipid species, immune cell
+type, ...) of a two-group comparison in one vectorized pass:
+
+1. The group labels are permuted once for all features: every permutation is a row of a
+   membership matrix M (n_permutations x n_samples, 1 = sample in the first group).
+   - If the number of distinct relabellings C(n, n1) is at most `n_permutations`, all of
+     them are enumerated (exact p-value; the observed labelling is one of them).
+   - Otherwise `n_permutations` relabellings are sampled with a seedable numpy Generator
+     and p = (1 + exceedances) / (1 + n_permutations).
+2. The statistics of all permutations and all features come from matrix products with the
+   data, e.g. the group-1 sum M @ X; Mann-Whitney U uses M @ ranks (ranks are computed
+   once per feature, they do not change under relabelling).
+3. Permutations are processed in fixed-size batches, so memory stays bounded; with
+   n_jobs > 1 the batches are spread over a process pool. Every batch has its own seed
+   derived from `seed`, so the result does not depend on n_jobs.
+
+Statistics (group x vs group y):
+- 'mean_difference'   mean(x) - mean(y) (two-sided: equivalent to Student's t-test)
+- 'welch_t'           Welch's t statistic
+- 'mann_whitney_u'    U statistic of x (as scipy.stats.mannwhitneyu)
+
+Two-sided p-values count relabellings whose statistic is at least as far from the null
+centre as the observed one (|mean difference|, |t|, |U - n1*n2/2|). For Mann-Whitney U the
+exact p-value equals scipy.stats.mannwhitneyu(method='exact') when there are no ties.
+Features with missing values get a NaN p-value.
+
+Dependencies:
+- numpy
+- scipy.stats
+"""
+
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from itertools import combinations, islice
+from math import comb
+
+import numpy as np
+import scipy.stats as stats
+
+STATISTICS = ['mean_difference', 'welch_t', 'mann_whitney_u']
+ALTERNATIVES = ['two-sided', 'greater', 'less']
+N_PERMUTATIONS = 10000
+BATCH_SIZE = 2000
+
+PermutationResult = namedtuple('PermutationResult', ['statistic', 'pvalue', 'n_permutations', 'exact'])
+
+
+# Statistic per permutation row (membership matrix, n_batch x n) and feature (data: n x features)
+def _statistic(membership, data, squares, n1, statistic):
+    n2 = data.shape[0] - n1
+    sum_x = membership @ data
+    if statistic == 'mann_whitney_u':  # `data` holds the ranks
+        return sum_x - n1 * (n1 + 1) / 2
+    sum_y = data.sum(axis=0) - sum_x
+    mean_x, mean_y = sum_x / n1, sum_y / n2
+    if statistic == 'mean_difference':
+        return mean_x - mean_y
+    squares_x = membership @ squares
+    var_x = (squares_x - n1 * mean_x ** 2) / (n1 - 1)
+    var_y = (squares.sum(axis=0) - squares_x - n2 * mean_y ** 2) / (n2 - 1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return (mean_x - mean_y) / np.sqrt(var_x / n1 + var_y / n2)
+
+
+# Distance of the statistic from its null centre, oriented by the alternative
+def _oriented(values, n1, n2, statistic, alternative):
+    if statistic == 'mann_whitney_u':
+        values = values - n1 * n2 / 2
+    if alternative == 'two-sided':
+        return np.abs(values)
+    return values if alternative == 'greater' else -values
+
+
+# Membership matrix (n_batch x n) of the permutations in one batch
+def _membership(n, n1, batch, exact):
+    if exact:
+        start, stop = batch
+        rows = np.array(list(islice(combinations(range(n), n1), start, stop)), dtype=np.intp).reshape(-1, n1)
+    else:
+        size, seed = batch
+        rng = np.random.default_rng(seed)
+        rows = np.argsort(rng.random((size, n)), axis=1)[:, :n1]
+    membership = np.zeros((len(rows), n))
+    np.put_along_axis(membership, rows, 1.0, axis=1)
+    return membership
+
+
+# Number of permutations in one batch whose statistic is at least as extreme as observed
+def _count_exceedances(job):
+    data, squares, n1, statistic, alternative, threshold, batch, exact = job
+    n = data.shape[0]
+    membership = _membership(n, n1, batch, exact)
+    values = _oriented(_statistic(membership, data, squares, n1, statistic), n1, n - n1, statistic, alternative)
+    return (values >= threshold).sum(axis=0)
+
+
+# Permutation test of x vs y for all features (columns); 1-D inputs are a single feature
+def permutation_test(x, y, statistic='mean_difference', n_permutations=N_PERMUTATIONS,
+                     alternative='two-sided', seed=None, n_jobs=1, batch_size=BATCH_SIZE):
+    if statistic not in STATISTICS:
+        raise ValueError(f"Unknown statistic: {statistic!r} (expected one of {STATISTICS})")
+    if alternative not in ALTERNATIVES:
+        raise ValueError(f"Unknown alternative: {alternative!r} (expected one of {ALTERNATIVES})")
+    x, y = np.asarray(x, dtype=float), np.asarray(y, dtype=float)
+    single = x.ndim == 1
+    if single:
+        x, y = x[:, None], y[:, None]
+    n1, n2 = x.shape[0], y.shape[0]
+    n = n1 + n2
+
+    data = np.concatenate([x, y])
+    missing = np.isnan(data).any(axis=0)
+    data = np.where(missing, 0.0, data)
+    if statistic == 'mann_whitney_u':
+        data = stats.rankdata(data, axis=0)
+    else:
+        data = data - data.mean(axis=0)  # Centred: sums of squares without cancellation
+    squares = data ** 2 if statistic == 'welch_t' else None
+
+    observed_membership = np.zeros((1, n))
+    observed_membership[0, :n1] = 1.0
+    observed = _statistic(observed_membership, data, squares, n1, statistic)[0]
+    oriented = _oriented(observed, n1, n2, statistic, alternative)
+    threshold = oriented - 1e-9 * np.maximum(1.0, np.abs(oriented))  # Float ties count as extreme
+
+    n_relabellings = comb(n, n1)
+    exact = n_relabellings <= n_permutations
+    if exact:
+        total = n_relabellings
+        batches = [(start, min(start + batch_size, total)) for start in range(0, total, batch_size)]
+    else:
+        total = n_permutations
+        seeds = np.random.SeedSequence(seed).spawn(-(-total // batch_size))
+        batches = [(min(batch_size, total - k * batch_size), batch_seed) for k, batch_seed in enumerate(seeds)]
+    jobs = [(data, squares, n1, statistic, alternative, threshold, batch, exact) for batch in batches]
+
+    if n_jobs > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+            counts = sum(pool.map(_count_exceedances, jobs))
+    else:
+        counts = sum(map(_count_exceedances, jobs))
+
+    pvalue = counts / total if exact else (counts + 1) / (total + 1)
+    pvalue = np.where(missing | np.isnan(oriented), np.nan, pvalue)
+    observed = np.where(missing, np.nan, observed)
+    if single:
+        return PermutationResult(observed[0], pvalue[0], total, exact)
+    return PermutationResult(observed, pvalue, total, exact)
@@ -0,0 +1,77 @@
+"""
+Content-Addressed Cache of Per-Sheet Results (lipid class pipeline)
+
+Lipids_PT_no311.py stores the results table and the PNG plot of every sheet here, so that a
+re-run only recomputes the sheets whose data or analysis parameters changed.
+
+Cache key (SHA-256): sheet name + the sheet's data (column names, dtypes and a hash of every
+cell value, pandas.util.hash_pandas_object) + the analysis parameters (excluded mice, alpha,
+test policy, number of permutations / bootstrap resamples, seed) + CACHE_VERSION.
+Editing one sheet, or changing a parameter, therefore never returns stale results; sheets
+that did not change are read back from the cache.
+
+One pickle file per key (folder 'lipid_cache') holding the results DataFrame and the PNG
+bytes (None if the sheet had no significant lipids). Files are written to a temporary name
+and moved into place.
+
+Dependencies:
+- hashlib
+- json
+- os
+- pickle
+- pandas
+"""
+
+import hashlib
+import json
+import os
+import pickle
+
+import pandas as pd
+
+CACHE_DIR = 'lipid_cache'
+CACHE_VERSION = 1  # Increase when the results layout or the plots change
+
+
+class SheetCache:
+    def __init__(self, cache_dir=CACHE_DIR):
+        self.cache_dir = cache_dir
+        self.counters = {'hits': 0, 'misses': 0}
+        os.makedirs(cache_dir, exist_ok=True)
+
+    # Content hash of one sheet and the parameters it is analysed with
+    @staticmethod
+    def key(sheet, df, params):
+        digest = hashlib.sha256()
+        digest.update(json.dumps({'sheet': sheet, 'params': params, 'version': CACHE_VERSION},
+                                 sort_keys=True, default=str).encode('UTF-8'))
+        digest.update(json.dumps([[str(column), str(dtype)] for column, dtype in df.dtypes.items()]).encode('UTF-8'))
+        digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+        return digest.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f'{key}.pkl')
+
+    # (results DataFrame, PNG bytes or None) for `key`, or None on a miss
+    def get(self, key):
+        try:
+            with open(self._path(key), 'rb') as file:
+                entry = pickle.load(file)
+        except FileNotFoundError:
+            self.counters['misses'] += 1
+            return None
+        self.counters['hits'] += 1
+        return entry['results'], entry['png']
+
+    def put(self, key, results, png=None):
+        path = self._path(key)
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'wb') as file:
+            pickle.dump({'results': results, 'png': png}, file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+    # Counters plus number and total size of the cached entries
+    def stats(self):
+        entries = [entry for entry in os.scandir(self.cache_dir) if entry.name.endswith('.pkl')]
+        return dict(self.counters, entries=len(entries),
+                    size_mb=sum(entry.stat().st_size for entry in entries) / 2**20)
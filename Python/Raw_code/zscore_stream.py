@@ -0,0 +1,148 @@
+"""
+Streaming Z-score Normalization for the Clustermaps
+
+df.apply(zscore) builds one intermediate Series per column (axis=1: per row) and returns a
+full float64 copy of the matrix. For the ~36 ImmuCellAI cell types that does not matter; for
+gene-level TPM matrices it doubles the memory before anything is drawn. This module
+normalizes float32 NumPy arrays in place, chunk by chunk:
+
+- RunningMoments: one-pass mean / variance per column (Welford, chunks merged with Chan's
+  update; float64 accumulators, so float32 data loses no precision in the statistics)
+- zscore_inplace: (x - mean) / std of a float32 array or np.memmap, in blocks of
+  `chunk_rows` rows. axis=0 (per column): one pass for the moments, one for the
+  normalization; axis=1 (per row): every block holds whole rows, so a single pass.
+  Same result as scipy.stats.zscore (ddof=0, NaN propagates, constant -> NaN). Constant
+  columns / rows are found by max == min, not by a zero variance: in float64 the variance
+  of e.g. 0.1 x 7 is a rounding residue, not 0, and would give z-scores of +-1.
+- zscore_frame: drop-in for df.apply(zscore) / df.apply(zscore, axis=1) on a DataFrame
+  (one float32 copy, normalized in place, labels kept); dtype=np.float64 for small matrices
+  whose values are printed (annotated heatmaps), so the printed decimals match df.apply(zscore)
+- npy_from_chunks / zscore_npy: write row blocks (e.g. pd.read_csv(..., chunksize=...)) to
+  a float32 .npy file and normalize it memory-mapped, so matrices larger than RAM can be
+  normalized before the displayed subset is selected
+
+Dependencies:
+- os
+- shutil
+- numpy
+- pandas
+"""
+
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+CHUNK_ROWS = 8192  # Rows per block: the float64 temporaries of a block stay small
+
+
+class RunningMoments:
+    def __init__(self, n_columns):
+        self.count = 0
+        self.mean = np.zeros(n_columns)
+        self.m2 = np.zeros(n_columns)  # Sum of squared deviations from the mean
+        self.minimum = np.full(n_columns, np.inf)
+        self.maximum = np.full(n_columns, -np.inf)
+
+    # Add a block of rows (rows x columns); NaN propagates into the column's moments
+    def update(self, chunk):
+        n_b = len(chunk)
+        if n_b == 0:
+            return self
+        mean_b = chunk.mean(axis=0, dtype=np.float64)
+        m2_b = np.square(chunk - mean_b).sum(axis=0)
+        n = self.count + n_b
+        delta = mean_b - self.mean
+        self.mean = self.mean + delta * (n_b / n)
+        self.m2 = self.m2 + m2_b + delta ** 2 * (self.count * n_b / n)
+        self.minimum = np.minimum(self.minimum, chunk.min(axis=0))
+        self.maximum = np.maximum(self.maximum, chunk.max(axis=0))
+        self.count = n
+        return self
+
+    # Standard deviation per column; NaN for constant columns (max == min)
+    def std(self, ddof=0):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            std = np.sqrt(self.m2 / (self.count - ddof))
+        return np.where(self.maximum > self.minimum, std, np.nan)
+
+
+# Column moments of a (memory-mapped) 2-D array, read in blocks of rows
+def column_moments(array, chunk_rows=CHUNK_ROWS):
+    moments = RunningMoments(array.shape[1])
+    for start in range(0, array.shape[0], chunk_rows):
+        moments.update(array[start:start + chunk_rows])
+    return moments
+
+
+# Subtract `mean` and divide by `std` in place (float32; std 0 -> NaN like scipy's zscore)
+def _normalize_block(block, mean, std):
+    with np.errstate(invalid='ignore', divide='ignore'):
+        scale = (1 / std).astype(block.dtype)
+        np.subtract(block, mean.astype(block.dtype), out=block)
+        np.multiply(block, scale, out=block)
+
+
+# Z-scores of a float32 array or np.memmap in place (axis=0: per column, axis=1: per row)
+def zscore_inplace(array, axis=0, ddof=0, chunk_rows=CHUNK_ROWS):
+    if array.ndim != 2 or not np.issubdtype(array.dtype, np.floating):
+        raise ValueError(f"Expected a 2-D floating point array, got {array.ndim}-D {array.dtype}")
+    if axis == 0:
+        moments = column_moments(array, chunk_rows)
+        mean, std = moments.mean, moments.std(ddof)
+        for start in range(0, array.shape[0], chunk_rows):
+            _normalize_block(array[start:start + chunk_rows], mean, std)
+    elif axis == 1:
+        for start in range(0, array.shape[0], chunk_rows):
+            block = array[start:start + chunk_rows]
+            moments = RunningMoments(len(block)).update(block.T)
+            _normalize_block(block, moments.mean[:, None], moments.std(ddof)[:, None])
+    else:
+        raise ValueError(f"axis must be 0 or 1, got {axis!r}")
+    if isinstance(array, np.memmap):
+        array.flush()
+    return array
+
+
+# df.apply(zscore, axis=axis) as one float32 (or `dtype`) copy normalized in place (same index / columns)
+def zscore_frame(df, axis=0, ddof=0, chunk_rows=CHUNK_ROWS, dtype=np.float32):
+    values = df.to_numpy(dtype=dtype, copy=True)
+    zscore_inplace(values, axis, ddof, chunk_rows)
+    return pd.DataFrame(values, index=df.index, columns=df.columns, copy=False)
+
+
+# Write row blocks (arrays or DataFrames with the same columns) to a float32 .npy file
+def npy_from_chunks(chunks, path):
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    n_rows, n_columns = 0, None
+    with open(f'{tmp_path}.raw', 'wb') as raw:
+        for chunk in chunks:
+            block = np.ascontiguousarray(np.asarray(chunk, dtype=np.float32))
+            if n_columns is None:
+                n_columns = block.shape[1]
+            elif block.shape[1] != n_columns:
+                raise ValueError(f"Chunk with {block.shape[1]} columns, expected {n_columns}")
+            raw.write(block.tobytes())
+            n_rows += len(block)
+    if n_columns is None:
+        os.remove(f'{tmp_path}.raw')
+        raise ValueError("No chunks to write")
+
+    # .npy header for the final shape, then the raw blocks copied behind it
+    with open(tmp_path, 'wb') as file, open(f'{tmp_path}.raw', 'rb') as raw:
+        header = {'descr': np.lib.format.dtype_to_descr(np.dtype(np.float32)),
+                  'fortran_order': False, 'shape': (n_rows, n_columns)}
+        np.lib.format.write_array_header_1_0(file, header)
+        shutil.copyfileobj(raw, file, 2**24)
+    os.remove(f'{tmp_path}.raw')
+    os.replace(tmp_path, path)
+    return n_rows, n_columns
+
+
+# Z-scores of a float32 .npy file, memory-mapped and written back in place
+def zscore_npy(path, axis=0, ddof=0, chunk_rows=CHUNK_ROWS):
+    array = np.load(path, mmap_mode='r+')
+    if array.dtype != np.float32:
+        raise ValueError(f"{path}: expected float32, got {array.dtype} (write it with npy_from_chunks)")
+    return zscore_inplace(array, axis, ddof, chunk_rows)